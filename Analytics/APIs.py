@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+from database import get_db
+from dependencies import RoleChecker
+from roles import RoleEnum as Role
+from User.models import User
+from Workload import crud as workload_crud
+from . import crud, schemas, snapshot
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+role_admin = RoleChecker([Role.admin, Role.super_admin])
+role_super_admin = RoleChecker([Role.super_admin])
+
+
+@router.get("/flow", response_model=List[schemas.FlowBucket])
+def get_flow(
+    granularity: Literal["day", "week", "month"] = "day",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    department_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_admin),
+):
+    """
+    Inflow, outflow, backlog and resolution-time percentiles per department,
+    answered from the daily rollup tables.
+
+    - Admins see their own department
+    - Super admins see every department, or the one requested
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    if (end - start).days >= crud.FLOW_MAX_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"start..end may span at most {crud.FLOW_MAX_DAYS} days")
+    start = crud.period_start(start, granularity)
+
+    if current_user.role != Role.super_admin:
+        department_id = current_user.department_id
+    department_ids = [department_id] if department_id else None
+
+    backlog = {
+        row.scope_id: row.open_count + row.in_progress_count
+        for row in workload_crud.get_counters(db, "department", department_ids)
+    }
+    return crud.flow_report(db, start, end, granularity, department_ids, backlog)
+
+
+@router.post("/rebuild", response_model=schemas.RebuildResult)
+def rebuild_rollups(
+    since: date = Query(..., description="First day to recompute"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    """Recompute the rollups from the source tables for every day since `since`."""
+    days = crud.rebuild(db, since)
+    return {"since": since, "days": days}
+
+
+def _current_snapshot(db: Session) -> snapshot.Snapshot:
+    current = snapshot.get_snapshot()
+    if current is None:
+        snapshot.build(db)
+        current = snapshot.get_snapshot()
+    return current
+
+
+@router.get("/aggregate", response_model=schemas.AggregateResult)
+def aggregate(
+    group_by: str = Query("status", description=f"Comma-separated: {', '.join(snapshot.GROUP_BY_FIELDS)}"),
+    percentiles: str = Query("50,90,99", description="Comma-separated resolution-time percentiles"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    department_id: Optional[List[int]] = Query(None),
+    assigned_to: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    """
+    Ad-hoc counts and resolution-time percentiles over the columnar snapshot.
+
+    Results reflect the snapshot's build time, not the live tables.
+    """
+    fields = [f.strip() for f in group_by.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in snapshot.GROUP_BY_FIELDS]
+    if not fields or unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"group_by must be chosen from {', '.join(snapshot.GROUP_BY_FIELDS)}")
+    if status_filter is not None and status_filter not in snapshot.STATUS_CODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown status '{status_filter}'")
+    try:
+        quantiles = [float(p) for p in percentiles.split(",") if p.strip()]
+    except ValueError:
+        quantiles = None
+    if quantiles is None or any(not 0 <= p <= 100 for p in quantiles):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="percentiles must be numbers between 0 and 100")
+
+    current = _current_snapshot(db)
+    groups = snapshot.aggregate(
+        current, fields, quantiles,
+        status=status_filter, department_ids=department_id, assigned_to=assigned_to,
+        created_after=created_after, created_before=created_before,
+    )
+    return {
+        "snapshot_version": current.version,
+        "snapshot_built_at": current.built_at,
+        "rows": len(current),
+        "groups": groups,
+    }
+
+
+@router.post("/snapshot/refresh", response_model=schemas.SnapshotInfo)
+def refresh_snapshot(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    """Rebuild the columnar snapshot now and publish it to every worker."""
+    snapshot.build(db)
+    current = snapshot.get_snapshot()
+    return {"version": current.version, "built_at": current.built_at, "rows": len(current)}
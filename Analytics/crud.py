@@ -0,0 +1,311 @@
+import bisect
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from . import models
+
+OPEN_STATUSES = {"pending", "in_progress"}
+RESOLVED_STATUSES = {"solved", "not_solved"}
+
+# Upper edges (hours) of the resolution time histogram buckets; the last bucket is open-ended
+BUCKET_EDGES_HOURS = [1, 2, 4, 8, 12, 24, 36, 48, 72, 96, 120, 168, 240, 336, 504, 720]
+
+# Longest start..end span GET /analytics/flow answers
+FLOW_MAX_DAYS = 366
+
+FLOW_COLUMNS = (
+    "created_count", "resolved_count", "closed_count", "reopened_count",
+    "transferred_in_count", "transferred_out_count", "resolution_seconds_sum",
+)
+
+
+def bucket_for(seconds: float) -> int:
+    return bisect.bisect_left(BUCKET_EDGES_HOURS, max(seconds, 0) / 3600)
+
+
+def _day(value: Optional[datetime], default: date) -> date:
+    return value.date() if value else default
+
+
+def _widen(extremes: Dict[tuple, List[float]], key: tuple, seconds: float) -> None:
+    bounds = extremes.get(key)
+    if bounds is None:
+        extremes[key] = [seconds, seconds]
+    else:
+        bounds[0] = min(bounds[0], seconds)
+        bounds[1] = max(bounds[1], seconds)
+
+
+def _resolution_seconds(state) -> float:
+    if state.resolved_at and state.created_at:
+        return (state.resolved_at - state.created_at).total_seconds()
+    return 0.0
+
+
+def apply_changes(db: Session, changes: Iterable, now: Optional[datetime] = None) -> None:
+    """Turn lifecycle changes into rollup deltas and upsert them."""
+    today = (now or datetime.utcnow()).date()
+    flow: Dict[Tuple[date, int], Counter] = defaultdict(Counter)
+    histogram: Counter = Counter()
+    extremes: Dict[tuple, List[float]] = {}
+
+    for change in changes:
+        before, after = change.before, change.after
+        was_open = before is not None and before.status in OPEN_STATUSES
+        is_open = after is not None and after.status in OPEN_STATUSES
+
+        if before is None and after is not None and after.department_id is not None:
+            flow[(_day(after.created_at, today), after.department_id)]["created_count"] += 1
+
+        if was_open and is_open and before.department_id != after.department_id:
+            if before.department_id is not None:
+                flow[(today, before.department_id)]["transferred_out_count"] += 1
+            if after.department_id is not None:
+                flow[(today, after.department_id)]["transferred_in_count"] += 1
+
+        if was_open and after is not None and not is_open and after.department_id is not None:
+            if after.status in RESOLVED_STATUSES:
+                day = _day(after.resolved_at, today)
+                seconds = _resolution_seconds(after)
+                flow[(day, after.department_id)]["resolved_count"] += 1
+                flow[(day, after.department_id)]["resolution_seconds_sum"] += seconds
+                histogram[(day, after.department_id, bucket_for(seconds))] += 1
+                _widen(extremes, (day, after.department_id, bucket_for(seconds)), seconds)
+            else:
+                flow[(today, after.department_id)]["closed_count"] += 1
+
+        if before is not None and not was_open and is_open:
+            if before.status in RESOLVED_STATUSES and before.department_id is not None:
+                # The resolution no longer stands: take it back out of the day it was counted on
+                day = _day(before.resolved_at, today)
+                seconds = _resolution_seconds(before)
+                flow[(day, before.department_id)]["resolved_count"] -= 1
+                flow[(day, before.department_id)]["resolution_seconds_sum"] -= seconds
+                histogram[(day, before.department_id, bucket_for(seconds))] -= 1
+                if after.department_id != before.department_id:
+                    flow[(today, before.department_id)]["transferred_out_count"] += 1
+                    flow[(today, after.department_id)]["transferred_in_count"] += 1
+            else:
+                flow[(today, after.department_id)]["reopened_count"] += 1
+
+    flow_rows = [
+        {"day": day, "department_id": dept, **{c: counts.get(c, 0) for c in FLOW_COLUMNS}}
+        for (day, dept), counts in flow.items() if any(counts.values())
+    ]
+    if flow_rows:
+        stmt = sqlite_insert(models.GrievanceFlowDaily).values(flow_rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "department_id"],
+            set_={c: getattr(models.GrievanceFlowDaily, c) + getattr(stmt.excluded, c) for c in FLOW_COLUMNS},
+        ))
+
+    histogram_rows = [
+        {"day": day, "department_id": dept, "bucket": bucket, "count": count,
+         "min_seconds": extremes.get((day, dept, bucket), (None, None))[0],
+         "max_seconds": extremes.get((day, dept, bucket), (None, None))[1]}
+        for (day, dept, bucket), count in histogram.items() if count
+    ]
+    if histogram_rows:
+        H = models.ResolutionTimeHistogram
+        stmt = sqlite_insert(H).values(histogram_rows)
+        # Removals cannot shrink the bounds; rebuild() recomputes them exactly
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "department_id", "bucket"],
+            set_={
+                "count": H.count + stmt.excluded.count,
+                "min_seconds": func.min(func.coalesce(H.min_seconds, stmt.excluded.min_seconds),
+                                        func.coalesce(stmt.excluded.min_seconds, H.min_seconds)),
+                "max_seconds": func.max(func.coalesce(H.max_seconds, stmt.excluded.max_seconds),
+                                        func.coalesce(stmt.excluded.max_seconds, H.max_seconds)),
+            },
+        ))
+
+
+def rebuild(db: Session, since: date) -> int:
+    """
+    Recompute resolution counts and histograms from the grievances table for
+    every day since `since`, correcting drift or resolutions that arrived late.
+
+    A resolution counts when the grievance has a resolved_at and is not open
+    again, whatever happened afterwards: a resolved grievance that was later
+    closed stays resolved, exactly as apply_changes() counts it. Only
+    resolutions are recomputed: creations, transfers, closes and reopens depend
+    on history the grievance row no longer carries and are kept as recorded.
+    Returns the number of (day, department) rows touched.
+    """
+    from Grievances.models import Grievance
+
+    F = models.GrievanceFlowDaily
+    resolved = Counter()
+    seconds_sum = Counter()
+    histogram = Counter()
+    extremes: Dict[tuple, List[float]] = {}
+    for created_at, resolved_at, department_id in db.execute(
+        select(Grievance.created_at, Grievance.resolved_at, Grievance.department_id)
+        .where(Grievance.resolved_at >= datetime.combine(since, datetime.min.time()))
+        .where(Grievance.status.not_in(list(OPEN_STATUSES)))
+        .where(Grievance.department_id.is_not(None))
+        .execution_options(yield_per=5000)
+    ):
+        key = (resolved_at.date(), department_id)
+        seconds = (resolved_at - created_at).total_seconds() if created_at else 0.0
+        resolved[key] += 1
+        seconds_sum[key] += seconds
+        histogram[key + (bucket_for(seconds),)] += 1
+        _widen(extremes, key + (bucket_for(seconds),), seconds)
+
+    db.execute(
+        update(F).where(F.day >= since).values(resolved_count=0, resolution_seconds_sum=0)
+    )
+    db.execute(delete(models.ResolutionTimeHistogram).where(models.ResolutionTimeHistogram.day >= since))
+    if resolved:
+        stmt = sqlite_insert(F).values([
+            {"day": day, "department_id": dept, "resolved_count": count,
+             "resolution_seconds_sum": seconds_sum[(day, dept)],
+             **{c: 0 for c in FLOW_COLUMNS if c not in ("resolved_count", "resolution_seconds_sum")}}
+            for (day, dept), count in resolved.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "department_id"],
+            set_={"resolved_count": stmt.excluded.resolved_count,
+                  "resolution_seconds_sum": stmt.excluded.resolution_seconds_sum},
+        ))
+    if histogram:
+        db.execute(insert(models.ResolutionTimeHistogram), [
+            {"day": day, "department_id": dept, "bucket": bucket, "count": count,
+             "min_seconds": extremes[(day, dept, bucket)][0], "max_seconds": extremes[(day, dept, bucket)][1]}
+            for (day, dept, bucket), count in histogram.items()
+        ])
+    db.commit()
+    return len(resolved)
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _percentile_hours(buckets: Counter, q: float,
+                      bounds: Optional[Dict[int, List[float]]] = None) -> Optional[float]:
+    """
+    Interpolate the q-quantile inside its histogram bucket, clamped to the
+    fastest and slowest resolution observed in that bucket (`bounds`, in seconds).
+    """
+    total = sum(buckets.values())
+    if total <= 0:
+        return None
+    target = q * total
+    cumulative = 0
+    for bucket in sorted(buckets):
+        count = buckets[bucket]
+        if count <= 0:
+            continue
+        if cumulative + count >= target:
+            lower = BUCKET_EDGES_HOURS[bucket - 1] if bucket > 0 else 0.0
+            if bucket >= len(BUCKET_EDGES_HOURS):
+                estimate = float(lower)
+            else:
+                upper = BUCKET_EDGES_HOURS[bucket]
+                estimate = lower + (upper - lower) * (target - cumulative) / count
+            observed = (bounds or {}).get(bucket)
+            if observed:
+                estimate = min(max(estimate, observed[0] / 3600), observed[1] / 3600)
+            return round(estimate, 2)
+        cumulative += count
+    return float(BUCKET_EDGES_HOURS[-1])
+
+
+def flow_report(db: Session, start: date, end: date, granularity: str,
+                department_ids: Optional[List[int]], current_backlog: Dict[int, int]) -> List[dict]:
+    """
+    Aggregate the daily rollups into day/week/month buckets.
+
+    Backlog at the end of a period is the current backlog minus the net inflow
+    recorded after that period, so no grievance rows are read. The net inflow
+    after the last period is summed per department in SQL; earlier periods add
+    their own net inflow to it walking backwards.
+    """
+    F = models.GrievanceFlowDaily
+    Hst = models.ResolutionTimeHistogram
+    # The last period may run past `end`; its later days still count towards its net inflow
+    tail_start = _next_period(period_start(end, granularity), granularity)
+    net_inflow = (F.created_count + F.transferred_in_count + F.reopened_count
+                  - F.resolved_count - F.closed_count - F.transferred_out_count)
+
+    query = db.query(F).filter(F.day >= start, F.day < tail_start)
+    tail_query = db.query(F.department_id, func.sum(net_inflow)).filter(F.day >= tail_start)
+    hist_query = db.query(Hst).filter(Hst.day >= start, Hst.day <= end)
+    if department_ids is not None:
+        query = query.filter(F.department_id.in_(department_ids))
+        tail_query = tail_query.filter(F.department_id.in_(department_ids))
+        hist_query = hist_query.filter(Hst.department_id.in_(department_ids))
+
+    periods: Dict[Tuple[date, int], Counter] = defaultdict(Counter)
+    net_by_period: Dict[Tuple[date, int], int] = defaultdict(int)
+    for row in query.all():
+        key = (period_start(row.day, granularity), row.department_id)
+        net_by_period[key] += (
+            row.created_count + row.transferred_in_count + row.reopened_count
+            - row.resolved_count - row.closed_count - row.transferred_out_count
+        )
+        if row.day <= end:
+            for column in FLOW_COLUMNS:
+                periods[key][column] += getattr(row, column)
+
+    # Net inflow recorded after each period, latest period first
+    running = {dept: total for dept, total in tail_query.group_by(F.department_id).all()}
+    net_after: Dict[Tuple[date, int], int] = {}
+    for key in sorted(net_by_period, reverse=True):
+        dept = key[1]
+        net_after[key] = running.get(dept, 0)
+        running[dept] = net_after[key] + net_by_period[key]
+
+    histograms: Dict[Tuple[date, int], Counter] = defaultdict(Counter)
+    bounds: Dict[Tuple[date, int], Dict[int, List[float]]] = defaultdict(dict)
+    for row in hist_query.all():
+        key = (period_start(row.day, granularity), row.department_id)
+        histograms[key][row.bucket] += row.count
+        if row.min_seconds is not None and row.max_seconds is not None:
+            observed = bounds[key].get(row.bucket)
+            bounds[key][row.bucket] = (
+                [row.min_seconds, row.max_seconds] if observed is None
+                else [min(observed[0], row.min_seconds), max(observed[1], row.max_seconds)]
+            )
+
+    results = []
+    for (start_day, dept), counts in sorted(periods.items()):
+        resolved = counts["resolved_count"]
+        buckets = histograms.get((start_day, dept), Counter())
+        observed = bounds.get((start_day, dept))
+        results.append({
+            "period_start": start_day,
+            "department_id": dept,
+            "created": counts["created_count"],
+            "resolved": resolved,
+            "closed": counts["closed_count"],
+            "transferred_in": counts["transferred_in_count"],
+            "transferred_out": counts["transferred_out_count"],
+            "reopened": counts["reopened_count"],
+            "inflow": counts["created_count"] + counts["transferred_in_count"] + counts["reopened_count"],
+            "outflow": resolved + counts["closed_count"] + counts["transferred_out_count"],
+            "backlog_end": current_backlog.get(dept, 0) - net_after[(start_day, dept)],
+            "resolution_p50_hours": _percentile_hours(buckets, 0.5, observed),
+            "resolution_p90_hours": _percentile_hours(buckets, 0.9, observed),
+            "resolution_p99_hours": _percentile_hours(buckets, 0.99, observed),
+            "resolution_mean_hours": round(counts["resolution_seconds_sum"] / resolved / 3600, 2) if resolved > 0 else None,
+        })
+    return results
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, Date, Float
+from database import Base
+
+
+class GrievanceFlowDaily(Base):
+    """
+    Daily grievance flow per department.
+
+    Updated from lifecycle changes in the same transaction as the grievance.
+    Creations and resolutions are bucketed by their own timestamps (event time),
+    so a late or reverted change corrects the day it belongs to.
+    """
+    __tablename__ = "grievance_flow_daily"
+
+    day = Column(Date, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    created_count = Column(Integer, nullable=False, default=0)
+    resolved_count = Column(Integer, nullable=False, default=0)
+    closed_count = Column(Integer, nullable=False, default=0)  # closed without resolution
+    reopened_count = Column(Integer, nullable=False, default=0)
+    transferred_in_count = Column(Integer, nullable=False, default=0)
+    transferred_out_count = Column(Integer, nullable=False, default=0)
+    resolution_seconds_sum = Column(Float, nullable=False, default=0)
+
+
+class ResolutionTimeHistogram(Base):
+    """Resolution times of grievances resolved on a day, in fixed log-spaced buckets."""
+    __tablename__ = "resolution_time_histogram"
+
+    day = Column(Date, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    # Fastest and slowest resolution counted in the bucket, to keep percentile estimates inside them
+    min_seconds = Column(Float, nullable=True)
+    max_seconds = Column(Float, nullable=True)
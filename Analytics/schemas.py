@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+
+class FlowBucket(BaseModel):
+    period_start: date
+    department_id: int
+    created: int
+    resolved: int
+    closed: int
+    transferred_in: int
+    transferred_out: int
+    reopened: int
+    inflow: int
+    outflow: int
+    backlog_end: int
+    resolution_p50_hours: Optional[float] = None
+    resolution_p90_hours: Optional[float] = None
+    resolution_p99_hours: Optional[float] = None
+    resolution_mean_hours: Optional[float] = None
+
+
+class RebuildResult(BaseModel):
+    since: date
+    days: int
+
+
+class AggregateGroup(BaseModel):
+    key: Dict[str, Any]
+    count: int
+    resolved: int
+    resolution_mean_hours: Optional[float] = None
+    resolution_percentiles_hours: Dict[str, float] = {}
+
+
+class AggregateResult(BaseModel):
+    snapshot_version: str
+    snapshot_built_at: datetime
+    rows: int
+    groups: List[AggregateGroup]
+
+
+class SnapshotInfo(BaseModel):
+    version: str
+    built_at: datetime
+    rows: int
@@ -0,0 +1,279 @@
+"""
+Columnar snapshot of the grievance fact table for ad-hoc aggregations.
+
+Each column is a NumPy array saved as its own .npy file under
+SNAPSHOT_DIR/<version>/ and loaded with mmap_mode="r", so every worker process
+maps the same pages instead of holding a private copy. A build writes a new
+version directory and then atomically swaps the CURRENT pointer file; readers
+pick up the new version on their next query and old versions are pruned.
+
+Grouping, filtering and percentiles are done with vectorized NumPy over the
+whole snapshot (np.unique/np.bincount for groups; for percentiles, one
+np.argsort over the group code and resolution hours folded into a single float
+key), so no ORM objects are created.
+
+Build from the command line:
+
+    python -m Analytics.snapshot build
+"""
+import argparse
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.orm import Session
+from Grievances.models import Grievance, GrievanceStatus
+
+SNAPSHOT_DIR = Path("artifacts") / "analytics_snapshot"
+BUILD_CHUNK_SIZE = 50_000
+KEEP_VERSIONS = 2
+# Integer group columns spanning fewer values than this are factorized without sorting
+DENSE_FACTORIZE_SPAN = 1 << 20
+
+STATUS_CODES = [s.value for s in GrievanceStatus]
+_STATUS_INDEX = {name: i for i, name in enumerate(STATUS_CODES)}
+
+# Column name -> dtype; -1 stands for NULL in every column
+COLUMNS = {
+    "id": np.int64,
+    "user_id": np.int32,
+    "department_id": np.int32,
+    "assigned_to": np.int32,
+    "status": np.int8,
+    "priority": np.int32,
+    "created_at": np.int64,   # epoch seconds (UTC)
+    "resolved_at": np.int64,  # epoch seconds (UTC)
+}
+
+GROUP_BY_FIELDS = ("status", "department_id", "assigned_to", "user_id", "priority", "day", "week", "month")
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY = 86_400
+# 1970-01-01 was a Thursday; weeks start on Monday
+_WEEK_OFFSET = 3 * _DAY
+
+
+class Snapshot:
+    def __init__(self, columns: Dict[str, np.ndarray], version: str, built_at: datetime):
+        self.columns = columns
+        self.version = version
+        self.built_at = built_at
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        columns = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+        built_at = datetime.utcfromtimestamp(int((path / "BUILT_AT").read_text()))
+        return cls(columns, path.name, built_at)
+
+
+def build(db: Session) -> Path:
+    """Stream the grievances table into a new snapshot version and make it current."""
+    G = Grievance
+    query = select(
+        G.id, G.user_id, G.department_id, G.assigned_to, G.status, G.priority,
+        cast(func.strftime("%s", G.created_at), Integer),
+        cast(func.strftime("%s", G.resolved_at), Integer),
+    ).order_by(G.id).execution_options(yield_per=BUILD_CHUNK_SIZE)
+
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+    for partition in db.execute(query).partitions():
+        values = list(zip(*partition))
+        for (name, dtype), column in zip(COLUMNS.items(), values):
+            if name == "status":
+                column = [_STATUS_INDEX.get(getattr(s, "value", s), -1) for s in column]
+            chunks[name].append(np.fromiter((-1 if v is None else v for v in column), dtype=dtype, count=len(column)))
+
+    version = f"{int(time.time() * 1000)}"
+    path = SNAPSHOT_DIR / version
+    path.mkdir(parents=True, exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        column = np.concatenate(chunks[name]) if chunks[name] else np.empty(0, dtype=dtype)
+        np.save(path / f"{name}.npy", column)
+    (path / "BUILT_AT").write_text(str(int(time.time())))
+
+    pointer = SNAPSHOT_DIR / "CURRENT"
+    tmp = SNAPSHOT_DIR / "CURRENT.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, pointer)
+    _prune(keep=version)
+    return path
+
+
+def _prune(keep: str):
+    versions = sorted(p for p in SNAPSHOT_DIR.iterdir() if p.is_dir())
+    for path in versions[:-KEEP_VERSIONS]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_snapshot: Optional[Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """The current snapshot, remapped when a newer version is published. None if never built."""
+    global _snapshot
+    try:
+        version = (SNAPSHOT_DIR / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        return None
+    if _snapshot is None or _snapshot.version != version:
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = Snapshot.load(SNAPSHOT_DIR / version)
+    return _snapshot
+
+
+def _epoch(value: datetime) -> int:
+    return int((value - _EPOCH).total_seconds())
+
+
+def _derived(snapshot: Snapshot, field: str, rows: np.ndarray) -> np.ndarray:
+    """Group column values; dates become day, week or month numbers since the epoch."""
+    if field not in ("day", "week", "month"):
+        return snapshot.columns[field][rows]
+    created = snapshot.columns["created_at"][rows]
+    if field == "day":
+        return created // _DAY
+    if field == "week":
+        return (created + _WEEK_OFFSET) // (7 * _DAY)
+    return created.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+
+def _factorize(values: np.ndarray):
+    """Sorted unique values and the index of each value in them."""
+    if values.size and values.dtype.kind in "iu":
+        low, high = int(values.min()), int(values.max())
+        if high - low < DENSE_FACTORIZE_SPAN:
+            # Small integer range: a presence table avoids sorting
+            offsets = values - low
+            present = np.zeros(high - low + 1, dtype=bool)
+            present[offsets] = True
+            lookup = np.cumsum(present) - 1
+            return np.flatnonzero(present) + low, lookup[offsets]
+    return np.unique(values, return_inverse=True)
+
+
+def _key_value(field: str, value):
+    if field == "status":
+        return STATUS_CODES[value] if value >= 0 else None
+    if field == "day":
+        return (_EPOCH + timedelta(days=value)).date()
+    if field == "week":
+        return (_EPOCH + timedelta(weeks=value) - timedelta(seconds=_WEEK_OFFSET)).date()
+    if field == "month":
+        return date(1970 + value // 12, value % 12 + 1, 1)
+    return None if value == -1 else value
+
+
+def aggregate(
+    snapshot: Snapshot,
+    group_by: Sequence[str],
+    percentiles: Sequence[float] = (),
+    status: Optional[str] = None,
+    department_ids: Optional[Sequence[int]] = None,
+    assigned_to: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Count grievances per group and, for resolved ones, resolution-time percentiles
+    in hours. Groups with no rows are not returned.
+    """
+    cols = snapshot.columns
+    mask = np.ones(len(snapshot), dtype=bool)
+    if status is not None:
+        mask &= cols["status"] == _STATUS_INDEX[status]
+    if department_ids is not None:
+        mask &= np.isin(cols["department_id"], np.asarray(department_ids, dtype=np.int32))
+    if assigned_to is not None:
+        mask &= cols["assigned_to"] == assigned_to
+    if created_after is not None:
+        mask &= cols["created_at"] >= _epoch(created_after)
+    if created_before is not None:
+        mask &= cols["created_at"] <= _epoch(created_before)
+    rows = np.flatnonzero(mask)
+    if rows.size == 0:
+        return []
+
+    # Factorize each group column, then fold them into one dense group code
+    uniques, codes = [], np.zeros(rows.size, dtype=np.int64)
+    for field in group_by:
+        values, inverse = _factorize(_derived(snapshot, field, rows))
+        uniques.append(values)
+        codes = codes * len(values) + inverse
+    group_codes, group_index = _factorize(codes)
+    counts = np.bincount(group_index, minlength=len(group_codes))
+
+    resolved = cols["resolved_at"][rows]
+    has_resolution = resolved >= 0
+    hours = (resolved[has_resolution] - cols["created_at"][rows][has_resolution]) / 3600.0
+    hours_group = group_index[has_resolution]
+    resolved_counts = np.bincount(hours_group, minlength=len(group_codes))
+    hours_sum = np.bincount(hours_group, weights=hours, minlength=len(group_codes))
+
+    quantiles = {}
+    if percentiles and hours.size:
+        # One argsort over (group, hours) folded into a single float key
+        shifted = hours - hours.min()
+        order = np.argsort(hours_group * (shifted.max() + 1.0) + shifted)
+        sorted_hours = hours[order]
+        starts = np.concatenate(([0], np.cumsum(resolved_counts)[:-1]))
+        present = resolved_counts > 0
+        for p in percentiles:
+            # Linear interpolation between closest ranks, per group
+            position = (resolved_counts - 1).clip(min=0) * (p / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, (resolved_counts - 1).clip(min=0))
+            lo = sorted_hours[np.where(present, starts + lower, 0)]
+            hi = sorted_hours[np.where(present, starts + upper, 0)]
+            quantiles[p] = np.where(present, lo + (hi - lo) * (position - lower), np.nan)
+
+    # Decode group codes back into per-field values, one vectorized pass per field
+    positions = np.unravel_index(group_codes, [len(values) for values in uniques])
+    key_columns = [
+        [_key_value(field, v) for v in values[position].tolist()]
+        for field, values, position in zip(group_by, uniques, positions)
+    ]
+    means = np.where(resolved_counts > 0, hours_sum / np.maximum(resolved_counts, 1), np.nan).round(2).tolist()
+    quantile_lists = {f"{p:g}": q.round(2).tolist() for p, q in quantiles.items()}
+    resolved_list = resolved_counts.tolist()
+
+    results = []
+    for g, count in enumerate(counts.tolist()):
+        results.append({
+            "key": {field: column[g] for field, column in zip(group_by, key_columns)},
+            "count": count,
+            "resolved": resolved_list[g],
+            "resolution_mean_hours": means[g] if resolved_list[g] else None,
+            "resolution_percentiles_hours": {
+                p: q[g] for p, q in quantile_lists.items() if resolved_list[g]
+            },
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analytics snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Build a new snapshot from the grievances table")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from database import SessionLocal
+        with SessionLocal() as db:
+            path = build(db)
+        snapshot = get_snapshot()
+        print(f"Built snapshot of {len(snapshot)} grievances at {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status , Query
+from fastapi import APIRouter, Depends, HTTPException, status , Query, Response
 from sqlalchemy.orm import Session
 from typing import List , Optional
 from roles import RoleEnum as Role
@@ -22,11 +22,13 @@ def create_comment(comment: schemas.CommentCreate, db: Session = Depends(get_db)
 @router.get("/grievance/{grievance_id}", response_model=List[schemas.Comment])
 def get_comments(
         grievance_id: int,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: user_models.User = Depends(get_current_active_user),
         skip: int = 0,
         limit: int = Query(100, le=200, description="Number of records per page (max 200)"),
         search: Optional[str] = None,
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
         sort_order: str = Query("desc", description="Sort order: 'asc' or 'desc'", regex="^(asc|desc)$")
 ):
     """
@@ -35,6 +37,10 @@ def get_comments(
     Search fields:
     - content: Case-insensitive search in comment content
 
+    Pagination: when there are more comments the response carries an
+    X-Next-Cursor header; pass it back as `cursor` for the next page.
+    `skip` still works but scans every skipped comment.
+
     Returns:
     - List of comments for the specified grievance
     - 403 if user doesn't have access to the grievance
@@ -57,7 +63,18 @@ def get_comments(
             detail="Not authorized to view comments for this grievance"
         )
 
-    # Base query
+    if not skip:
+        try:
+            comments, next_cursor = crud.list_comments_page(
+                db, grievance_id, cursor, limit, descending=sort_order.lower() == "desc", search=search
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return comments
+
+    # Offset pagination
     query = db.query(models.Comment).filter(
         models.Comment.grievance_id == grievance_id
     )
@@ -70,9 +87,9 @@ def get_comments(
         )
 
     if sort_order.lower() == "asc":
-        query = query.order_by(models.Comment.created_at.asc())
+        query = query.order_by(models.Comment.timestamp.asc(), models.Comment.id.asc())
     else:
-        query = query.order_by(models.Comment.created_at.desc())
+        query = query.order_by(models.Comment.timestamp.desc(), models.Comment.id.desc())
 
     # Apply pagination and return results
     return query.offset(skip).limit(limit).all()
\ No newline at end of file
@@ -1,10 +1,24 @@
+import base64
+import json
+from sqlalchemy import String, and_, func, or_, select, type_coerce
 from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
 from . import models, schemas
 from datetime import datetime
+from User.models import User
+from Grievances.models import Grievance
+from Grievances import lifecycle
+from Notifications import crud as notification_crud
+import events
 
 def create_comment(db: Session, comment: schemas.CommentCreate):
-    db_comment = models.Comment(**comment.dict(), timestamp=datetime.now())
+    db_comment = models.Comment(**comment.model_dump(), timestamp=datetime.utcnow())
     db.add(db_comment)
+    grievance = db.get(Grievance, db_comment.grievance_id)
+    if grievance is not None:
+        notification_crud.notify_comment(db, grievance, db_comment)
+        events.queue_event(db, "comment", grievance.id, before=lifecycle.state_of(grievance),
+                           author_id=db_comment.user_id)
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -12,3 +26,87 @@ def create_comment(db: Session, comment: schemas.CommentCreate):
 def get_comments_by_grievance(db: Session, grievance_id: int):
     grievance_id = int(grievance_id)
     return db.query(models.Comment).filter(models.Comment.grievance_id == grievance_id).all()
+
+
+COMMENT_PREVIEW_LENGTH = 140
+
+
+def comment_stats(db: Session, grievance_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Comment count and latest comment of each grievance, in one query over the
+    (grievance_id, timestamp) index. Grievances without comments get count 0.
+    """
+    grievance_ids = list(set(grievance_ids))
+    if not grievance_ids:
+        return {}
+    C = models.Comment
+    ranked = select(
+        C.grievance_id, C.user_id, C.content, C.timestamp,
+        func.count().over(partition_by=C.grievance_id).label("count"),
+        func.row_number().over(partition_by=C.grievance_id,
+                               order_by=(C.timestamp.desc(), C.id.desc())).label("position"),
+    ).where(C.grievance_id.in_(grievance_ids)).subquery()
+    rows = db.execute(
+        select(ranked.c.grievance_id, ranked.c.count, ranked.c.timestamp, ranked.c.content,
+               User.name, User.email)
+        .outerjoin(User, User.id == ranked.c.user_id)
+        .where(ranked.c.position == 1)
+    )
+    stats = {gid: {"count": 0} for gid in grievance_ids}
+    for grievance_id, count, timestamp, content, name, email in rows:
+        stats[grievance_id] = {
+            "count": count,
+            "last_comment_at": timestamp,
+            "last_comment_by": name or email,
+            "last_comment_preview": (content or "")[:COMMENT_PREVIEW_LENGTH],
+        }
+    return stats
+
+
+def attach_comment_stats(db: Session, grievances: List):
+    """Add `comment_stats` to grievance rows (dicts, see Grievances.crud.load_page) or instances."""
+    stats = comment_stats(db, (g["id"] if isinstance(g, dict) else g.id for g in grievances))
+    for grievance in grievances:
+        if isinstance(grievance, dict):
+            grievance["comment_stats"] = stats.get(grievance["id"])
+        else:
+            grievance.comment_stats = stats.get(grievance.id)
+
+
+def encode_cursor(timestamp: str, comment_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, comment_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, comment_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(timestamp), int(comment_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def list_comments_page(db: Session, grievance_id: int, cursor: Optional[str], limit: int,
+                       descending: bool = True, search: Optional[str] = None) -> Tuple[List[models.Comment], Optional[str]]:
+    """
+    One page of a grievance's comments by keyset on (timestamp, id), and the
+    cursor of the next page (None on the last page).
+    """
+    C = models.Comment
+    # Compared in the raw text form SQLite stores timestamps in
+    timestamp = type_coerce(C.timestamp, String)
+    query = db.query(C, timestamp).filter(C.grievance_id == grievance_id)
+    if search:
+        query = query.filter(C.content.ilike(f"%{search}%"))
+    if cursor:
+        at, comment_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(timestamp < at, and_(timestamp == at, C.id < comment_id)))
+        else:
+            query = query.filter(or_(timestamp > at, and_(timestamp == at, C.id > comment_id)))
+    order = (C.timestamp.desc(), C.id.desc()) if descending else (C.timestamp.asc(), C.id.asc())
+    rows = query.order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id)
+    return [comment for comment, _ in rows], next_cursor
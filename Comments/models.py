@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -10,5 +10,10 @@ class Comment(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     content = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    change_seq = Column(Integer, nullable=True, index=True)
     grievance = relationship("Grievance")
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_comments_grievance_timestamp", "grievance_id", "timestamp", "id"),
+    )
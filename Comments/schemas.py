@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 class CommentBase(BaseModel):
@@ -12,5 +12,4 @@ class CommentCreate(CommentBase):
 class Comment(CommentBase):
     id: int
     timestamp: datetime
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,5 +1,5 @@
 from typing import List, TypeVar, Generic
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 
 T = TypeVar('T')
 
@@ -15,8 +15,7 @@ class DepartmentOut(BaseModel):
 
 class Department(DepartmentBase):
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
@@ -7,10 +7,12 @@ from fastapi.security import HTTPBearer
 from Grievances import crud
 from database import get_db
 from roles import RoleEnum
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import ConfigDict
 from dependencies import get_current_active_user, RoleChecker
+from rate_limit import RateLimit
 from file_utils import save_upload_file, get_mime_type
-from . import models, schemas
+from . import models, schemas, similarity, routing, lifecycle, export, timeline, list_view
 from datetime import datetime
 import os
 import uuid
@@ -19,6 +21,9 @@ from User import models as user_models
 from Department import models as dept_models
 from User.models import User
 from schemas.base import PaginatedResponse
+import changefeed
+import serialization
+from Comments import crud as comment_crud
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -33,7 +38,7 @@ router = APIRouter(prefix="/grievances", tags=["Grievances"])
 bearer_scheme = HTTPBearer()
 
 
-@router.post("/", response_model=schemas.GrievanceOut)
+@router.post("/", response_model=schemas.GrievanceOut, dependencies=[Depends(RateLimit("create"))])
 async def create_grievance(
         grievance: str = Form(...),
         department_id: int = Form(...),
@@ -47,17 +52,43 @@ async def create_grievance(
     db_grievance = None
     file_path = None
     try:
+        # Flag likely duplicates: join the cluster of the closest existing grievance
+        signature = similarity.signature(grievance)
+        similarity.index.sync(db)
+        matches = similarity.index.query(signature, min_similarity=similarity.DUPLICATE_THRESHOLD, limit=1)
+        duplicate_of_id = None
+        if matches:
+            match = db.query(models.Grievance.id, models.Grievance.duplicate_of_id) \
+                .filter(models.Grievance.id == matches[0][0]).first()
+            if match:
+                duplicate_of_id = match.duplicate_of_id or match.id
+
+        # Suggest (or, in auto mode, correct) the department from the text
+        suggested_department_id = None
+        routing_note = None
+        suggestion = routing.suggest_department(grievance)
+        if suggestion and suggestion[0] != department_id:
+            suggested_department_id = suggestion[0]
+            if routing.ROUTING_MODE == "auto" and suggestion[1] >= routing.AUTO_ROUTE_MIN_CONFIDENCE:
+                routing_note = f"Auto-routed from department {department_id} (confidence {suggestion[1]:.2f})"
+                department_id = suggested_department_id
+
         # Create the grievance
         db_grievance = models.Grievance(
             ticket_id=str(uuid.uuid4()),
             user_id=current_user.id,
             department_id=department_id,
             grievance_content=grievance,
-            status=GrievanceStatus.pending
+            status=GrievanceStatus.pending,
+            duplicate_of_id=duplicate_of_id,
+            suggested_department_id=suggested_department_id
         )
         db.add(db_grievance)
+        db.flush()
+        lifecycle.record_change(db, db_grievance.id, None, lifecycle.state_of(db_grievance))
         db.commit()
         db.refresh(db_grievance)
+        similarity.index.add(db_grievance.id, signature)
 
         # Handle file uploads if any
         if files:
@@ -84,7 +115,8 @@ async def create_grievance(
         status_history = models.GrievanceStatusHistory(
             grievance_id=db_grievance.id,
             status=GrievanceStatus.pending,
-            changed_by_id=current_user.id
+            changed_by_id=current_user.id,
+            notes=routing_note
         )
         db.add(status_history)
         db.commit()
@@ -105,35 +137,6 @@ async def create_grievance(
             detail=f"Error creating grievance: {str(e)}"
         )
 
-@router.get("/", response_model=List[schemas.GrievanceOut])
-def read_grievances(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-    skip:  int =0,
-    limit : int = 100
-):
-    query = db.query(models.Grievance)
-    if current_user.role == RoleEnum.user:
-        query = query.filter(models.Grievance.user_id == current_user.id)
-    elif current_user.role == RoleEnum.employee:
-        query = query.filter(
-            (models.Grievance.department_id == current_user.department_id) &
-            (models.Grievance.assigned_to == current_user.id)
-        )
-    elif current_user.role == RoleEnum.admin:
-        query = query.filter(models.Grievance.department_id == current_user.department_id)
-        # Super admin can see all grievances (no filter)
-
-        # Include related data
-    query = query.options(
-        joinedload(models.Grievance.user),
-        joinedload(models.Grievance.department),
-        joinedload(models.Grievance.assigned_to_user),
-        joinedload(models.Grievance.attachments)
-    ).order_by(models.Grievance.created_at.desc())
-
-    return query.offset(skip).limit(limit).all()
-
 @router.post("/assign", status_code=status.HTTP_204_NO_CONTENT)
 def assign_all(
     db: Session = Depends(get_db),
@@ -143,6 +146,81 @@ def assign_all(
     crud.assign_grievances_to_employees(db)
     return
 
+@router.post("/bulk", response_model=schemas.GrievanceBulkResult)
+def bulk_update_grievances(
+    request: schemas.GrievanceBulkRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(admin_only),
+):
+    """
+    Resolve, close, transfer or reassign many grievances in one call.
+
+    Select grievances either by `ticket_ids` or by `filter`. Admins only affect
+    grievances of their own department. Returns the outcome for every ticket.
+    """
+    if bool(request.ticket_ids) == (request.filter is not None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either ticket_ids or filter"
+        )
+    if request.ticket_ids and len(set(request.ticket_ids)) > crud.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {crud.BULK_MAX_ITEMS} ticket_ids per request"
+        )
+
+    new_department_name = None
+    if request.action == schemas.BulkAction.transfer:
+        new_department = db.query(dept_models.Department).filter(
+            dept_models.Department.id == request.new_department_id
+        ).first() if request.new_department_id else None
+        if not new_department:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Department with ID {request.new_department_id} not found"
+            )
+        new_department_name = new_department.name
+
+    if request.action == schemas.BulkAction.reassign:
+        assignee = db.query(User).filter(User.id == request.assign_to).first() if request.assign_to else None
+        if not assignee or assignee.role != RoleEnum.employee:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="assign_to must be an existing employee"
+            )
+        if current_user.role == RoleEnum.admin and assignee.department_id != current_user.department_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Can only assign to employees of your department"
+            )
+
+    results = crud.bulk_transition(db, request, current_user, new_department_name)
+    succeeded = sum(1 for r in results if r["outcome"] == "updated")
+    return {
+        "action": request.action,
+        "requested": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+@router.post("/claim-next", response_model=schemas.GrievanceOut,
+             responses={204: {"description": "No unassigned grievance in your department"}})
+def claim_next_grievance(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(emp_only),
+):
+    """
+    Claim the next grievance from your department's queue.
+
+    Picks the highest-priority, oldest pending grievance that nobody is working on,
+    assigns it to you and marks it in_progress. Returns 204 if the queue is empty.
+    """
+    grievance = crud.claim_next_grievance(db, current_user.id, current_user.department_id)
+    if not grievance:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return grievance
+
 @router.post("/{grievance_id}/resolve", response_model=schemas.GrievanceOut)
 def resolve_grievance(
     grievance_id: int,
@@ -159,6 +237,118 @@ def resolve_grievance(
         raise HTTPException(404, "Grievance not found")
     return updated
 
+@router.get("/changes", response_model=schemas.ChangeFeedPage,
+            dependencies=[Depends(RateLimit("search"))])
+def get_changes(
+        since: int = Query(0, ge=0, description="Cursor from the previous page's next_cursor; 0 for everything"),
+        limit: int = Query(500, ge=1, le=changefeed.FEED_MAX_LIMIT),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Grievances, attachments and comments created, changed or deleted after
+    `since`, in change order, with the same visibility as GET /grievances/.
+    Deleted rows appear as entries with deleted=true and no data. Keep calling
+    with next_cursor until has_more is false.
+    """
+    return changefeed.read_changes(
+        db, lambda target: crud.visibility_condition(current_user, target), since, limit
+    )
+
+
+@router.get("/export", response_class=StreamingResponse,
+            dependencies=[Depends(RateLimit("export"))])
+def export_grievances(
+        format: str = Query("csv", pattern="^(csv|ndjson)$"),
+        gzip: bool = False,
+        status: Optional[str] = None,
+        department_id: Optional[int] = None,
+        assigned_to: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        search: Optional[str] = None,
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Stream every grievance matching the list filters as CSV or NDJSON.
+    Visibility is the same as GET /grievances/. Rows are ordered by id.
+    """
+    conditions = [
+        crud.visibility_condition(current_user),
+        *crud.filter_conditions(status, department_id, assigned_to, created_after, created_before, search),
+    ]
+    filename = f"grievances-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    media_type = export.FORMATS[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export.stream_export(conditions, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/by-department", response_model=Dict[int, PaginatedResponse[schemas.GrievanceOut]],
+            dependencies=[Depends(RateLimit("search"))])
+def list_grievances_by_department(
+        skip: int = 0,
+        limit: int = Query(10, le=50, description="Number of records per department (max 50)"),
+        status: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        include_comment_stats: bool = False,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    List grievances grouped by department with pagination, filtering, and sorting.
+
+    - Super admins see all departments
+    - Admins see only their department
+    - Employees see only their department
+    - Users see empty response (they should use the regular grievances' endpoint)
+    """
+    # For regular users, return empty as they should use the regular grievances endpoint
+    if current_user.role == RoleEnum.user:
+        return {}
+
+    # Base query for departments
+    dept_query = db.query(dept_models.Department)
+
+    # Admin/Employee can only see their department
+    if current_user.role in [RoleEnum.admin, RoleEnum.employee]:
+        dept_query = dept_query.filter(dept_models.Department.id == current_user.department_id)
+    # Super admin can see all departments
+
+    departments = dept_query.all()
+    result = {}
+
+    for dept in departments:
+        # Filter, sort and count on the list view, then load only the page
+        conditions = [
+            list_view.V.department_id == dept.id,
+            *list_view.filter_conditions(status=status, created_after=created_after,
+                                         created_before=created_before, search=search),
+        ]
+        ids, total = list_view.page_ids(db, conditions, sort_by, sort_order, skip, limit)
+        items = crud.load_page(db, ids)
+        if include_comment_stats:
+            comment_crud.attach_comment_stats(db, items)
+
+        result[dept.id] = {
+            "items": items,
+            "total": total,
+            "limit": limit,
+            "offset": skip
+        }
+
+    return serialization.respond(Dict[int, PaginatedResponse[schemas.GrievanceOut]], result)
+
+
 @router.get("/{ticket_id}", response_model=schemas.GrievanceOut)
 def get_grievance_by_id(
         ticket_id: str,
@@ -175,7 +365,7 @@ def get_grievance_by_id(
 
     # Admin can access any ticket
     if current_user.role in (RoleEnum.admin, RoleEnum.super_admin):
-        return grievance
+        return serialization.respond(schemas.GrievanceOut, grievance)
 
     # Regular users can only access their own tickets
     if current_user.role == RoleEnum.user and grievance.user_id != current_user.id:
@@ -191,7 +381,7 @@ def get_grievance_by_id(
             detail="Not authorized to access this grievance"
         )
 
-    return grievance
+    return serialization.respond(schemas.GrievanceOut, grievance)
 
 @router.post("/{ticket_id}/transfer", response_model=schemas.GrievanceOut)
 async def transfer_grievance_department(
@@ -276,10 +466,15 @@ async def transfer_grievance_department(
         )
 
         # Update grievance
+        before = lifecycle.state_of(grievance)
         old_department_id = grievance.department_id
         grievance.department_id = transfer_data.new_department_id
         grievance.assigned_to = None  # Unassign when transferring
+        if grievance.status == GrievanceStatus.in_progress:
+            # Back to the new department's claim queue, as bulk transfers do
+            grievance.status = GrievanceStatus.pending
         grievance.updated_at = datetime.utcnow()
+        lifecycle.record_change(db, grievance.id, before, lifecycle.state_of(grievance))
 
         db.add(status_history)
         db.commit()
@@ -295,7 +490,80 @@ async def transfer_grievance_department(
             detail=f"Error transferring grievance: {str(e)}"
         )
 
-@router.get("/attachments/{attachment_id}", response_class=FileResponse)
+@router.get("/{ticket_id}/similar", response_model=List[schemas.SimilarGrievanceOut])
+def get_similar_grievances(
+        ticket_id: str,
+        limit: int = Query(10, le=50),
+        min_similarity: float = Query(0.5, ge=0.0, le=1.0),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(RoleChecker([RoleEnum.employee, RoleEnum.admin, RoleEnum.super_admin])),
+):
+    """
+    List grievances whose text is near-identical to this one, most similar first.
+    Employees and admins only see grievances of their own department.
+    """
+    grievance = crud.get_grievance_by_ticket_id(db, ticket_id)
+    if not grievance:
+        raise HTTPException(status_code=404, detail="Grievance not found")
+    if current_user.role != RoleEnum.super_admin and grievance.department_id != current_user.department_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this grievance"
+        )
+
+    similarity.index.sync(db)
+    signature = similarity.index.get(grievance.id)
+    if signature is None:
+        signature = similarity.signature(grievance.grievance_content)
+    # Over-fetch so department filtering still leaves up to `limit` results
+    matches = dict(similarity.index.query(signature, min_similarity=min_similarity,
+                                          exclude=grievance.id, limit=limit * 4))
+    if not matches:
+        return []
+
+    query = db.query(models.Grievance).filter(models.Grievance.id.in_(list(matches)))
+    if current_user.role != RoleEnum.super_admin:
+        query = query.filter(models.Grievance.department_id == current_user.department_id)
+    rows = sorted(query.all(), key=lambda g: -matches[g.id])[:limit]
+    return [
+        {
+            "id": g.id,
+            "ticket_id": g.ticket_id,
+            "department_id": g.department_id,
+            "status": g.status,
+            "duplicate_of_id": g.duplicate_of_id,
+            "similarity": round(matches[g.id], 3),
+        }
+        for g in rows
+    ]
+
+@router.get("/{ticket_id}/timeline", response_model=schemas.TimelinePage)
+def get_grievance_timeline(
+        ticket_id: str,
+        cursor: Optional[str] = None,
+        limit: int = Query(50, ge=1, le=timeline.TIMELINE_MAX_LIMIT),
+        order: str = Query("asc", pattern="^(asc|desc)$"),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_user),
+):
+    """
+    Status changes, transfers, attachments and comments of a grievance, in time order.
+    Pass `next_cursor` back as `cursor` for the next page. Visibility is the same as GET /grievances/.
+    """
+    grievance_id = db.query(models.Grievance.id).filter(
+        models.Grievance.ticket_id == ticket_id,
+        crud.visibility_condition(current_user),
+    ).scalar()
+    if grievance_id is None:
+        raise HTTPException(status_code=404, detail="Grievance not found")
+    try:
+        entries, next_cursor = timeline.read_timeline(db, grievance_id, cursor, limit, descending=order == "desc")
+    except timeline.InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"entries": entries, "next_cursor": next_cursor}
+
+@router.get("/attachments/{attachment_id}", response_class=FileResponse,
+            dependencies=[Depends(RateLimit("download"))])
 async def download_attachment(
         attachment_id: int,
         db: Session = Depends(get_db),
@@ -418,7 +686,8 @@ def test_endpoint(
     }
 
 
-@router.get("/", response_model=PaginatedResponse[schemas.GrievanceOut])
+@router.get("/", response_model=PaginatedResponse[schemas.GrievanceOut],
+            dependencies=[Depends(RateLimit("search"))])
 def list_grievances(
         skip: int = 0,
         limit: int = Query(100, le=200),
@@ -430,120 +699,34 @@ def list_grievances(
         search: Optional[str] = None,
         sort_by: str = "created_at",
         sort_order: str = "desc",
+        include_comment_stats: bool = False,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_user),
 ):
     """
     List all grievances with filtering, sorting, and pagination.
+    With include_comment_stats, each item carries its comment count and latest comment.
     - Super admins see all grievances
     - Admins see grievances from their department
     - Employees see assigned grievances and their own
     - Users see only their own grievances
     """
-    # Import models locally to avoid circular imports
-    from User import models as user_models
-    from Department import models as dept_models
-
-    # Base query with eager loading
-    query = db.query(models.Grievance).options(
-        joinedload(models.Grievance.user),
-        joinedload(models.Grievance.department),
-        joinedload(models.Grievance.employee),
-        joinedload(models.Grievance.status_history).joinedload(models.GrievanceStatusHistory.changed_by),
-        joinedload(models.Grievance.attachments)
-    )
-
-    # Apply role-based filtering
-    if current_user.role == RoleEnum.user:
-        query = query.filter(models.Grievance.user_id == current_user.id)
-    elif current_user.role == RoleEnum.employee:
-        query = query.filter(
-            (models.Grievance.assigned_to == current_user.id) |
-            (models.Grievance.user_id == current_user.id) |
-            (models.Grievance.department_id == current_user.department_id)
-        )
-    elif current_user.role == RoleEnum.admin:
-        query = query.filter(
-            models.Grievance.department_id == current_user.department_id
-        )
-    # Super admin can see all, no additional filter needed
-
-    # Apply search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.join(
-            user_models.User,
-            models.Grievance.user_id == user_models.User.id
-        ).join(
-            dept_models.Department,
-            models.Grievance.department_id == dept_models.Department.id
-        ).filter(
-            or_(
-                models.Grievance.grievance_content.ilike(search_term),
-                models.Grievance.ticket_id.ilike(search_term),
-                user_models.User.name.ilike(search_term),
-                dept_models.Department.name.ilike(search_term),
-                models.Grievance.status.ilike(search_term)
-            )
-        )
-
-    # Apply filters
-    if status:
-        query = query.filter(models.Grievance.status == status)
-    if department_id:
-        query = query.filter(models.Grievance.department_id == department_id)
-    if assigned_to is not None:
-        query = query.filter(models.Grievance.assigned_to == assigned_to)
-    if created_after:
-        query = query.filter(models.Grievance.created_at >= created_after)
-    if created_before:
-        query = query.filter(models.Grievance.created_at <= created_before)
-
-    # Apply sorting
-    sort_field = None
-    if sort_by == "created_at":
-        sort_field = models.Grievance.created_at
-    elif sort_by == "updated_at":
-        sort_field = models.Grievance.updated_at
-    elif sort_by == "resolved_at":
-        sort_field = models.Grievance.resolved_at
-    elif sort_by == "status":
-        sort_field = models.Grievance.status
-    elif sort_by == "priority":
-        sort_field = models.Grievance.priority
-    elif sort_by == "department":
-        query = query.join(dept_models.Department)
-        sort_field = dept_models.Department.name
-    elif sort_by == "assigned_to":
-        query = query.join(user_models.User, models.Grievance.assigned_to == user_models.User.id)
-        sort_field = user_models.User.name
-    elif sort_by == "created_by":
-        query = query.join(user_models.User, models.Grievance.user_id == user_models.User.id)
-        sort_field = user_models.User.name
-    elif sort_by == "resolved_by":
-        query = query.join(user_models.User, models.Grievance.resolved_by == user_models.User.id)
-        sort_field = user_models.User.name
-
-    # Apply sort order
-    if sort_field is not None:
-        if sort_order.lower() == "asc":
-            query = query.order_by(sort_field.asc())
-        else:
-            query = query.order_by(sort_field.desc())
-    else:
-        # Default sorting
-        query = query.order_by(models.Grievance.created_at.desc())
-
-    # Apply pagination
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
-
-    return {
+    # Filter, sort and count on the denormalized list view, then load only the page
+    conditions = [
+        crud.visibility_condition(current_user, list_view.V),
+        *list_view.filter_conditions(status, department_id, assigned_to, created_after, created_before, search),
+    ]
+    ids, total = list_view.page_ids(db, conditions, sort_by, sort_order, skip, limit)
+    items = crud.load_page(db, ids)
+    if include_comment_stats:
+        comment_crud.attach_comment_stats(db, items)
+
+    return serialization.respond(PaginatedResponse[schemas.GrievanceOut], {
         "items": items,
         "total": total,
         "limit": limit,
         "offset": skip
-    }
+    })
 
 class GrievanceResponse(schemas.GrievanceOut):
     user: Optional[Dict[str , Any]] = None
@@ -551,10 +734,10 @@ class GrievanceResponse(schemas.GrievanceOut):
     attachments: List[Dict[str, Any]] = []
     status_history: List[schemas.StatusHistoryOut] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
-@router.get("/search/", response_model=PaginatedResponse[schemas.GrievanceOut])
+@router.get("/search/", response_model=schemas.GrievanceSearchResult,
+            dependencies=[Depends(RateLimit("search"))])
 def search_grievances(
 db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
@@ -572,93 +755,46 @@ db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
-    sort_order: str = "desc"
-
+    sort_order: str = "desc",
+    include_comment_stats: bool = False,
 ):
     """
     Advanced grievance search with full-text and filtering capabilities.
     Returns both results and total count.
     """
-    # Base query
-    query = db.query(models.Grievance)
-
-    query = query.options(
-        joinedload(models.Grievance.user),
-        joinedload(models.Grievance.department),
-        joinedload(models.Grievance.attachments),
-        joinedload(models.Grievance.status_history).joinedload(models.GrievanceStatusHistory.changed_by)
-    )
-
-
+    V = list_view.V
 
     # Apply role-based filtering
+    conditions = []
     if current_user.role == RoleEnum.user:
-        query = query.filter(models.Grievance.user_id == current_user.id)
+        conditions.append(V.user_id == current_user.id)
     elif current_user.role == RoleEnum.employee:
-        query = query.filter(
-            (models.Grievance.department_id == current_user.department_id) &
-            (models.Grievance.assigned_to == current_user.id)
+        conditions.append(
+            (V.department_id == current_user.department_id) &
+            (V.assigned_to == current_user.id)
         )
     elif current_user.role == RoleEnum.admin:
-        query = query.filter(
-            models.Grievance.department_id == current_user.department_id
-        )
+        conditions.append(V.department_id == current_user.department_id)
 
-    # Apply search filters
-    if q:
-        search = f"%{q}%"
-        query = query.join(
-            user_models.User,
-            models.Grievance.user_id == user_models.User.id
-        ).join(
-            dept_models.Department,
-            models.Grievance.department_id == dept_models.Department.id
-        ).filter(
-            or_(
-                models.Grievance.grievance_content.ilike(search),
-                models.Grievance.ticket_id.ilike(search),
-                user_models.User.name.ilike(search),
-                dept_models.Department.name.ilike(search)
-            )
-        )
-
-    # Apply other filters
-    if status:
-        query = query.filter(models.Grievance.status == status)
-    if department_id:
-        query = query.filter(models.Grievance.department_id == department_id)
+    # Apply search and the other filters
+    conditions.extend(list_view.filter_conditions(status, department_id, assigned_to or None,
+                                                  created_after, created_before, q))
     if user_id:
-        query = query.filter(models.Grievance.user_id == user_id)
-    if assigned_to:
-        query = query.filter(models.Grievance.assigned_to == assigned_to)
+        conditions.append(V.user_id == user_id)
     if resolved_by:
-        query = query.filter(models.Grievance.resolved_by == resolved_by)
-    if created_after:
-        query = query.filter(models.Grievance.created_at >= created_after)
-    if created_before:
-        query = query.filter(models.Grievance.created_at <= created_before)
+        conditions.append(V.resolved_by == resolved_by)
     if resolved_after:
-        query = query.filter(models.Grievance.resolved_at >= resolved_after)
+        conditions.append(V.resolved_at >= resolved_after)
     if resolved_before:
-        query = query.filter(models.Grievance.resolved_at <= resolved_before)
+        conditions.append(V.resolved_at <= resolved_before)
 
-    # Get total count before pagination
-    total_count = query.count()
+    # Count, sort and paginate on the list view, then load only the page
+    ids, total_count = list_view.page_ids(db, conditions, sort_by, sort_order, skip, limit)
+    items = crud.load_page(db, ids)
+    if include_comment_stats:
+        comment_crud.attach_comment_stats(db, items)
 
-    # Apply sorting
-    sort_field = getattr(models.Grievance, sort_by, None)
-    if sort_field is None:
-        sort_field = models.Grievance.created_at
-
-    if sort_order.lower() == "asc":
-        query = query.order_by(sort_field.asc())
-    else:
-        query = query.order_by(sort_field.desc())
-
-    # Apply pagination
-    items = query.offset(skip).limit(limit).all()
-
-    return {
+    return serialization.respond(schemas.GrievanceSearchResult, {
         "data": items,
         "total_count": total_count,
         "filters": {
@@ -675,106 +811,4 @@ db: Session = Depends(get_db),
             "sort_by": sort_by,
             "sort_order": sort_order
         }
-    }
-
-
-@router.get("/by-department", response_model=Dict[int, PaginatedResponse[schemas.GrievanceOut]])
-def list_grievances_by_department(
-        skip: int = 0,
-        limit: int = Query(10, le=50, description="Number of records per department (max 50)"),
-        status: Optional[str] = None,
-        created_after: Optional[datetime] = None,
-        created_before: Optional[datetime] = None,
-        search: Optional[str] = None,
-        sort_by: str = "created_at",
-        sort_order: str = "desc",
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user),
-):
-    """
-    List grievances grouped by department with pagination, filtering, and sorting.
-
-    - Super admins see all departments
-    - Admins see only their department
-    - Employees see only their department
-    - Users see empty response (they should use the regular grievances' endpoint)
-    """
-    # For regular users, return empty as they should use the regular grievances endpoint
-    if current_user.role == RoleEnum.user:
-        return {}
-
-    # Base query for departments
-    dept_query = db.query(dept_models.Department)
-
-    # Admin/Employee can only see their department
-    if current_user.role in [RoleEnum.admin, RoleEnum.employee]:
-        dept_query = dept_query.filter(dept_models.Department.id == current_user.department_id)
-    # Super admin can see all departments
-
-    departments = dept_query.all()
-    result = {}
-
-    for dept in departments:
-        # Base query for grievances in this department
-        query = db.query(models.Grievance).filter(
-            models.Grievance.department_id == dept.id
-        ).options(
-            joinedload(models.Grievance.user),
-            joinedload(models.Grievance.department),
-            joinedload(models.Grievance.employee),
-            joinedload(models.Grievance.attachments)
-        )
-
-        # Apply filters
-        if status:
-            query = query.filter(models.Grievance.status == status)
-        if created_after:
-            query = query.filter(models.Grievance.created_at >= created_after)
-        if created_before:
-            query = query.filter(models.Grievance.created_at <= created_before)
-        if search:
-            search_term = f"%{search}%"
-            query = query.join(
-                user_models.User,
-                models.Grievance.user_id == user_models.User.id
-            ).filter(
-                or_(
-                    models.Grievance.grievance_content.ilike(search_term),
-                    models.Grievance.ticket_id.ilike(search_term),
-                    user_models.User.name.ilike(search_term)
-                )
-            )
-
-        # Apply sorting
-        sort_field = None
-        if sort_by == "created_at":
-            sort_field = models.Grievance.created_at
-        elif sort_by == "updated_at":
-            sort_field = models.Grievance.updated_at
-        elif sort_by == "resolved_at":
-            sort_field = models.Grievance.resolved_at
-        elif sort_by == "status":
-            sort_field = models.Grievance.status
-        elif sort_by == "priority":
-            sort_field = models.Grievance.priority
-
-        if sort_field:
-            if sort_order.lower() == "asc":
-                query = query.order_by(sort_field.asc())
-            else:
-                query = query.order_by(sort_field.desc())
-        else:
-            query = query.order_by(models.Grievance.created_at.desc())
-
-        # Get total count and paginated results
-        total = query.count()
-        items = query.offset(skip).limit(limit).all()
-
-        result[dept.id] = {
-            "items": items,
-            "total": total,
-            "limit": limit,
-            "offset": skip
-        }
-
-    return result
\ No newline at end of file
+    })
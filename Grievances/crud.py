@@ -1,11 +1,15 @@
 from sqlalchemy.orm import Session , joinedload
+from sqlalchemy import select, update, insert, or_, true
+from typing import Dict, Iterator, List, Optional, Tuple
 from . import models, schemas
 from User.models import User
 from .models import GrievanceStatus
 from roles import RoleEnum
+from Workload import crud as workload_crud
+from . import lifecycle, list_view
+import changefeed
 import uuid
 import datetime
-import random
 
 def create_grievance(db: Session, grievance: schemas.GrievanceCreate, user_id: int):
     # Generate unique ticket ID
@@ -25,29 +29,89 @@ def assign_grievances_to_employees(db: Session):
     # All unassigned grievances
     unassigned_grievances = db.query(models.Grievance) \
         .filter(models.Grievance.assigned_to.is_(None)) \
-        .filter(models.Grievance.status == "pending") \
+        .filter(models.Grievance.status == GrievanceStatus.pending) \
+        .order_by(models.Grievance.priority.desc(), models.Grievance.created_at.asc()) \
         .all()
 
     if not unassigned_grievances:
         return  # No unassigned grievances to process
 
-    # Get all active employees
-    employees = db.query(User) \
-        .filter(User.role == "employee") \
-        .filter(User.is_active == True) \
-        .all()
-
+    # Employees grouped by department
+    employees = db.query(User).filter(User.role == RoleEnum.employee).all()
     if not employees:
         return  # No employees available for assignment
 
-    # Randomly assign grievances to employees
+    by_department: Dict[int, List[User]] = {}
+    for employee in employees:
+        by_department.setdefault(employee.department_id, []).append(employee)
+
+    # Current open + in-progress load from the live workload counters
+    loads = workload_crud.employee_loads(db, [e.id for e in employees])
+
+    # Give each grievance to the least-loaded employee of its department
+    changes = []
     for grievance in unassigned_grievances:
-        # Select a random employee
-        random_employee = random.choice(employees)
-        grievance.assigned_to = random_employee.id
-        grievance.status = "in_progress"  # Update status to in_progress when assigned
+        candidates = by_department.get(grievance.department_id)
+        if not candidates:
+            continue
+        employee = min(candidates, key=lambda e: (loads.get(e.id, 0), e.id))
+        before = lifecycle.state_of(grievance)
+        grievance.assigned_to = employee.id
+        grievance.status = GrievanceStatus.in_progress  # Update status to in_progress when assigned
+        loads[employee.id] = loads.get(employee.id, 0) + 1
+        changes.append(lifecycle.GrievanceChange(grievance.id, before, lifecycle.state_of(grievance)))
+
+    lifecycle.record_changes(db, changes)
+    db.commit()
+
+def claim_next_grievance(db: Session, employee_id: int, department_id: int) -> models.Grievance | None:
+    """
+    Atomically assign the next grievance in a department's queue to an employee.
+
+    The highest-priority, oldest unassigned pending grievance is claimed with a
+    single conditional UPDATE, so two employees can never claim the same item.
+    Returns None when the queue is empty.
+    """
+    G = models.Grievance
+    next_id = select(G.id) \
+        .where(G.department_id == department_id) \
+        .where(G.status == GrievanceStatus.pending) \
+        .where(G.assigned_to.is_(None)) \
+        .order_by(G.priority.desc(), G.created_at.asc(), G.id.asc()) \
+        .limit(1) \
+        .scalar_subquery()
+
+    claimed_id = db.execute(
+        update(G)
+        .where(G.id == next_id)
+        .where(G.status == GrievanceStatus.pending)
+        .where(G.assigned_to.is_(None))
+        .values(assigned_to=employee_id, status=GrievanceStatus.in_progress,
+                sla_started_at=datetime.datetime.utcnow())
+        .returning(G.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if claimed_id is None:
+        db.rollback()
+        return None
 
+    changefeed.stamp(db, G, [claimed_id])
+    claimed = db.query(models.Grievance).filter(models.Grievance.id == claimed_id).first()
+    after = lifecycle.state_of(claimed)
+    lifecycle.record_change(
+        db, claimed_id, after._replace(assigned_to=None, status=GrievanceStatus.pending.value), after
+    )
+    # The history row's flush also refreshes the list view row
+    db.add(models.GrievanceStatusHistory(
+        grievance_id=claimed_id,
+        status=GrievanceStatus.in_progress,
+        changed_by_id=employee_id,
+        notes="Claimed from department queue"
+    ))
     db.commit()
+    db.refresh(claimed)
+    return claimed
 
 def get_grievance_by_ticket_id(db: Session, ticket_id: str):
     """
@@ -82,14 +146,14 @@ def resolve_grievance(
     if not g:
         return None
 
-
+    before = lifecycle.state_of(g)
     g.status = GrievanceStatus.solved if solved else GrievanceStatus.not_solved
 
     # 3) Record resolver and timestamp
     g.resolved_by = resolver_id
     g.resolved_at = datetime.datetime.utcnow()
 
-
+    lifecycle.record_change(db, g.id, before, lifecycle.state_of(g))
     db.commit()
     db.refresh(g)
     return g
@@ -119,13 +183,17 @@ def transfer_grievance_department(
         return None
 
     # Update the department and reset assignment
+    before = lifecycle.state_of(grievance)
     grievance.department_id = new_department_id
     grievance.assigned_to = None  # Reset assignment when transferring departments
     grievance.status = models.GrievanceStatus.pending  # Reset status
+    grievance.resolved_by = None  # A reopened grievance is no longer resolved
+    grievance.resolved_at = None
 
     # Add transfer history or log if needed
     # For example, you might want to log this transfer in a separate table
 
+    lifecycle.record_change(db, grievance.id, before, lifecycle.state_of(grievance))
     db.commit()
     db.refresh(grievance)
     return grievance
@@ -151,4 +219,250 @@ def get_grievances(db: Session, user: User):
         elif user.role == RoleEnum.employee:
             query = query.filter(models.Grievance.assigned_to == user.id)
 
-    return query.order_by(models.Grievance.created_at.desc()).all()
\ No newline at end of file
+    return query.order_by(models.Grievance.created_at.desc()).all()
+
+
+def visibility_condition(user: User, target=None):
+    """
+    Which grievances a user may list: the rules of GET /grievances/ as a WHERE clause.
+    `target` may be any table with user_id, department_id and assigned_to columns.
+    """
+    G = target if target is not None else models.Grievance
+    if user.role == RoleEnum.user:
+        return G.user_id == user.id
+    if user.role == RoleEnum.employee:
+        return or_(
+            G.assigned_to == user.id,
+            G.user_id == user.id,
+            G.department_id == user.department_id,
+        )
+    if user.role == RoleEnum.admin:
+        return G.department_id == user.department_id
+    return true()
+
+
+def filter_conditions(
+    status: Optional[str] = None,
+    department_id: Optional[int] = None,
+    assigned_to: Optional[int] = None,
+    created_after: Optional[datetime.datetime] = None,
+    created_before: Optional[datetime.datetime] = None,
+    search: Optional[str] = None,
+) -> list:
+    """WHERE clauses for the list filters, usable with both ORM queries and Core selects."""
+    from Department.models import Department
+
+    G = models.Grievance
+    conditions = []
+    if search:
+        search_term = f"%{search}%"
+        conditions.append(or_(
+            G.grievance_content.ilike(search_term),
+            G.ticket_id.ilike(search_term),
+            G.user_id.in_(select(User.id).where(User.name.ilike(search_term))),
+            G.department_id.in_(select(Department.id).where(Department.name.ilike(search_term))),
+            G.status.ilike(search_term),
+        ))
+    if status:
+        conditions.append(G.status == status)
+    if department_id:
+        conditions.append(G.department_id == department_id)
+    if assigned_to is not None:
+        conditions.append(G.assigned_to == assigned_to)
+    if created_after:
+        conditions.append(G.created_at >= created_after)
+    if created_before:
+        conditions.append(G.created_at <= created_before)
+    return conditions
+
+
+# Columns of GrievanceOut read by load_page
+PAGE_COLUMNS = (
+    "id", "ticket_id", "grievance_content", "user_id", "department_id", "assigned_to", "status",
+    "priority", "duplicate_of_id", "suggested_department_id", "created_at", "updated_at",
+)
+
+
+def load_page(db: Session, ids: List[int]) -> List[dict]:
+    """
+    Grievances of one page (from list_view.page_ids), in the order of `ids`, as
+    plain dicts shaped like GrievanceOut with their attachments.
+
+    Two Core selects and no ORM instances: no identity map, no lazy loaders and
+    no attribute instrumentation for the response model to read through.
+    """
+    if not ids:
+        return []
+    G, A = models.Grievance, models.GrievanceAttachment
+    rows = {
+        row["id"]: {**row, "attachments": []}
+        for row in db.execute(select(*(getattr(G, c) for c in PAGE_COLUMNS)).where(G.id.in_(ids))).mappings()
+    }
+    attachments = db.execute(
+        select(A.id, A.grievance_id, A.file_name, A.file_type, A.file_size, A.uploaded_at)
+        .where(A.grievance_id.in_(ids))
+        .order_by(A.id)
+    ).mappings()
+    for attachment in attachments:
+        rows[attachment["grievance_id"]]["attachments"].append({
+            **attachment, "file_url": f"/grievances/attachments/{attachment['id']}",
+        })
+    return [rows[i] for i in ids if i in rows]
+
+
+BULK_CHUNK_SIZE = 500
+BULK_MAX_ITEMS = 10000
+
+# Statuses a grievance may be in for each bulk action to apply
+_BULK_ALLOWED_FROM = {
+    schemas.BulkAction.resolve: [GrievanceStatus.pending, GrievanceStatus.in_progress],
+    schemas.BulkAction.close: [GrievanceStatus.pending, GrievanceStatus.in_progress,
+                               GrievanceStatus.solved, GrievanceStatus.not_solved],
+    schemas.BulkAction.transfer: [GrievanceStatus.pending, GrievanceStatus.in_progress],
+    schemas.BulkAction.reassign: [GrievanceStatus.pending, GrievanceStatus.in_progress],
+}
+
+
+def _bulk_chunks(db: Session, request: schemas.GrievanceBulkRequest, actor: User) -> Iterator[Tuple[List[str], list]]:
+    """Yield (requested ticket ids, matching rows) per chunk of the bulk request."""
+    G = models.Grievance
+    columns = (G.id, G.ticket_id, G.user_id, G.department_id, G.status, G.assigned_to,
+               G.created_at, G.resolved_at)
+
+    if request.ticket_ids:
+        ticket_ids = list(dict.fromkeys(request.ticket_ids))
+        for start in range(0, len(ticket_ids), BULK_CHUNK_SIZE):
+            chunk = ticket_ids[start:start + BULK_CHUNK_SIZE]
+            yield chunk, db.execute(select(*columns).where(G.ticket_id.in_(chunk))).all()
+        return
+
+    f = request.filter or schemas.GrievanceBulkFilter()
+    query = select(*columns)
+    if actor.role != RoleEnum.super_admin:
+        query = query.where(G.department_id == actor.department_id)
+    if f.status:
+        query = query.where(G.status == f.status)
+    if f.department_id:
+        query = query.where(G.department_id == f.department_id)
+    if f.assigned_to is not None:
+        query = query.where(G.assigned_to == f.assigned_to)
+    if f.created_after:
+        query = query.where(G.created_at >= f.created_after)
+    if f.created_before:
+        query = query.where(G.created_at <= f.created_before)
+    if f.duplicate_of_id:
+        query = query.where(or_(G.id == f.duplicate_of_id, G.duplicate_of_id == f.duplicate_of_id))
+
+    last_id, seen = 0, 0
+    while seen < BULK_MAX_ITEMS:
+        rows = db.execute(
+            query.where(G.id > last_id).order_by(G.id).limit(min(BULK_CHUNK_SIZE, BULK_MAX_ITEMS - seen))
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        seen += len(rows)
+        yield [row.ticket_id for row in rows], rows
+
+
+def bulk_transition(
+    db: Session,
+    request: schemas.GrievanceBulkRequest,
+    actor: User,
+    new_department_name: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Apply one lifecycle transition to many grievances.
+
+    Works in chunks of BULK_CHUNK_SIZE. Each chunk runs in its own transaction
+    with one set-based UPDATE (guarded by the allowed source statuses) and one
+    bulk insert of status history rows. Returns one outcome per requested ticket.
+    """
+    G = models.Grievance
+    action = request.action
+    allowed_from = _BULK_ALLOWED_FROM[action]
+    now = datetime.datetime.utcnow()
+
+    if action == schemas.BulkAction.resolve:
+        new_status = GrievanceStatus.solved if request.solved else GrievanceStatus.not_solved
+        values = {"status": new_status, "resolved_by": actor.id, "resolved_at": now}
+        history_status = new_status.value
+    elif action == schemas.BulkAction.close:
+        values = {"status": GrievanceStatus.closed}
+        history_status = GrievanceStatus.closed.value
+    elif action == schemas.BulkAction.transfer:
+        values = {"department_id": request.new_department_id, "assigned_to": None,
+                  "status": GrievanceStatus.pending}
+        history_status = f"transferred_to_{(new_department_name or str(request.new_department_id)).lower().replace(' ', '_')}"
+    else:
+        values = {"assigned_to": request.assign_to, "status": GrievanceStatus.in_progress}
+        history_status = GrievanceStatus.in_progress.value
+
+    results: List[Dict] = []
+    for ticket_ids, rows in _bulk_chunks(db, request, actor):
+        found = {row.ticket_id: row for row in rows}
+        outcomes: Dict[str, Dict] = {}
+        eligible: List[int] = []
+
+        for ticket_id in ticket_ids:
+            row = found.get(ticket_id)
+            if row is None:
+                outcomes[ticket_id] = {"outcome": "not_found"}
+            elif actor.role != RoleEnum.super_admin and row.department_id != actor.department_id:
+                outcomes[ticket_id] = {"outcome": "forbidden", "detail": "Grievance is not in your department"}
+            elif row.status not in allowed_from:
+                outcomes[ticket_id] = {"outcome": "skipped", "detail": f"Grievance is {row.status.value}"}
+            elif action == schemas.BulkAction.transfer and row.department_id == request.new_department_id:
+                outcomes[ticket_id] = {"outcome": "skipped", "detail": "Grievance is already in this department"}
+            else:
+                eligible.append(row.id)
+
+        updated_ids = set()
+        if eligible:
+            updated_ids = set(db.execute(
+                update(G)
+                .where(G.id.in_(eligible))
+                .where(G.status.in_(allowed_from))
+                .values(**values, sla_started_at=now)
+                .returning(G.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            if updated_ids:
+                changefeed.stamp(db, G, updated_ids, now, moved=[
+                    row for row in rows
+                    if row.id in updated_ids and changefeed.loses_visibility(row._mapping, values)
+                ])
+                changes = []
+                for row in rows:
+                    if row.id in updated_ids:
+                        before = lifecycle.state_of(row)
+                        after = before._replace(**{
+                            k: (v.value if hasattr(v, "value") else v)
+                            for k, v in values.items() if k in lifecycle.GrievanceState._fields
+                        })
+                        changes.append(lifecycle.GrievanceChange(row.id, before, after))
+                lifecycle.record_changes(db, changes)
+                db.execute(insert(models.GrievanceStatusHistory), [
+                    {
+                        "grievance_id": grievance_id,
+                        "status": history_status,
+                        "changed_at": now,
+                        "changed_by_id": actor.id,
+                        "notes": request.notes,
+                    }
+                    for grievance_id in updated_ids
+                ])
+                list_view.refresh(db, updated_ids)
+            db.commit()
+
+        for ticket_id in ticket_ids:
+            if ticket_id in outcomes:
+                continue
+            if found[ticket_id].id in updated_ids:
+                outcomes[ticket_id] = {"outcome": "updated"}
+            else:
+                outcomes[ticket_id] = {"outcome": "conflict", "detail": "Grievance changed concurrently"}
+
+        results.extend({"ticket_id": t, **outcomes[t]} for t in ticket_ids)
+
+    return results
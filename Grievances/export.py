@@ -0,0 +1,99 @@
+"""
+Streaming CSV / NDJSON export of grievances.
+
+Rows are read with a server-side cursor (yield_per) in a session owned by the
+generator, encoded one partition at a time and optionally gzip-compressed on the
+fly, so memory stays flat no matter how many rows are exported.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from database import SessionLocal
+from Department.models import Department
+from User.models import User
+from . import models
+
+EXPORT_BATCH_SIZE = 1000
+GZIP_LEVEL = 6
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = [
+    "id", "ticket_id", "status", "priority", "department_id", "department",
+    "user_id", "raised_by", "assigned_to", "assignee", "created_at",
+    "resolved_at", "resolved_by", "duplicate_of_id", "grievance_content",
+]
+
+
+def export_query(conditions: List):
+    G = models.Grievance
+    raised_by = aliased(User)
+    assignee = aliased(User)
+    return (
+        select(
+            G.id, G.ticket_id, G.status, G.priority, G.department_id,
+            Department.name.label("department"),
+            G.user_id, raised_by.name.label("raised_by"),
+            G.assigned_to, assignee.name.label("assignee"),
+            G.created_at, G.resolved_at, G.resolved_by, G.duplicate_of_id,
+            G.grievance_content,
+        )
+        .outerjoin(Department, G.department_id == Department.id)
+        .outerjoin(raised_by, G.user_id == raised_by.id)
+        .outerjoin(assignee, G.assigned_to == assignee.id)
+        .where(*conditions)
+        .order_by(G.id)
+    )
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows([_value(v) for v in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows, header: bool) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(COLUMNS, (_value(v) for v in row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def stream_export(conditions: List, fmt: str, compress: bool) -> Iterator[bytes]:
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    header = True
+    with SessionLocal() as db:
+        result = db.execute(
+            export_query(conditions).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for partition in result.partitions():
+            chunk = encode(partition, header)
+            header = False
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if header and fmt == "csv":
+            # No rows: still send the header line
+            chunk = encode([], True)
+            yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
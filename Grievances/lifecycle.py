@@ -0,0 +1,61 @@
+"""
+Grievance lifecycle change tracking.
+
+Every code path that creates a grievance or changes its status, department or
+assignee reports the change here, before committing, so that derived data
+(workload counters, analytics rollups, notification outbox, saved-search
+match counts, SSE events, ...) is updated in the same transaction as the
+grievance.
+"""
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from Workload import crud as workload_crud
+from Analytics import crud as analytics_crud
+from Notifications import crud as notification_crud
+from SavedSearches import percolator
+import events
+
+
+class GrievanceState(NamedTuple):
+    user_id: Optional[int]
+    department_id: Optional[int]
+    assigned_to: Optional[int]
+    status: Optional[str]
+    created_at: Optional[datetime]
+    resolved_at: Optional[datetime]
+
+
+class GrievanceChange(NamedTuple):
+    grievance_id: int
+    before: Optional[GrievanceState]  # None when the grievance was created
+    after: Optional[GrievanceState]   # None when the grievance was deleted
+
+
+def state_of(grievance) -> GrievanceState:
+    """Snapshot of a Grievance instance or of a row selecting the same columns."""
+    status = grievance.status
+    return GrievanceState(
+        user_id=grievance.user_id,
+        department_id=grievance.department_id,
+        assigned_to=grievance.assigned_to,
+        status=status.value if hasattr(status, "value") else status,
+        created_at=grievance.created_at,
+        resolved_at=grievance.resolved_at,
+    )
+
+
+def record_changes(db: Session, changes: Iterable[GrievanceChange]):
+    changes = [c for c in changes if c.before != c.after]
+    if not changes:
+        return
+    workload_crud.apply_changes(db, changes)
+    analytics_crud.apply_changes(db, changes)
+    notification_crud.notify_changes(db, changes)
+    percolator.percolate(db, changes)
+    events.queue_changes(db, changes)
+
+
+def record_change(db: Session, grievance_id: int,
+                  before: Optional[GrievanceState], after: Optional[GrievanceState]):
+    record_changes(db, [GrievanceChange(grievance_id, before, after)])
@@ -0,0 +1,208 @@
+"""
+Maintenance of grievance_list_view, the denormalized read model behind the
+list, search and sort endpoints.
+
+Rows are recomputed from the base tables with one INSERT ... SELECT upsert:
+  - after every ORM flush that touches a grievance, attachment, status
+    history entry or comment, or renames a user or department (listener below);
+  - by code that writes with Core statements, which calls refresh() for the
+    grievances it touched.
+Both run inside the writing transaction, so the view commits or rolls back
+with the change it reflects. rebuild() recomputes every row.
+"""
+from typing import Iterable, List, Optional
+from sqlalchemy import and_, delete, event, func, inspect, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from database import SessionLocal
+from Comments.models import Comment
+from Department.models import Department
+from User.models import User
+from . import models
+
+REFRESH_CHUNK_SIZE = 500
+
+V = models.GrievanceListView
+
+SORT_COLUMNS = {
+    "created_at": V.created_at,
+    "updated_at": V.updated_at,
+    "resolved_at": V.resolved_at,
+    "status": V.status,
+    "priority": V.priority,
+    "department": V.department_name,
+    "assigned_to": V.assignee_name,
+    "created_by": V.created_by_name,
+    "resolved_by": V.resolver_name,
+}
+
+
+def _rows(condition):
+    """SELECT producing view rows for the grievances matching `condition`."""
+    G, H, A = models.Grievance, models.GrievanceStatusHistory, models.GrievanceAttachment
+    creator, assignee, resolver = aliased(User), aliased(User), aliased(User)
+    latest_history = (
+        select(H.status, H.changed_at)
+        .where(H.grievance_id == G.id)
+        .order_by(H.changed_at.desc(), H.id.desc())
+        .limit(1)
+        .correlate(G)
+    )
+    return (
+        select(
+            G.id, G.ticket_id, G.status, G.priority,
+            G.department_id, Department.name,
+            G.user_id, creator.name,
+            G.assigned_to, assignee.name,
+            G.resolved_by, resolver.name,
+            G.created_at, G.updated_at, G.resolved_at,
+            select(func.count()).where(A.grievance_id == G.id).correlate(G).scalar_subquery(),
+            select(func.count()).where(Comment.grievance_id == G.id).correlate(G).scalar_subquery(),
+            select(func.max(Comment.timestamp)).where(Comment.grievance_id == G.id).correlate(G).scalar_subquery(),
+            latest_history.with_only_columns(H.status).scalar_subquery(),
+            latest_history.with_only_columns(H.changed_at).scalar_subquery(),
+        )
+        .outerjoin(Department, Department.id == G.department_id)
+        .outerjoin(creator, creator.id == G.user_id)
+        .outerjoin(assignee, assignee.id == G.assigned_to)
+        .outerjoin(resolver, resolver.id == G.resolved_by)
+        .where(condition)
+    )
+
+
+_COLUMNS = [
+    "grievance_id", "ticket_id", "status", "priority",
+    "department_id", "department_name",
+    "user_id", "created_by_name",
+    "assigned_to", "assignee_name",
+    "resolved_by", "resolver_name",
+    "created_at", "updated_at", "resolved_at",
+    "attachment_count", "comment_count", "last_comment_at",
+    "last_status", "last_status_changed_at",
+]
+
+
+def _upsert(connection, condition):
+    stmt = sqlite_insert(V).from_select(_COLUMNS, _rows(condition))
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[V.grievance_id],
+        set_={c: stmt.excluded[c] for c in _COLUMNS if c != "grievance_id"},
+    ))
+
+
+def _refresh(connection, grievance_ids: Iterable[int]):
+    G = models.Grievance
+    ids = sorted(set(i for i in grievance_ids if i is not None))
+    for i in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        chunk = ids[i:i + REFRESH_CHUNK_SIZE]
+        _upsert(connection, G.id.in_(chunk))
+        connection.execute(
+            delete(V).where(V.grievance_id.in_(chunk), V.grievance_id.not_in(select(G.id).where(G.id.in_(chunk))))
+        )
+
+
+def refresh(db: Session, grievance_ids: Iterable[int]):
+    """Recompute the view rows of grievances changed by Core statements; call before commit."""
+    _refresh(db.connection(), grievance_ids)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every row. Returns the number of grievances."""
+    G = models.Grievance
+    connection = db.connection()
+    connection.execute(delete(V).where(V.grievance_id.not_in(select(G.id))))
+    ids = list(db.execute(select(G.id).order_by(G.id)).scalars())
+    _refresh(connection, ids)
+    db.commit()
+    return len(ids)
+
+
+def ensure_populated(db: Session):
+    """Backfill the view when it was just created next to existing grievances."""
+    if db.execute(select(V.grievance_id).limit(1)).first() is None \
+            and db.execute(select(models.Grievance.id).limit(1)).first() is not None:
+        rebuild(db)
+
+
+_CHILDREN = (models.GrievanceAttachment, models.GrievanceStatusHistory, Comment)
+
+
+def _renamed(obj) -> bool:
+    state = inspect(obj)
+    return state.persistent and state.attrs.name.history.has_changes()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _refresh_after_flush(session: Session, flush_context):
+    grievance_ids = set()
+    user_ids, department_ids = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Grievance):
+            grievance_ids.add(obj.id)
+        elif isinstance(obj, _CHILDREN):
+            grievance_ids.add(obj.grievance_id)
+        elif isinstance(obj, User) and _renamed(obj):
+            user_ids.add(obj.id)
+        elif isinstance(obj, Department) and _renamed(obj):
+            department_ids.add(obj.id)
+    if not (grievance_ids or user_ids or department_ids):
+        return
+
+    connection = session.connection()
+    _refresh(connection, grievance_ids)
+    G = models.Grievance
+    renamed = []
+    if user_ids:
+        renamed.append(or_(G.user_id.in_(user_ids), G.assigned_to.in_(user_ids), G.resolved_by.in_(user_ids)))
+    if department_ids:
+        renamed.append(G.department_id.in_(department_ids))
+    if renamed:
+        _upsert(connection, or_(*renamed))
+
+
+def filter_conditions(
+    status: Optional[str] = None,
+    department_id: Optional[int] = None,
+    assigned_to: Optional[int] = None,
+    created_after=None,
+    created_before=None,
+    search: Optional[str] = None,
+) -> List:
+    """Grievances.crud.filter_conditions over the view's columns."""
+    conditions = []
+    if search:
+        search_term = f"%{search}%"
+        conditions.append(or_(
+            V.ticket_id.ilike(search_term),
+            V.created_by_name.ilike(search_term),
+            V.department_name.ilike(search_term),
+            V.status.ilike(search_term),
+            V.grievance_id.in_(
+                select(models.Grievance.id).where(models.Grievance.grievance_content.ilike(search_term))
+            ),
+        ))
+    if status:
+        conditions.append(V.status == status)
+    if department_id:
+        conditions.append(V.department_id == department_id)
+    if assigned_to is not None:
+        conditions.append(V.assigned_to == assigned_to)
+    if created_after:
+        conditions.append(V.created_at >= created_after)
+    if created_before:
+        conditions.append(V.created_at <= created_before)
+    return conditions
+
+
+def page_ids(db: Session, conditions: List, sort_by: str = "created_at", sort_order: str = "desc",
+             skip: int = 0, limit: int = 100):
+    """Ids of one page and the total count, both from the view."""
+    sort_column = SORT_COLUMNS.get(sort_by, V.created_at)
+    direction = sort_column.asc() if sort_order.lower() == "asc" else sort_column.desc()
+    total = db.execute(select(func.count()).select_from(V).where(and_(*conditions))).scalar()
+    ids = list(db.execute(
+        select(V.grievance_id).where(and_(*conditions))
+        .order_by(direction, V.grievance_id.desc())
+        .offset(skip).limit(limit)
+    ).scalars())
+    return ids, total
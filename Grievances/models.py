@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy import Enum as SQLEnum
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from enum import Enum as PyEnum
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -12,6 +12,7 @@ from database import Base
 
 class GrievanceStatus(str, PyEnum):
     pending = "pending"
+    in_progress = "in_progress"
     solved = "solved"
     not_solved = "not_solved"
     closed = "closed"
@@ -25,17 +26,42 @@ class Grievance(Base):
     grievance_content = Column(String)
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
     status        = Column(SQLEnum(GrievanceStatus), default=GrievanceStatus.pending)
+    priority      = Column(Integer, nullable=False, default=0, server_default="0")
+    # Root grievance of the near-duplicate cluster this grievance belongs to
+    duplicate_of_id = Column(Integer, ForeignKey("grievances.id"), nullable=True, index=True)
+    # Department suggested by the routing model when it differs from the chosen one
+    suggested_department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
     created_at    = Column(DateTime(timezone=True), server_default=func.now())
     resolved_by   = Column(Integer, ForeignKey("users.id"), nullable=True)
     resolved_at   = Column(DateTime(timezone=True), nullable=True)
+    updated_at    = Column(DateTime, nullable=True)
+    # Position in the change feed (see changefeed.py); bumped on every write
+    change_seq    = Column(Integer, nullable=True, index=True)
+    # Start of the current SLA period: the last status or assignment change,
+    # or the last escalation (see sla.py)
+    sla_started_at = Column(DateTime, nullable=True)
     user = relationship("User", foreign_keys=[user_id])
-    department = relationship("Department")
+    department = relationship("Department", foreign_keys=[department_id])
     status_history = relationship("GrievanceStatusHistory", back_populates="grievance", cascade="all, delete-orphan")
     employee = relationship("User", foreign_keys=[assigned_to])
     resolver = relationship("User", foreign_keys=[resolved_by])
     attachments = relationship("GrievanceAttachment", back_populates="grievance", cascade="all, delete-orphan")
 
 
+# Work queue order for claim-next: unassigned pending items of a department,
+# highest priority first, oldest first
+Index(
+    "ix_grievances_claim_queue",
+    Grievance.department_id,
+    Grievance.status,
+    Grievance.assigned_to,
+    Grievance.priority.desc(),
+    Grievance.created_at,
+)
+
+# SLA sweeps read the grievances of one status whose SLA period started before a cutoff
+Index("ix_grievances_sla", Grievance.status, Grievance.sla_started_at, Grievance.id)
+
 
 class GrievanceStatusHistory(Base):
     __tablename__ = "grievance_status_history"
@@ -54,6 +80,11 @@ class GrievanceStatusHistory(Base):
         return f"<GrievanceStatusHistory {self.id} - {self.status}>"
 
 
+# Timeline pages walk a grievance's history, attachments and comments in time order
+Index("ix_grievance_status_history_timeline",
+      GrievanceStatusHistory.grievance_id, GrievanceStatusHistory.changed_at, GrievanceStatusHistory.id)
+
+
 class GrievanceAttachment(Base):
     __tablename__ = "grievance_attachments"
 
@@ -64,10 +95,15 @@ class GrievanceAttachment(Base):
     file_type = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq = Column(Integer, nullable=True, index=True)
 
     # Relationship to grievance
     grievance = relationship("Grievance", back_populates="attachments")
 
+    __table_args__ = (
+        Index("ix_grievance_attachments_timeline", "grievance_id", "uploaded_at", "id"),
+    )
+
     @hybrid_property
     def file_url(self):
         return f"/grievances/attachments/{self.id}"
@@ -85,5 +121,52 @@ class GrievanceAttachment(Base):
         file_size: int
         created_at: datetime
 
-        class Config:
-            from_attributes = True
+        model_config = ConfigDict(from_attributes=True)
+
+
+class GrievanceListView(Base):
+    """
+    One denormalized row per grievance for list, search and sort endpoints:
+    display names, counts and latest activity, so pages are filtered, sorted
+    and counted from this table alone. Maintained in the writing transaction
+    by Grievances/list_view.py; never written directly.
+    """
+    __tablename__ = "grievance_list_view"
+
+    grievance_id = Column(Integer, ForeignKey("grievances.id", ondelete="CASCADE"), primary_key=True)
+    ticket_id = Column(String, nullable=False)
+    status = Column(String, nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    department_id = Column(Integer, nullable=True)
+    department_name = Column(String, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    created_by_name = Column(String, nullable=True)
+    assigned_to = Column(Integer, nullable=True)
+    assignee_name = Column(String, nullable=True)
+    resolved_by = Column(Integer, nullable=True)
+    resolver_name = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    resolved_at = Column(DateTime, nullable=True)
+    attachment_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    last_comment_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_status_changed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Role visibility plus the default created_at order
+        Index("ix_grievance_list_view_department", "department_id", "status", "created_at"),
+        Index("ix_grievance_list_view_user", "user_id", "created_at"),
+        Index("ix_grievance_list_view_assignee", "assigned_to", "created_at"),
+        Index("ix_grievance_list_view_status", "status", "created_at"),
+        Index("ix_grievance_list_view_created", "created_at"),
+        # Sort keys
+        Index("ix_grievance_list_view_updated", "updated_at"),
+        Index("ix_grievance_list_view_resolved", "resolved_at"),
+        Index("ix_grievance_list_view_priority", "priority", "created_at"),
+        Index("ix_grievance_list_view_department_name", "department_name", "created_at"),
+        Index("ix_grievance_list_view_assignee_name", "assignee_name", "created_at"),
+        Index("ix_grievance_list_view_created_by_name", "created_by_name", "created_at"),
+        Index("ix_grievance_list_view_resolver_name", "resolver_name", "created_at"),
+    )
@@ -0,0 +1,198 @@
+"""
+Department routing suggestions from grievance text.
+
+A TF-IDF + linear (nearest-centroid) model is trained offline from historical
+grievances, labelled with the department they finally ended up in. Grievances
+that were transferred (a `transferred_to_*` entry in grievance_status_history)
+were misrouted at first, so they get extra weight in training.
+
+Features are hashed word unigrams and bigrams, so the model needs no
+vocabulary. Scoring one text is a gather plus a dot product over its non-zero
+features. predict_batch scores many texts in one vectorized pass.
+
+Train from the command line:
+
+    python -m Grievances.routing train
+    python -m Grievances.routing predict "the wifi in block C is down"
+"""
+import argparse
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+from . import models
+
+N_FEATURES = 2 ** 16
+TRANSFER_WEIGHT = 3.0
+# Scales cosine scores before the softmax that turns them into a confidence
+CONFIDENCE_TEMPERATURE = 10.0
+MODEL_PATH = Path("artifacts") / "department_router.npz"
+
+# "off": do nothing, "suggest": store the suggestion, "auto": also re-route when confident
+ROUTING_MODE = "suggest"
+AUTO_ROUTE_MIN_CONFIDENCE = 0.8
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _feature_ids(text: str) -> np.ndarray:
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % N_FEATURES for g in grams),
+                       dtype=np.int64, count=len(grams))
+
+
+def _term_frequencies(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    ids, counts = np.unique(_feature_ids(text), return_counts=True)
+    return ids, 1.0 + np.log(counts)
+
+
+def _tfidf(text: str, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    ids, tf = _term_frequencies(text)
+    values = (tf * idf[ids]).astype(np.float32)
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values /= norm
+    return ids, values
+
+
+class DepartmentRouter:
+    def __init__(self, idf: np.ndarray, weights: np.ndarray, classes: np.ndarray):
+        self.idf = idf
+        self.weights = weights    # (n_classes, N_FEATURES), rows L2-normalized
+        self.classes = classes    # department id per row
+
+    def _confidence(self, scores: np.ndarray) -> np.ndarray:
+        z = (scores - scores.max(axis=0)) * CONFIDENCE_TEMPERATURE
+        e = np.exp(z)
+        return e / e.sum(axis=0)
+
+    def predict(self, text: str) -> Optional[Tuple[int, float]]:
+        ids, values = _tfidf(text, self.idf)
+        if ids.size == 0:
+            return None
+        scores = self.weights[:, ids] @ values
+        best = int(np.argmax(scores))
+        return int(self.classes[best]), float(self._confidence(scores[:, None])[best, 0])
+
+    def predict_batch(self, texts: List[str]) -> List[Optional[Tuple[int, float]]]:
+        docs = [_tfidf(t, self.idf) for t in texts]
+        non_empty = [i for i, (ids, _) in enumerate(docs) if ids.size]
+        results: List[Optional[Tuple[int, float]]] = [None] * len(texts)
+        if not non_empty:
+            return results
+        all_ids = np.concatenate([docs[i][0] for i in non_empty])
+        all_values = np.concatenate([docs[i][1] for i in non_empty])
+        offsets = np.cumsum([0] + [docs[i][0].size for i in non_empty[:-1]])
+        # (n_classes, total_nnz) contributions, summed per document
+        scores = np.add.reduceat(self.weights[:, all_ids] * all_values, offsets, axis=1)
+        confidence = self._confidence(scores)
+        best = scores.argmax(axis=0)
+        for column, doc_index in enumerate(non_empty):
+            results[doc_index] = (int(self.classes[best[column]]), float(confidence[best[column], column]))
+        return results
+
+    def save(self, path: Path = MODEL_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez_compressed(tmp, idf=self.idf, weights=self.weights, classes=self.classes)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "DepartmentRouter":
+        data = np.load(path)
+        return cls(data["idf"], data["weights"], data["classes"])
+
+
+def _training_rows(db: Session) -> Iterable[Tuple[str, int, float]]:
+    G = models.Grievance
+    H = models.GrievanceStatusHistory
+    transferred = exists().where(H.grievance_id == G.id).where(H.status.like("transferred_to_%"))
+    result = db.execute(
+        select(G.grievance_content, G.department_id, transferred.label("transferred"))
+        .where(G.department_id.is_not(None))
+        .execution_options(yield_per=1000)
+    )
+    for row in result:
+        yield row.grievance_content or "", row.department_id, TRANSFER_WEIGHT if row.transferred else 1.0
+
+
+def train(db: Session) -> DepartmentRouter:
+    """Fit the model from the grievances table (two streaming passes)."""
+    doc_freq = np.zeros(N_FEATURES, dtype=np.int64)
+    n_docs = 0
+    for text, _, _ in _training_rows(db):
+        doc_freq[np.unique(_feature_ids(text))] += 1
+        n_docs += 1
+    if n_docs == 0:
+        raise ValueError("No grievances to train on")
+    idf = (np.log((1 + n_docs) / (1 + doc_freq)) + 1.0).astype(np.float32)
+
+    class_rows = {}
+    for text, department_id, weight in _training_rows(db):
+        ids, values = _tfidf(text, idf)
+        row = class_rows.setdefault(department_id, np.zeros(N_FEATURES, dtype=np.float32))
+        np.add.at(row, ids, values * weight)
+
+    classes = np.array(sorted(class_rows), dtype=np.int64)
+    weights = np.stack([class_rows[c] for c in classes])
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights /= np.where(norms > 0, norms, 1.0)
+    return DepartmentRouter(idf, weights, classes)
+
+
+_model: Optional[DepartmentRouter] = None
+_model_mtime: Optional[float] = None
+_model_lock = threading.Lock()
+
+
+def get_router() -> Optional[DepartmentRouter]:
+    """The trained model, reloaded when the file on disk changes. None if untrained."""
+    global _model, _model_mtime
+    try:
+        mtime = MODEL_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if _model is None or mtime != _model_mtime:
+        with _model_lock:
+            if _model is None or mtime != _model_mtime:
+                _model = DepartmentRouter.load(MODEL_PATH)
+                _model_mtime = mtime
+    return _model
+
+
+def suggest_department(text: str) -> Optional[Tuple[int, float]]:
+    if ROUTING_MODE == "off":
+        return None
+    router = get_router()
+    return router.predict(text) if router else None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Department routing model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("train", help="Train from the grievances table and save the model")
+    predict_parser = commands.add_parser("predict", help="Suggest a department for a text")
+    predict_parser.add_argument("text")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        from database import SessionLocal
+        with SessionLocal() as db:
+            router = train(db)
+        router.save()
+        print(f"Trained on {len(router.classes)} departments, saved to {MODEL_PATH}")
+    else:
+        router = get_router()
+        if router is None:
+            parser.error(f"No model at {MODEL_PATH}; run 'train' first")
+        print(router.predict(args.text))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
-from pydantic import BaseModel, validator , Field , constr
+from pydantic import BaseModel, Field, constr, ConfigDict, model_validator
 from datetime import datetime
 from typing import List, Optional, Dict, Any , Literal
 from enum import Enum
+from .models import GrievanceStatus
+
+class ChangedByOut(BaseModel):
+    id: int
+    email: Optional[str] = None
+    name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 class StatusHistoryOut(BaseModel):
     id: int
     status: str
     changed_at: datetime
-    changed_by: Dict[str, Any]
+    changed_by: Optional[ChangedByOut] = None
+    notes: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AttachmentBase(BaseModel):
     file_name: str
@@ -25,8 +33,7 @@ class AttachmentResponse(AttachmentBase):
     file_url: str
     uploaded_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class GrievanceBase(BaseModel):
     grievance_content: str
@@ -49,41 +56,127 @@ class GrievanceUpdate(BaseModel):
     assigned_to: Optional[int] = None
 
 
+class BulkAction(str, Enum):
+    resolve = "resolve"
+    transfer = "transfer"
+    close = "close"
+    reassign = "reassign"
+
+class GrievanceBulkFilter(BaseModel):
+    status: Optional[GrievanceStatus] = None
+    department_id: Optional[int] = None
+    assigned_to: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    duplicate_of_id: Optional[int] = None  # whole near-duplicate cluster, root included
+
+class GrievanceBulkRequest(BaseModel):
+    action: BulkAction
+    ticket_ids: Optional[List[str]] = None
+    filter: Optional[GrievanceBulkFilter] = None
+    solved: bool = True  # resolve: solved or not_solved
+    new_department_id: Optional[int] = None  # transfer
+    assign_to: Optional[int] = None  # reassign
+    notes: Optional[str] = None
+
+class BulkItemOutcome(BaseModel):
+    ticket_id: str
+    outcome: str  # updated, not_found, forbidden, skipped, conflict
+    detail: Optional[str] = None
+
+class GrievanceBulkResult(BaseModel):
+    action: BulkAction
+    requested: int
+    succeeded: int
+    failed: int
+    results: List[BulkItemOutcome]
+
+
+class SimilarGrievanceOut(BaseModel):
+    id: int
+    ticket_id: str
+    department_id: int
+    status: str
+    duplicate_of_id: Optional[int] = None
+    similarity: float
+
+
+class ChangeEntry(BaseModel):
+    seq: int
+    entity: Literal["grievance", "attachment", "comment"]
+    id: int
+    deleted: bool = False
+    data: Optional[Dict[str, Any]] = None  # None for deletions
+
+
+class ChangeFeedPage(BaseModel):
+    changes: List[ChangeEntry]
+    next_cursor: int
+    has_more: bool
+
+
+class TimelineEntry(BaseModel):
+    type: Literal["status_change", "transfer", "attachment", "comment"]
+    id: int
+    timestamp: datetime
+    actor_id: Optional[int] = None
+    actor_email: Optional[str] = None
+    status: Optional[str] = None      # status_change, transfer
+    notes: Optional[str] = None       # status_change, transfer
+    content: Optional[str] = None     # comment
+    file_name: Optional[str] = None   # attachment
+    file_url: Optional[str] = None    # attachment
+
+
+class TimelinePage(BaseModel):
+    entries: List[TimelineEntry]
+    next_cursor: Optional[str] = None
+
+
 class GrievanceSearchResult(BaseModel):
     data: List['GrievanceOut']
     total_count: int
     filters: Dict[str, Any] = Field(default_factory=dict)
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CommentStats(BaseModel):
+    count: int = 0
+    last_comment_at: Optional[datetime] = None
+    last_comment_by: Optional[str] = None
+    last_comment_preview: Optional[str] = None
 
 
 class GrievanceOut(GrievanceBase):
     id: int
     ticket_id: str
     status: str
+    priority: int = 0
+    duplicate_of_id: Optional[int] = None
+    suggested_department_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
-    attachments: List[Dict[str, Any]] = []
-    status_history: List[Dict[str, Any]] = []
+    attachments: List[AttachmentResponse] = []
+    status_history: List[StatusHistoryOut] = []
     timeline: List[Dict[str, Any]] = []
-
-    @validator('timeline', pre=True, always=True)
-    def build_timeline(cls, v, values):
-        if 'status_history' in values and values['status_history']:
-            return [
-                {
-                    "type": "status_change",
-                    "status": entry.get('status'),
-                    "timestamp": entry.get('changed_at').isoformat() if entry.get('changed_at') else None,
-                    "changed_by": entry.get('changed_by', {}).get('email', 'System')
-                }
-                for entry in values['status_history']
-            ]
-        return []
-
-    class Config:
-        from_attributes = True
+    # Only set by list endpoints called with include_comment_stats=true
+    comment_stats: Optional[CommentStats] = None
+
+    @model_validator(mode="after")
+    def build_timeline(self):
+        self.timeline = [
+            {
+                "type": "status_change",
+                "status": entry.status,
+                "timestamp": entry.changed_at.isoformat() if entry.changed_at else None,
+                "changed_by": entry.changed_by.email if entry.changed_by else 'System'
+            }
+            for entry in self.status_history
+        ]
+        return self
+
+    model_config = ConfigDict(from_attributes=True)
 
     # Add this class to Grievances/schemas.py
     class GrievanceAttachmentOut(BaseModel):
@@ -96,8 +189,10 @@ class GrievanceOut(GrievanceBase):
             uploaded_at: datetime
 
 
-            class Config:
-                from_attributes = True
+            model_config = ConfigDict(from_attributes=True)
+
+
+GrievanceSearchResult.model_rebuild()
 
 
 class GrievanceSortBy(str, Enum):
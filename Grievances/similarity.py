@@ -0,0 +1,183 @@
+"""
+Near-duplicate detection for grievance text with MinHash and LSH.
+
+Text is normalized and split into overlapping character shingles; the shingle
+hashes and the MinHash signature are computed with vectorized NumPy. Signatures
+are banded into an in-memory LSH index, so candidate duplicates are found with a
+few dictionary lookups instead of a table scan.
+
+The index is warmed at startup and catches up before each query from the change
+feed (see changefeed.py): grievances and grievance tombstones stamped since its
+cursor are applied, so it also sees grievances created or deleted by other
+workers, and the work per catch-up is proportional to the changes since the
+last one. Sequence order is commit order, so a grievance committed late is
+never behind the cursor. Texts without any shingle (empty or punctuation only)
+have no signature and are never matched.
+"""
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import changefeed
+from . import models
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS  # detection threshold is about (1 / BANDS) ** (1 / ROWS_PER_BAND) = 0.5
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.7
+LOAD_BATCH_SIZE = 2000
+
+_PRIME = np.uint64((1 << 31) - 1)
+# Fixed seed: signatures must be identical across workers and restarts
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, int(_PRIME), NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, int(_PRIME), NUM_PERM).astype(np.uint64)
+_POWERS = np.array([pow(257, i, int(_PRIME)) for i in range(SHINGLE_SIZE)], dtype=np.uint64)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]+", " ", (text or "").lower()).split())
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Unique hashes of all SHINGLE_SIZE-byte shingles of the normalized text."""
+    data = np.frombuffer(_normalize(text).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if data.size == 0:
+        return data
+    if data.size < SHINGLE_SIZE:
+        data = np.pad(data, (0, SHINGLE_SIZE - data.size))
+    windows = sliding_window_view(data, SHINGLE_SIZE)
+    return np.unique((windows * _POWERS).sum(axis=1) % _PRIME)
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values) of a text, None if it has no shingles."""
+    hashes = shingle_hashes(text)
+    if hashes.size == 0:
+        return None
+    # (NUM_PERM, n) universal hashes; all values stay below 2**62
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class MinHashLSHIndex:
+    def __init__(self):
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [defaultdict(set) for _ in range(BANDS)]
+        # Every id seen, including those without a signature
+        self._indexed: Set[int] = set()
+        # Change feed sequence value the index is current up to
+        self._cursor = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @staticmethod
+    def _band_keys(sig: np.ndarray) -> List[bytes]:
+        return [sig[b * ROWS_PER_BAND:(b + 1) * ROWS_PER_BAND].tobytes() for b in range(BANDS)]
+
+    def add(self, grievance_id: int, sig: Optional[np.ndarray]):
+        with self._lock:
+            if grievance_id in self._signatures:
+                self.remove(grievance_id)
+            self._indexed.add(grievance_id)
+            if sig is None:
+                return
+            self._signatures[grievance_id] = sig
+            for band, key in enumerate(self._band_keys(sig)):
+                self._buckets[band][key].add(grievance_id)
+
+    def remove(self, grievance_id: int):
+        with self._lock:
+            self._indexed.discard(grievance_id)
+            sig = self._signatures.pop(grievance_id, None)
+            if sig is None:
+                return
+            for band, key in enumerate(self._band_keys(sig)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(grievance_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+
+    def get(self, grievance_id: int) -> Optional[np.ndarray]:
+        return self._signatures.get(grievance_id)
+
+    def query(self, sig: Optional[np.ndarray], min_similarity: float = 0.0,
+              exclude: Optional[int] = None, limit: int = 10) -> List[Tuple[int, float]]:
+        """Candidates sharing at least one band, ranked by estimated Jaccard similarity."""
+        if sig is None:
+            return []
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in enumerate(self._band_keys(sig)):
+                candidates |= self._buckets[band].get(key, set())
+            candidates.discard(exclude)
+            if not candidates:
+                return []
+            ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            matrix = np.stack([self._signatures[i] for i in ids])
+        scores = (matrix == sig).sum(axis=1) / NUM_PERM
+        keep = scores >= min_similarity
+        ids, scores = ids[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def sync(self, db: Session):
+        """Apply the grievances created and deleted since the last sync, whoever wrote them."""
+        G, T, S = models.Grievance, changefeed.ChangeTombstone, changefeed.ChangeSequence
+        with self._lock:
+            # Everything stamped up to the committed sequence value is committed
+            bound = db.execute(select(S.value).where(S.name == "global")).scalar() or 0
+            if bound <= self._cursor:
+                return
+            window = (self._cursor, bound)
+
+            # Tombstones first: a live row always carries a later sequence value
+            # than any tombstone of its id (SQLite may reuse the highest id), and a
+            # grievance moved out of someone's visibility leaves a tombstone while
+            # it still exists, so tombstoned ids that still exist are loaded again
+            for rows in self._batches(db, T.change_seq, T.entity_id, window, T.entity == "grievance"):
+                tombstoned = {row.entity_id for row in rows}
+                for grievance_id in tombstoned:
+                    self.remove(grievance_id)
+                for row in db.execute(select(G.id, G.grievance_content).where(G.id.in_(tombstoned))):
+                    self.add(row.id, signature(row.grievance_content))
+
+            for rows in self._batches(db, G.change_seq, G.id, window):
+                # Grievance text is never edited: stamps of indexed ids are other changes
+                new_ids = [row.id for row in rows if row.id not in self._indexed]
+                if new_ids:
+                    for row in db.execute(select(G.id, G.grievance_content).where(G.id.in_(new_ids))):
+                        self.add(row.id, signature(row.grievance_content))
+
+            self._cursor = bound
+
+    @staticmethod
+    def _batches(db: Session, seq_column, id_column, window: Tuple[int, int], *conditions):
+        """Rows stamped in the window (low, high], oldest first, LOAD_BATCH_SIZE at a time."""
+        low, high = window
+        while True:
+            rows = db.execute(
+                select(seq_column.label("seq"), id_column)
+                .where(seq_column > low, seq_column <= high, *conditions)
+                .order_by(seq_column)
+                .limit(LOAD_BATCH_SIZE)
+            ).all()
+            if rows:
+                yield rows
+            if len(rows) < LOAD_BATCH_SIZE:
+                return
+            low = rows[-1].seq
+
+index = MinHashLSHIndex()
@@ -0,0 +1,140 @@
+"""
+SLA aging and escalation.
+
+The SLA clock of a grievance is grievances.sla_started_at: it restarts whenever
+the status or the assignee changes (a before_flush listener below covers ORM
+writes; Core updates set it themselves) and when the sweep escalates it. A
+sweep reads, per status, the grievances whose clock started before
+now - SLA through the (status, sla_started_at, id) index, at most
+SWEEP_BATCH_SIZE * SWEEP_MAX_BATCHES rows, and handles each batch with one
+guarded UPDATE ... RETURNING and one bulk insert of status history rows.
+
+- pending past SLA: escalated (priority raised); escalated again after
+  another full SLA period if still pending
+- in_progress past SLA since claimed or assigned: unassigned and returned to
+  the department queue with raised priority
+
+Only the rows the UPDATE actually changed (still in the swept status with an
+expired clock) get history rows and lifecycle changes.
+The sweep runs as the periodic "sla.sweep" job (see Jobs/tasks.py).
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from metrics import Counter
+import changefeed
+from . import lifecycle, list_view, models
+from .models import GrievanceStatus
+
+SLA_RULES = {
+    GrievanceStatus.pending: timedelta(hours=48),
+    GrievanceStatus.in_progress: timedelta(hours=72),
+}
+SWEEP_BATCH_SIZE = 500
+SWEEP_MAX_BATCHES = 10
+SWEEP_INTERVAL_SECONDS = 300
+ESCALATION_PRIORITY_BUMP = 1
+
+sla_actions = Counter("sla_actions_total", "Grievances escalated or reassigned by the SLA sweep", ("action",))
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _restart_clock_before_flush(session: Session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, models.Grievance) and obj.sla_started_at is None:
+            obj.sla_started_at = now
+    for obj in session.dirty:
+        if isinstance(obj, models.Grievance):
+            attrs = inspect(obj).attrs
+            if attrs.status.history.has_changes() or attrs.assigned_to.history.has_changes():
+                obj.sla_started_at = now
+
+
+def _sweep_status(db: Session, grievance_status: GrievanceStatus, sla: timedelta, now: datetime) -> int:
+    G = models.Grievance
+    cutoff = now - sla
+    sla_hours = int(sla.total_seconds() // 3600)
+    expired = (G.status == grievance_status, G.sla_started_at <= cutoff)
+    handled = 0
+
+    for _ in range(SWEEP_MAX_BATCHES):
+        rows = db.execute(
+            select(G.id, G.user_id, G.department_id, G.assigned_to, G.status, G.created_at, G.resolved_at)
+            .where(*expired)
+            .order_by(G.sla_started_at, G.id)
+            .limit(SWEEP_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        if grievance_status == GrievanceStatus.pending:
+            action = "escalated"
+            values = {"priority": G.priority + ESCALATION_PRIORITY_BUMP}
+        else:
+            action = "reassigned"
+            values = {
+                "priority": G.priority + ESCALATION_PRIORITY_BUMP,
+                "assigned_to": None,
+                "status": GrievanceStatus.pending,
+            }
+
+        # Guarded again: a row claimed, resolved or escalated since the select is left alone
+        updated = set(db.execute(
+            update(G)
+            .where(G.id.in_([row.id for row in rows]), *expired)
+            .values(**values, sla_started_at=now)
+            .returning(G.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        changed = [row for row in rows if row.id in updated]
+
+        if changed:
+            ids = [row.id for row in changed]
+            moved = [row for row in changed if changefeed.loses_visibility(row._mapping, values)]
+            changefeed.stamp(db, G, ids, now, moved=moved)
+            if action == "reassigned":
+                lifecycle.record_changes(db, [
+                    lifecycle.GrievanceChange(
+                        row.id,
+                        lifecycle.state_of(row),
+                        lifecycle.state_of(row)._replace(assigned_to=None, status=GrievanceStatus.pending.value),
+                    )
+                    for row in changed
+                ])
+                notes = {
+                    row.id: f"No resolution within {sla_hours}h; returned to department queue "
+                            f"(was assigned to user {row.assigned_to})"
+                    for row in changed
+                }
+            else:
+                notes = {row.id: f"Pending longer than {sla_hours}h; priority raised" for row in changed}
+            db.execute(insert(models.GrievanceStatusHistory), [
+                {
+                    "grievance_id": grievance_id,
+                    "status": action,
+                    "changed_at": now,
+                    "changed_by_id": None,
+                    "notes": note,
+                }
+                for grievance_id, note in notes.items()
+            ])
+            list_view.refresh(db, ids)
+        db.commit()
+
+        handled += len(changed)
+        sla_actions.inc(len(changed), action=action)
+        if len(rows) < SWEEP_BATCH_SIZE:
+            break
+
+    return handled
+
+
+def run_sla_sweep(db: Session, now: datetime | None = None) -> dict:
+    """Run one bounded sweep over every status with an SLA. Returns counts per status."""
+    now = now or datetime.utcnow()
+    return {
+        grievance_status.value: _sweep_status(db, grievance_status, sla, now)
+        for grievance_status, sla in SLA_RULES.items()
+    }
@@ -0,0 +1,136 @@
+"""
+Grievance timeline: status changes, transfers, attachments and comments of one
+grievance, merged in a single UNION ALL query and ordered by (time, source, id).
+
+Each source is read through its (grievance_id, time, id) index with the cursor
+condition and LIMIT pushed into the branch, so a page costs at most three
+short index range scans no matter how long the grievance's history is.
+
+Times are compared in the raw text form SQLite stores them in; the cursor
+carries that text verbatim.
+"""
+import base64
+import json
+from typing import List, Optional, Tuple
+from sqlalchemy import String, and_, case, literal, null, or_, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+from Comments.models import Comment
+from User.models import User
+from . import models
+
+TIMELINE_MAX_LIMIT = 200
+
+# Tie-break order when entries share a timestamp
+_STATUS, _ATTACHMENT, _COMMENT = 0, 1, 2
+
+Cursor = Tuple[str, int, int]  # (time text, source, id)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(at: str, source: int, entry_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([at, source, entry_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        at, source, entry_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(at), int(source), int(entry_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _after(at, entry_id, source: int, cursor: Optional[Cursor], descending: bool):
+    """Rows of one source that sort after the cursor."""
+    if cursor is None:
+        return None
+    c_at, c_source, c_id = cursor
+    if descending:
+        beyond_at, beyond_id = at < c_at, entry_id < c_id
+        ties_continue = source < c_source
+    else:
+        beyond_at, beyond_id = at > c_at, entry_id > c_id
+        ties_continue = source > c_source
+    if source == c_source:
+        return or_(beyond_at, and_(at == c_at, beyond_id))
+    if ties_continue:
+        return or_(beyond_at, at == c_at)
+    return beyond_at
+
+
+def _branch(columns, at, entry_id, source: int, grievance_filter, cursor, descending: bool, limit: int):
+    conditions = [grievance_filter]
+    after = _after(at, entry_id, source, cursor, descending)
+    if after is not None:
+        conditions.append(after)
+    order = (at.desc(), entry_id.desc()) if descending else (at, entry_id)
+    return select(*columns).where(*conditions).order_by(*order).limit(limit).subquery()
+
+
+def _columns(type_, entry_id, at, source, actor_id=None, status=None, notes=None,
+             content=None, file_name=None):
+    return [
+        type_.label("type"),
+        entry_id.label("id"),
+        type_coerce(at, String).label("at"),
+        literal(source).label("source"),
+        (actor_id if actor_id is not None else null()).label("actor_id"),
+        (status if status is not None else null()).label("status"),
+        (notes if notes is not None else null()).label("notes"),
+        (content if content is not None else null()).label("content"),
+        (file_name if file_name is not None else null()).label("file_name"),
+    ]
+
+
+def read_timeline(db: Session, grievance_id: int, cursor: Optional[str] = None,
+                  limit: int = 50, descending: bool = False) -> Tuple[List[dict], Optional[str]]:
+    """One page of the timeline and the cursor of the next page (None on the last page)."""
+    position = decode_cursor(cursor) if cursor else None
+    limit = max(1, min(limit, TIMELINE_MAX_LIMIT))
+    H, A, C = models.GrievanceStatusHistory, models.GrievanceAttachment, Comment
+    history_at, attachment_at, comment_at = (type_coerce(H.changed_at, String),
+                                             type_coerce(A.uploaded_at, String),
+                                             type_coerce(C.timestamp, String))
+
+    branches = [
+        _branch(
+            _columns(case((H.status.like("transferred_to_%"), "transfer"), else_="status_change"),
+                     H.id, H.changed_at, _STATUS, actor_id=H.changed_by_id, status=H.status, notes=H.notes),
+            history_at, H.id, _STATUS, H.grievance_id == grievance_id, position, descending, limit + 1,
+        ),
+        _branch(
+            _columns(literal("attachment"), A.id, A.uploaded_at, _ATTACHMENT, file_name=A.file_name),
+            attachment_at, A.id, _ATTACHMENT, A.grievance_id == grievance_id, position, descending, limit + 1,
+        ),
+        _branch(
+            _columns(literal("comment"), C.id, C.timestamp, _COMMENT, actor_id=C.user_id, content=C.content),
+            comment_at, C.id, _COMMENT, C.grievance_id == grievance_id, position, descending, limit + 1,
+        ),
+    ]
+    merged = union_all(*(select(*b.c) for b in branches)).subquery()
+    order = (merged.c.at, merged.c.source, merged.c.id)
+    if descending:
+        order = tuple(column.desc() for column in order)
+    rows = db.execute(
+        select(merged, User.email.label("actor_email"))
+        .outerjoin(User, User.id == merged.c.actor_id)
+        .order_by(*order)
+        .limit(limit + 1)
+    ).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["at"], last["source"], last["id"])
+    entries = []
+    for row in rows:
+        entry = {key: row[key] for key in
+                 ("type", "id", "actor_id", "actor_email", "status", "notes", "content", "file_name")}
+        entry["timestamp"] = row["at"]
+        if row["type"] == "attachment":
+            entry["file_url"] = f"/grievances/attachments/{row['id']}"
+        entries.append(entry)
+    return entries, next_cursor
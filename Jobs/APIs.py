@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from database import get_db
+from dependencies import RoleChecker
+from roles import RoleEnum as Role
+from User.models import User
+from . import models, schemas
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+role_super_admin = RoleChecker([Role.super_admin])
+
+
+@router.get("", response_model=List[schemas.JobOut])
+def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    queue: Optional[str] = None,
+    limit: int = Query(100, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    """Most recent background jobs, optionally filtered by status and queue."""
+    query = db.query(models.Job)
+    if status_filter:
+        query = query.filter(models.Job.status == status_filter)
+    if queue:
+        query = query.filter(models.Job.queue == queue)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+
+@router.get("/periodic", response_model=List[schemas.PeriodicJobOut])
+def list_periodic_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    return db.query(models.PeriodicJob).order_by(models.PeriodicJob.name).all()
+
+
+@router.post("/{job_id}/retry", response_model=schemas.JobOut)
+def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_super_admin),
+):
+    """Requeue a dead job with a fresh set of attempts."""
+    job = db.get(models.Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != "dead":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}, not dead")
+    job.status = "queued"
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return job
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index
+from sqlalchemy.sql import func
+from database import Base
+
+
+class Job(Base):
+    """
+    One unit of background work.
+
+    A worker claims a job by leasing it (status running, locked_by, lease_expires_at).
+    A job whose lease ran out without completing is claimable again, so work
+    survives worker crashes and restarts.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False, default="default")
+    name = Column(String, nullable=False)            # registered task name
+    payload = Column(Text, nullable=False, default="{}")  # JSON keyword arguments
+    status = Column(String, nullable=False, default="queued")  # queued | running | done | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False)
+    locked_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "queue", "status", "run_at", "id"),
+        Index("ix_jobs_finished", "status", "finished_at"),
+    )
+
+
+class PeriodicJob(Base):
+    """Schedule of a recurring task; next_run_at is advanced with a conditional UPDATE."""
+    __tablename__ = "periodic_jobs"
+
+    name = Column(String, primary_key=True)
+    queue = Column(String, nullable=False, default="default")
+    interval_seconds = Column(Integer, nullable=False)
+    next_run_at = Column(DateTime, nullable=False)
+    last_enqueued_at = Column(DateTime, nullable=True)
+    enabled = Column(Boolean, nullable=False, default=True)
@@ -0,0 +1,294 @@
+"""
+Durable job queue stored in the application database.
+
+Tasks are plain functions registered by name with @task; they are called as
+fn(db, **payload) with a fresh session. enqueue() only adds a row to the
+caller's session, so a job commits (or rolls back) together with the change
+that caused it.
+
+Claiming is a single conditional UPDATE ... RETURNING over the oldest due job,
+so concurrent workers never run the same job. While a job runs, a heartbeat
+thread renews its lease every LEASE_RENEW_SECONDS, so a job that outlives
+LEASE_SECONDS (a large report) keeps it; only a worker that died stops
+renewing and lets the job be claimed again. A failed job is retried with
+exponential backoff until max_attempts, then marked dead. Finished jobs are
+deleted by purge_finished() after DONE_RETENTION (done) or DEAD_RETENTION
+(dead, kept longer so they can be inspected and retried). Periodic tasks
+declared with @periodic are enqueued by whichever worker first advances their
+next_run_at.
+
+run_pending() drains due jobs synchronously, for tests and scripts that run
+without the worker pool.
+"""
+import json
+import logging
+import random
+import socket
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, NamedTuple, Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from metrics import Counter
+from . import models
+
+DEFAULT_QUEUE = "default"
+DEFAULT_MAX_ATTEMPTS = 5
+LEASE_SECONDS = 300
+LEASE_RENEW_SECONDS = LEASE_SECONDS / 3
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+DONE_RETENTION = timedelta(days=1)
+DEAD_RETENTION = timedelta(days=14)
+
+logger = logging.getLogger(__name__)
+
+jobs_processed = Counter("jobs_processed_total", "Background jobs run, by outcome", ("queue", "name", "outcome"))
+
+
+class Task(NamedTuple):
+    fn: Callable
+    queue: str
+    max_attempts: int
+
+
+class Periodic(NamedTuple):
+    task: str
+    interval: timedelta
+
+
+TASKS: Dict[str, Task] = {}
+PERIODIC: Dict[str, Periodic] = {}
+
+
+def task(name: str, queue: str = DEFAULT_QUEUE, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """Register fn(db, **payload) as a task."""
+    def decorator(fn):
+        TASKS[name] = Task(fn, queue, max_attempts)
+        return fn
+    return decorator
+
+
+def periodic(name: str, interval: timedelta):
+    """Enqueue the registered task `name` every `interval`."""
+    PERIODIC[name] = Periodic(name, interval)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(db: Session, name: str, payload: Optional[dict] = None, run_at: Optional[datetime] = None,
+            queue: Optional[str] = None, max_attempts: Optional[int] = None) -> models.Job:
+    """Add a job to the caller's session; it becomes visible when the caller commits."""
+    registered = TASKS.get(name)
+    job = models.Job(
+        queue=queue or (registered.queue if registered else DEFAULT_QUEUE),
+        name=name,
+        payload=json.dumps(payload or {}),
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or (registered.max_attempts if registered else DEFAULT_MAX_ATTEMPTS),
+        run_at=run_at or datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+def backoff(attempts: int) -> timedelta:
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(db: Session, queue: str, locked_by: str, now: Optional[datetime] = None,
+          lease_seconds: int = LEASE_SECONDS):
+    """Lease the oldest due job in `queue`. Returns the claimed row or None."""
+    now = now or datetime.utcnow()
+    J = models.Job
+    next_id = (
+        select(J.id)
+        .where(J.queue == queue)
+        .where(or_(
+            (J.status == "queued") & (J.run_at <= now),
+            (J.status == "running") & (J.lease_expires_at < now),
+        ))
+        .order_by(J.run_at, J.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(J)
+        .where(J.id == next_id)
+        .values(
+            status="running",
+            locked_by=locked_by,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=J.attempts + 1,
+        )
+        .returning(J.id, J.name, J.payload, J.attempts, J.max_attempts, J.queue)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return row
+
+
+def renew_lease(db: Session, job_id: int, owner: str, now: Optional[datetime] = None,
+                lease_seconds: int = LEASE_SECONDS) -> bool:
+    """Extend a running job's lease; False if `owner` no longer holds it."""
+    now = now or datetime.utcnow()
+    J = models.Job
+    result = db.execute(
+        update(J)
+        .where(J.id == job_id, J.locked_by == owner, J.status == "running")
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+@contextmanager
+def _lease_heartbeat(job_id: int, owner: str):
+    """Renew the lease of a job every LEASE_RENEW_SECONDS until the block exits."""
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(LEASE_RENEW_SECONDS):
+            try:
+                with SessionLocal() as db:
+                    if not renew_lease(db, job_id, owner):
+                        return
+            except Exception:
+                # e.g. the database is busy; the next beat tries again well before the lease runs out
+                logger.exception("Could not renew the lease of job %s", job_id)
+
+    heartbeat = threading.Thread(target=renew, name=f"jobs-lease-{job_id}", daemon=True)
+    heartbeat.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def _finish(db: Session, job_id: int, owner: str, **values) -> bool:
+    """Release a leased job; a no-op if another worker has since taken over the lease."""
+    J = models.Job
+    result = db.execute(
+        update(J)
+        .where(J.id == job_id, J.locked_by == owner, J.status == "running")
+        .values(locked_by=None, lease_expires_at=None, **values)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def execute(row, locked_by: str) -> str:
+    """Run a claimed job in its own session and record the outcome."""
+    registered = TASKS.get(row.name)
+    with SessionLocal() as db:
+        try:
+            if registered is None:
+                raise LookupError(f"No task registered as '{row.name}'")
+            with _lease_heartbeat(row.id, locked_by):
+                registered.fn(db, **json.loads(row.payload))
+            db.commit()
+        except Exception:
+            db.rollback()
+            error = traceback.format_exc(limit=5)[-1000:]
+            if row.attempts >= row.max_attempts:
+                outcome = "dead"
+                released = _finish(db, row.id, locked_by, status="dead", last_error=error,
+                                   finished_at=datetime.utcnow())
+            else:
+                outcome = "retry"
+                released = _finish(db, row.id, locked_by, status="queued", last_error=error,
+                                   run_at=datetime.utcnow() + backoff(row.attempts))
+        else:
+            outcome = "done"
+            released = _finish(db, row.id, locked_by, status="done", finished_at=datetime.utcnow())
+        if not released:
+            # The lease expired and another worker reclaimed the job; its outcome wins
+            outcome = "lease_lost"
+    jobs_processed.inc(queue=row.queue, name=row.name, outcome=outcome)
+    return outcome
+
+
+def purge_finished(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete done and dead jobs past their retention. Returns how many were deleted."""
+    now = now or datetime.utcnow()
+    J = models.Job
+    deleted = db.query(J).filter(or_(
+        (J.status == "done") & (J.finished_at < now - DONE_RETENTION),
+        (J.status == "dead") & (J.finished_at < now - DEAD_RETENTION),
+    )).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def sync_periodic(db: Session, now: Optional[datetime] = None):
+    """Create schedule rows for periodic tasks declared in code; existing rows keep their next_run_at."""
+    now = now or datetime.utcnow()
+    for name, schedule in PERIODIC.items():
+        registered = TASKS[schedule.task]
+        stmt = sqlite_insert(models.PeriodicJob).values(
+            name=name,
+            queue=registered.queue,
+            interval_seconds=int(schedule.interval.total_seconds()),
+            next_run_at=now,
+            enabled=True,
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"queue": stmt.excluded.queue, "interval_seconds": stmt.excluded.interval_seconds},
+        ))
+    db.commit()
+
+
+def schedule_due(db: Session, now: Optional[datetime] = None) -> int:
+    """Enqueue every periodic task whose next_run_at has passed. Returns how many were enqueued."""
+    now = now or datetime.utcnow()
+    P = models.PeriodicJob
+    enqueued = 0
+    for schedule in db.query(P).filter(P.enabled.is_(True), P.next_run_at <= now).all():
+        # Only the worker that advances next_run_at enqueues the run
+        advanced = db.execute(
+            update(P)
+            .where(P.name == schedule.name, P.next_run_at == schedule.next_run_at)
+            .values(next_run_at=now + timedelta(seconds=schedule.interval_seconds), last_enqueued_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if advanced == 1:
+            enqueue(db, PERIODIC[schedule.name].task if schedule.name in PERIODIC else schedule.name,
+                    queue=schedule.queue, run_at=now)
+            enqueued += 1
+    db.commit()
+    return enqueued
+
+
+def run_pending(queue: Optional[str] = None, now: Optional[datetime] = None, max_jobs: int = 1000) -> Dict[str, int]:
+    """
+    Synchronously enqueue due periodic tasks and run due jobs until none are left
+    (or max_jobs have run). Returns counts per outcome.
+    """
+    now = now or datetime.utcnow()
+    locked_by = worker_id()
+    outcomes: Dict[str, int] = {}
+    with SessionLocal() as db:
+        sync_periodic(db, now)
+        schedule_due(db, now)
+        queues = [queue] if queue else sorted(
+            {q for (q,) in db.query(models.Job.queue).filter(models.Job.status.in_(["queued", "running"])).distinct()}
+        )
+        for name in queues:
+            while sum(outcomes.values()) < max_jobs:
+                row = claim(db, name, locked_by, now)
+                if row is None:
+                    break
+                outcome = execute(row, locked_by)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
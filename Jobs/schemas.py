@@ -0,0 +1,32 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional
+
+
+class JobOut(BaseModel):
+    id: int
+    queue: str
+    name: str
+    payload: str
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PeriodicJobOut(BaseModel):
+    name: str
+    queue: str
+    interval_seconds: int
+    next_run_at: datetime
+    last_enqueued_at: Optional[datetime] = None
+    enabled: bool
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,93 @@
+"""
+Registered background tasks and their schedules.
+
+Importing this module registers every task; main.py imports it before the
+worker pool starts.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+import idempotency
+from Analytics import crud as analytics_crud, snapshot as analytics_snapshot
+from Grievances import crud as grievance_crud, list_view, sla
+from Notifications import dispatcher as notification_dispatcher
+from Reports import worker as report_worker
+from SavedSearches import crud as saved_search_crud
+from Workload import crud as workload_crud
+from . import queue
+from .queue import periodic, task
+
+ANALYTICS_REBUILD_DAYS = 7
+
+
+@task("sla.sweep", queue="maintenance", max_attempts=1)
+def sla_sweep(db: Session):
+    sla.run_sla_sweep(db)
+
+
+@task("workload.reconcile", queue="maintenance")
+def workload_reconcile(db: Session):
+    workload_crud.reconcile(db)
+
+
+@task("idempotency.purge", queue="maintenance")
+def idempotency_purge(db: Session):
+    idempotency.purge_expired(db)
+
+
+@task("jobs.purge", queue="maintenance")
+def jobs_purge(db: Session):
+    queue.purge_finished(db)
+
+
+@task("analytics.rebuild", queue="maintenance")
+def analytics_rebuild(db: Session, days: int = ANALYTICS_REBUILD_DAYS):
+    analytics_crud.rebuild(db, (datetime.utcnow() - timedelta(days=days)).date())
+
+
+@task("analytics.snapshot", queue="maintenance", max_attempts=2)
+def build_analytics_snapshot(db: Session):
+    analytics_snapshot.build(db)
+
+
+@task("grievances.list_view_rebuild", queue="maintenance")
+def rebuild_list_view(db: Session):
+    list_view.rebuild(db)
+
+
+@task("grievances.assign")
+def assign_grievances(db: Session):
+    grievance_crud.assign_grievances_to_employees(db)
+
+
+@task("reports.generate", queue="reports", max_attempts=3)
+def generate_report(db: Session, report_id: int):
+    # Blocks this queue thread while a worker process builds the file; the
+    # job's lease is renewed meanwhile (see Jobs/queue.py), so it is built once
+    report_worker.submit(report_id).result()
+
+
+@task("notifications.dispatch", queue="notifications", max_attempts=1)
+def dispatch_notifications(db: Session):
+    notification_dispatcher.dispatch(db)
+
+
+@task("notifications.purge", queue="maintenance")
+def purge_notifications(db: Session):
+    notification_dispatcher.purge_outbox(db)
+
+
+@task("saved_searches.recount", queue="maintenance")
+def recount_saved_searches(db: Session):
+    saved_search_crud.recount_all(db)
+
+
+periodic("sla.sweep", timedelta(seconds=sla.SWEEP_INTERVAL_SECONDS))
+periodic("idempotency.purge", timedelta(hours=1))
+periodic("jobs.purge", timedelta(hours=1))
+periodic("workload.reconcile", timedelta(days=1))
+periodic("grievances.list_view_rebuild", timedelta(days=1))
+periodic("analytics.rebuild", timedelta(days=1))
+periodic("analytics.snapshot", timedelta(minutes=15))
+periodic("notifications.dispatch", timedelta(seconds=30))
+periodic("notifications.purge", timedelta(hours=1))
+periodic("saved_searches.recount", timedelta(days=1))
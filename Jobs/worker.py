@@ -0,0 +1,75 @@
+"""
+Thread pool that runs queued jobs, started and stopped from the FastAPI lifespan.
+
+Each queue gets its own threads (QUEUE_CONCURRENCY), so slow report or
+notification jobs cannot starve maintenance. One extra thread enqueues due
+periodic tasks every SCHEDULER_INTERVAL_SECONDS.
+"""
+import logging
+import threading
+from typing import Dict, List
+from database import SessionLocal
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+QUEUE_CONCURRENCY: Dict[str, int] = {
+    "default": 2,
+    "maintenance": 1,
+    "reports": 1,
+    "notifications": 1,
+}
+POLL_INTERVAL_SECONDS = 1.0
+SCHEDULER_INTERVAL_SECONDS = 5.0
+
+
+class JobWorkerPool:
+    def __init__(self, concurrency: Dict[str, int] = None):
+        self.concurrency = concurrency or QUEUE_CONCURRENCY
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        with SessionLocal() as db:
+            queue.sync_periodic(db)
+        self._spawn("jobs-scheduler", self._schedule)
+        for name, count in self.concurrency.items():
+            for i in range(count):
+                self._spawn(f"jobs-{name}-{i}", self._work, name)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _spawn(self, name: str, target, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _schedule(self):
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    queue.schedule_due(db)
+            except Exception:
+                logger.exception("Job scheduler failed")
+            self._stop.wait(SCHEDULER_INTERVAL_SECONDS)
+
+    def _work(self, queue_name: str):
+        locked_by = f"{queue.worker_id()}:{threading.current_thread().name}"
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    row = queue.claim(db, queue_name, locked_by)
+                if row is None:
+                    self._stop.wait(POLL_INTERVAL_SECONDS)
+                    continue
+                queue.execute(row, locked_by)
+            except Exception:
+                logger.exception("Job worker %s failed", queue_name)
+                self._stop.wait(POLL_INTERVAL_SECONDS)
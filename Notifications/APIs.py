@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database import get_db
+from dependencies import get_current_active_user
+from User.models import User
+from . import crud, schemas
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+
+@router.get("/preferences", response_model=schemas.NotificationPreferenceOut)
+def get_preferences(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    return crud.get_preference(db, current_user.id)
+
+
+@router.put("/preferences", response_model=schemas.NotificationPreferenceOut)
+def update_preferences(
+    preferences: schemas.NotificationPreferenceBase,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Choose delivery channels: email digests and/or a webhook URL receiving JSON digests."""
+    return crud.set_preference(db, current_user.id, preferences.email_enabled, preferences.webhook_url)
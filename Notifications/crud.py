@@ -0,0 +1,114 @@
+"""
+Writing notifications into the outbox.
+
+notify_changes is called from Grievances.lifecycle.record_changes and
+notify_comment from Comments.crud.create_comment, before they commit, so a
+notification exists exactly when the change it describes does.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from User.models import User
+from . import models
+
+
+def _channels(db: Session, recipient_ids: Iterable[int]) -> Dict[int, List[str]]:
+    recipient_ids = set(recipient_ids)
+    if not recipient_ids:
+        return {}
+    preferences = {
+        p.user_id: p for p in db.execute(
+            select(models.NotificationPreference).where(models.NotificationPreference.user_id.in_(recipient_ids))
+        ).scalars()
+    }
+    channels = {}
+    for user_id in recipient_ids:
+        preference = preferences.get(user_id)
+        selected = []
+        if preference is None or preference.email_enabled:
+            selected.append("email")
+        if preference is not None and preference.webhook_url:
+            selected.append("webhook")
+        channels[user_id] = selected
+    return channels
+
+
+def _insert(db: Session, notifications: List[Tuple[int, str, Optional[int], str]]):
+    """notifications: (recipient_id, kind, grievance_id, message)"""
+    if not notifications:
+        return
+    now = datetime.utcnow()
+    channels = _channels(db, (n[0] for n in notifications))
+    rows = [
+        {
+            "recipient_id": recipient_id,
+            "channel": channel,
+            "kind": kind,
+            "grievance_id": grievance_id,
+            "message": message,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+        }
+        for recipient_id, kind, grievance_id, message in notifications
+        for channel in channels.get(recipient_id, [])
+    ]
+    if rows:
+        db.execute(insert(models.NotificationOutbox), rows)
+
+
+def _label(status: Optional[str]) -> str:
+    return (status or "unknown").replace("_", " ")
+
+
+def notify_changes(db: Session, changes: Iterable):
+    """
+    Queue notifications for lifecycle changes:
+      - the new assignee when a grievance is assigned
+      - the person who raised it when its status or department changes
+    """
+    notifications = []
+    for change in changes:
+        before, after = change.before, change.after
+        if after is None or before is None:
+            continue
+        if after.assigned_to and after.assigned_to != before.assigned_to:
+            notifications.append((after.assigned_to, "assigned", change.grievance_id,
+                                  "Assigned to you"))
+        if after.user_id and after.status != before.status:
+            notifications.append((after.user_id, "status_changed", change.grievance_id,
+                                  f"Status changed from {_label(before.status)} to {_label(after.status)}"))
+        elif after.user_id and after.department_id != before.department_id:
+            notifications.append((after.user_id, "transferred", change.grievance_id,
+                                  "Transferred to another department"))
+    _insert(db, notifications)
+
+
+def notify_comment(db: Session, grievance, comment):
+    """Queue a notification for the raiser and assignee of a grievance, except the commenter."""
+    author = db.get(User, comment.user_id)
+    who = (author.name or author.email) if author else f"user #{comment.user_id}"
+    preview = comment.content if len(comment.content) <= 140 else comment.content[:137] + "..."
+    recipients = {grievance.user_id, grievance.assigned_to} - {None, comment.user_id}
+    _insert(db, [
+        (recipient, "comment", grievance.id, f"{who} commented: {preview}")
+        for recipient in sorted(recipients)
+    ])
+
+
+def get_preference(db: Session, user_id: int) -> models.NotificationPreference:
+    preference = db.get(models.NotificationPreference, user_id)
+    return preference or models.NotificationPreference(user_id=user_id, email_enabled=True, webhook_url=None)
+
+
+def set_preference(db: Session, user_id: int, email_enabled: bool, webhook_url: Optional[str]):
+    preference = db.get(models.NotificationPreference, user_id)
+    if preference is None:
+        preference = models.NotificationPreference(user_id=user_id)
+        db.add(preference)
+    preference.email_enabled = email_enabled
+    preference.webhook_url = webhook_url
+    db.commit()
+    db.refresh(preference)
+    return preference
@@ -0,0 +1,191 @@
+"""
+Outbox dispatcher: sends pending notifications as per-recipient digests.
+
+Runs as the periodic "notifications.dispatch" job. Each run takes up to
+DISPATCH_BATCH_SIZE due rows, groups them by (recipient, channel) and sends one
+email or webhook call per group. A failed group is retried with exponential
+backoff; after MAX_ATTEMPTS its rows are marked dead.
+
+The hourly "notifications.purge" job deletes sent rows after SENT_RETENTION
+and dead rows (kept longer, to look into failures) after DEAD_RETENTION.
+"""
+import json
+import random
+import smtplib
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from Grievances.models import Grievance
+from metrics import Counter
+from User.models import User
+from . import models, webhooks
+
+SMTP_HOST = "localhost"
+SMTP_PORT = 1025
+SMTP_FROM = "grievance-cell@localhost"
+SMTP_TIMEOUT_SECONDS = 10
+WEBHOOK_TIMEOUT_SECONDS = 10
+
+DISPATCH_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 3600
+SENT_RETENTION = timedelta(days=7)
+DEAD_RETENTION = timedelta(days=30)
+
+notifications_sent = Counter("notifications_sent_total", "Notification digests delivered or failed",
+                             ("channel", "outcome"))
+
+
+class DeliveryError(Exception):
+    pass
+
+
+def backoff(attempts: int) -> timedelta:
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class EmailSender:
+    """Opens one SMTP connection lazily and reuses it for every digest of a run."""
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def send(self, to: str, subject: str, body: str):
+        message = EmailMessage()
+        message["From"] = SMTP_FROM
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        try:
+            if self._smtp is None:
+                self._smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+            self._smtp.send_message(message)
+        except (OSError, smtplib.SMTPException) as e:
+            self.close()
+            raise DeliveryError(f"SMTP: {e}") from e
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                pass
+            self._smtp = None
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """A redirect could point anywhere, including addresses check_url() refuses."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_webhook_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def send_webhook(url: str, payload: dict):
+    try:
+        webhooks.check_url(url)
+    except webhooks.UnsafeWebhookURL as e:
+        raise DeliveryError(f"Webhook: {e}") from e
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with _webhook_opener.open(request, timeout=WEBHOOK_TIMEOUT_SECONDS) as response:
+            if response.status >= 300:
+                raise DeliveryError(f"Webhook returned {response.status}")
+    except (OSError, urllib.error.URLError) as e:
+        raise DeliveryError(f"Webhook: {e}") from e
+
+
+def _digest_text(items: List[dict]) -> str:
+    return "\n".join(
+        f"- [{item['ticket_id'] or 'grievance'}] {item['message']}" for item in items
+    ) + "\n"
+
+
+def dispatch(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Send one batch of due notifications. Returns counts of digests per outcome."""
+    now = now or datetime.utcnow()
+    O = models.NotificationOutbox
+    P = models.NotificationPreference
+    rows = db.execute(
+        select(O.id, O.recipient_id, O.channel, O.kind, O.grievance_id, O.message, O.attempts,
+               O.created_at, User.email, P.webhook_url, Grievance.ticket_id)
+        .join(User, O.recipient_id == User.id)
+        .outerjoin(P, O.recipient_id == P.user_id)
+        .outerjoin(Grievance, O.grievance_id == Grievance.id)
+        .where(O.status == "pending", O.next_attempt_at <= now)
+        .order_by(O.recipient_id, O.channel, O.id)
+        .limit(DISPATCH_BATCH_SIZE)
+    ).all()
+
+    digests = defaultdict(list)
+    for row in rows:
+        digests[(row.recipient_id, row.channel)].append(row)
+
+    outcomes = {"sent": 0, "retry": 0, "dead": 0}
+    email = EmailSender()
+    try:
+        for (recipient_id, channel), items in digests.items():
+            ids = [item.id for item in items]
+            entries = [
+                {"kind": item.kind, "grievance_id": item.grievance_id, "ticket_id": item.ticket_id,
+                 "message": item.message, "created_at": item.created_at.isoformat() if item.created_at else None}
+                for item in items
+            ]
+            subject = f"{len(items)} update{'s' if len(items) != 1 else ''} on your grievances"
+            try:
+                if channel == "email":
+                    if not items[0].email:
+                        raise DeliveryError("Recipient has no email address")
+                    email.send(items[0].email, subject, _digest_text(entries))
+                else:
+                    if not items[0].webhook_url:
+                        raise DeliveryError("Recipient has no webhook URL")
+                    send_webhook(items[0].webhook_url,
+                                 {"recipient_id": recipient_id, "subject": subject, "notifications": entries})
+            except DeliveryError as e:
+                attempts = max(item.attempts for item in items) + 1
+                outcome = "dead" if attempts >= MAX_ATTEMPTS else "retry"
+                db.execute(
+                    update(O).where(O.id.in_(ids)).values(
+                        attempts=attempts,
+                        last_error=str(e)[:500],
+                        status="dead" if outcome == "dead" else "pending",
+                        next_attempt_at=now + backoff(attempts),
+                    )
+                )
+            else:
+                outcome = "sent"
+                db.execute(update(O).where(O.id.in_(ids)).values(status="sent", sent_at=datetime.utcnow()))
+            db.commit()
+            outcomes[outcome] += 1
+            notifications_sent.inc(channel=channel, outcome=outcome)
+    finally:
+        email.close()
+    return outcomes
+
+
+def purge_outbox(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete sent and dead notifications past their retention. Returns how many were deleted."""
+    now = now or datetime.utcnow()
+    O = models.NotificationOutbox
+    # Dead rows die within hours of being created, well inside DEAD_RETENTION
+    deleted = db.query(O).filter(or_(
+        (O.status == "sent") & (O.sent_at < now - SENT_RETENTION),
+        (O.status == "dead") & (O.created_at < now - DEAD_RETENTION),
+    )).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
+from sqlalchemy.sql import func
+from database import Base
+
+
+class NotificationOutbox(Base):
+    """
+    A pending notification for one recipient on one channel.
+
+    Rows are inserted in the same transaction as the grievance or comment
+    change they describe, and sent later in per-recipient digests.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    channel = Column(String, nullable=False)        # email | webhook
+    kind = Column(String, nullable=False)           # assigned | status_changed | transferred | comment
+    grievance_id = Column(Integer, ForeignKey("grievances.id"), nullable=True)
+    message = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending | sent | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_due", "status", "next_attempt_at", "recipient_id", "channel"),
+    )
+
+
+class NotificationPreference(Base):
+    """Per-user delivery settings. Users without a row get email only."""
+    __tablename__ = "notification_preferences"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    email_enabled = Column(Boolean, nullable=False, default=True)
+    webhook_url = Column(String, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
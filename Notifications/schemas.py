@@ -0,0 +1,21 @@
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Optional
+from . import webhooks
+
+
+class NotificationPreferenceBase(BaseModel):
+    email_enabled: bool = True
+    webhook_url: Optional[str] = None
+
+    @field_validator("webhook_url")
+    @classmethod
+    def webhook_is_public_http(cls, v):
+        if v:
+            webhooks.check_url(v)
+        return v or None
+
+
+class NotificationPreferenceOut(NotificationPreferenceBase):
+    user_id: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,152 @@
+"""
+Local SMTP and HTTP sinks that stand in for a mail server and webhook
+receivers during development and tests. They accept everything and keep
+what they received in memory.
+
+    python -m Notifications.sink            # SMTP on 1025, HTTP on 8025
+
+    with LocalSink() as sink:
+        ...  # point dispatcher.SMTP_PORT / webhook URLs at sink.smtp_port / sink.http_url
+        sink.emails, sink.webhooks
+"""
+import argparse
+import email
+import json
+import socketserver
+import threading
+from email import policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        self._reply("220 localhost sink ready")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                message = email.message_from_bytes(b"".join(lines), policy=policy.default)
+                self.server.sink.emails.append({
+                    "from": sender,
+                    "to": recipients,
+                    "subject": message["Subject"],
+                    "body": message.get_content() if not message.is_multipart() else "",
+                })
+                self._reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = body.decode("utf-8", "replace")
+        self.server.sink.webhooks.append({"path": self.path, "payload": payload})
+        status = self.server.sink.webhook_status
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalSink:
+    def __init__(self, smtp_port: int = 0, http_port: int = 0, host: str = "127.0.0.1"):
+        self.emails: List[dict] = []
+        self.webhooks: List[dict] = []
+        self.webhook_status = 200  # set to e.g. 500 to simulate a failing receiver
+        self._smtp = _SMTPServer((host, smtp_port), _SMTPHandler)
+        self._http = ThreadingHTTPServer((host, http_port), _HTTPHandler)
+        self._smtp.sink = self._http.sink = self
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def smtp_port(self) -> int:
+        return self._smtp.server_address[1]
+
+    @property
+    def http_url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalSink":
+        for server in (self._smtp, self._http):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in (self._smtp, self._http):
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self) -> "LocalSink":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local SMTP/HTTP notification sink")
+    parser.add_argument("--smtp-port", type=int, default=1025)
+    parser.add_argument("--http-port", type=int, default=8025)
+    args = parser.parse_args(argv)
+
+    sink = LocalSink(args.smtp_port, args.http_port).start()
+    print(f"SMTP sink on port {sink.smtp_port}, webhook sink at {sink.http_url}; Ctrl+C to stop")
+    seen_emails = seen_webhooks = 0
+    stop = threading.Event()
+    try:
+        while not stop.wait(1):
+            for message in sink.emails[seen_emails:]:
+                print(f"EMAIL to {message['to']}: {message['subject']}\n{message['body']}")
+            for call in sink.webhooks[seen_webhooks:]:
+                print(f"WEBHOOK {call['path']}: {json.dumps(call['payload'])}")
+            seen_emails, seen_webhooks = len(sink.emails), len(sink.webhooks)
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
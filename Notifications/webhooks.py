@@ -0,0 +1,44 @@
+"""
+Webhook URL checks against server-side request forgery.
+
+A webhook URL must be http(s) and its host must resolve only to public
+addresses: loopback, private, link-local (cloud metadata endpoints included),
+multicast and reserved addresses are refused. URLs are checked when they are
+registered and again right before every delivery, since DNS answers can change
+in between, and deliveries do not follow redirects.
+
+ALLOW_PRIVATE_ADDRESSES lifts the address check for local development against
+Notifications/sink.py.
+"""
+import ipaddress
+import socket
+import urllib.parse
+
+ALLOW_PRIVATE_ADDRESSES = False
+
+
+class UnsafeWebhookURL(ValueError):
+    pass
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 zone id
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url(url: str) -> None:
+    """Raise UnsafeWebhookURL unless `url` is http(s) and its host resolves to public addresses only."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeWebhookURL("webhook_url must be an http(s) URL")
+    if ALLOW_PRIVATE_ADDRESSES:
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)}
+    except (OSError, ValueError):
+        raise UnsafeWebhookURL(f"webhook_url host {parts.hostname} cannot be resolved")
+    if not all(_is_public(address) for address in addresses):
+        raise UnsafeWebhookURL("webhook_url must not point to a loopback, private or link-local address")
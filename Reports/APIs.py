@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from pathlib import Path
+from database import get_db
+from dependencies import RoleChecker
+from rate_limit import RateLimit
+from roles import RoleEnum as Role
+from User.models import User
+from Jobs import queue as job_queue
+from . import builder, crud, models, schemas
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+role_admin = RoleChecker([Role.admin, Role.super_admin])
+
+
+def _get_visible_job(db: Session, job_id: int, current_user: User) -> models.ReportJob:
+    job = db.get(models.ReportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    if current_user.role != Role.super_admin and job.department_id != current_user.department_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this report")
+    return job
+
+
+@router.post("", response_model=schemas.ReportJobOut, status_code=status.HTTP_202_ACCEPTED)
+def request_report(
+    request: schemas.ReportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_admin),
+):
+    """
+    Queue a department report (XLSX or PDF) for the given period.
+
+    - Admins get reports for their own department
+    - Super admins may pick a department, or omit it for all departments
+    - If the same report was already built over unchanged data, that job is returned
+    """
+    department_id = request.department_id if current_user.role == Role.super_admin else current_user.department_id
+    params, params_digest = crud.canonical_params(request, department_id)
+    version = crud.data_version(db)
+
+    existing = crud.find_reusable(db, params_digest, version)
+    if existing is not None and (existing.status != "done" or Path(existing.file_path or "").exists()):
+        out = schemas.ReportJobOut.model_validate(existing)
+        out.cached = True
+        return out
+
+    job = crud.create_job(db, current_user.id, department_id, params, params_digest, version, request.format.value)
+    # The report row and its generation job commit together
+    job_queue.enqueue(db, "reports.generate", {"report_id": job.id})
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@router.get("/{job_id}", response_model=schemas.ReportJobOut)
+def get_report_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_admin),
+):
+    """Poll generation status and progress (percent)."""
+    return _get_visible_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/download", response_class=FileResponse,
+            dependencies=[Depends(RateLimit("download"))])
+def download_report(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_admin),
+):
+    job = _get_visible_job(db, job_id, current_user)
+    if job.status != "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Report is {job.status}")
+    if not job.file_path or not Path(job.file_path).exists():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Report file no longer exists; request it again")
+    return FileResponse(
+        job.file_path,
+        media_type=builder.MEDIA_TYPES[job.format],
+        filename=f"grievance-report-{job.id}.{job.format}",
+    )
@@ -0,0 +1,252 @@
+"""
+Department report generation. Runs inside a report worker process.
+
+A report covers grievances created in [start, end] and contains:
+  - a summary (counts per status, resolutions, SLA breaches, resolution time)
+  - per-department rows (when not restricted to one department)
+  - per-employee stats (assigned, resolved, open, SLA breaches, mean hours)
+  - in XLSX only, every grievance row, streamed into a write-only workbook
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session, aliased
+from database import SessionLocal
+from Department.models import Department
+from Grievances.models import Grievance, GrievanceStatusHistory
+from User.models import User
+from . import models
+
+REPORTS_DIR = Path("artifacts") / "reports"
+DETAIL_BATCH_SIZE = 1000
+
+# History entries written by the SLA sweep
+SLA_BREACH_STATUSES = ("escalated", "reassigned")
+RESOLVED_STATUSES = ("solved", "not_solved")
+OPEN_STATUSES = ("pending", "in_progress")
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+def _period(params: dict):
+    start = datetime.combine(date.fromisoformat(params["start"]), datetime.min.time())
+    end = datetime.combine(date.fromisoformat(params["end"]), datetime.min.time()) + timedelta(days=1)
+    return start, end
+
+
+def _conditions(params: dict) -> list:
+    start, end = _period(params)
+    conditions = [Grievance.created_at >= start, Grievance.created_at < end]
+    if params.get("department_id"):
+        conditions.append(Grievance.department_id == params["department_id"])
+    return conditions
+
+
+def _stat_columns(params: dict):
+    """Aggregates shared by every breakdown, over the report's grievances."""
+    start, end = _period(params)
+    breached = (
+        select(GrievanceStatusHistory.grievance_id)
+        .where(GrievanceStatusHistory.status.in_(SLA_BREACH_STATUSES))
+        .where(GrievanceStatusHistory.changed_at < end)
+    )
+    hours = (func.julianday(Grievance.resolved_at) - func.julianday(Grievance.created_at)) * 24
+    is_resolved = Grievance.status.in_(RESOLVED_STATUSES)
+    return [
+        func.count(Grievance.id).label("total"),
+        func.sum(case((Grievance.status.in_(OPEN_STATUSES), 1), else_=0)).label("open"),
+        func.sum(case((is_resolved, 1), else_=0)).label("resolved"),
+        func.sum(case((Grievance.status == "closed", 1), else_=0)).label("closed"),
+        func.sum(case((Grievance.id.in_(breached), 1), else_=0)).label("sla_breaches"),
+        func.avg(case((is_resolved, hours))).label("mean_resolution_hours"),
+    ]
+
+
+def _stats(row) -> dict:
+    return {
+        "total": row.total or 0,
+        "open": row.open or 0,
+        "resolved": row.resolved or 0,
+        "closed": row.closed or 0,
+        "sla_breaches": row.sla_breaches or 0,
+        "mean_resolution_hours": round(row.mean_resolution_hours, 1) if row.mean_resolution_hours is not None else None,
+    }
+
+
+def gather(db: Session, params: dict) -> Dict[str, object]:
+    conditions = _conditions(params)
+    summary = _stats(db.execute(select(*_stat_columns(params)).where(*conditions)).one())
+
+    by_status = dict(db.execute(
+        select(Grievance.status, func.count(Grievance.id)).where(*conditions).group_by(Grievance.status)
+    ).all())
+
+    departments = [
+        {"department": name or f"#{department_id}", **_stats(row)}
+        for department_id, name, row in (
+            (row.department_id, row.name, row) for row in db.execute(
+                select(Grievance.department_id, Department.name, *_stat_columns(params))
+                .outerjoin(Department, Grievance.department_id == Department.id)
+                .where(*conditions)
+                .group_by(Grievance.department_id, Department.name)
+                .order_by(Department.name)
+            )
+        )
+    ]
+
+    employees = [
+        {"employee": row.email or f"#{row.assigned_to}", **_stats(row)}
+        for row in db.execute(
+            select(Grievance.assigned_to, User.email, *_stat_columns(params))
+            .join(User, Grievance.assigned_to == User.id)
+            .where(*conditions)
+            .group_by(Grievance.assigned_to, User.email)
+            .order_by(User.email)
+        )
+    ]
+    return {
+        "summary": summary,
+        "by_status": {getattr(k, "value", k): v for k, v in by_status.items()},
+        "departments": departments,
+        "employees": employees,
+    }
+
+
+STAT_HEADERS = ["Total", "Open", "Resolved", "Closed", "SLA breaches", "Mean resolution (h)"]
+STAT_KEYS = ["total", "open", "resolved", "closed", "sla_breaches", "mean_resolution_hours"]
+DETAIL_HEADERS = ["Ticket", "Status", "Priority", "Department", "Assignee", "Created", "Resolved", "Content"]
+
+
+def _detail_rows(db: Session, params: dict):
+    assignee = aliased(User)
+    result = db.execute(
+        select(Grievance.ticket_id, Grievance.status, Grievance.priority, Department.name,
+               assignee.email, Grievance.created_at, Grievance.resolved_at, Grievance.grievance_content)
+        .outerjoin(Department, Grievance.department_id == Department.id)
+        .outerjoin(assignee, Grievance.assigned_to == assignee.id)
+        .where(*_conditions(params))
+        .order_by(Grievance.created_at, Grievance.id)
+        .execution_options(yield_per=DETAIL_BATCH_SIZE)
+    )
+    for row in result:
+        yield [getattr(v, "value", v) for v in row]
+
+
+def write_xlsx(path: Path, db: Session, params: dict, data: dict, progress: Callable[[int], None]):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Summary")
+    sheet.append(["Period", f"{params['start']} to {params['end']}"])
+    for header, key in zip(STAT_HEADERS, STAT_KEYS):
+        sheet.append([header, data["summary"][key]])
+    sheet.append([])
+    sheet.append(["Status", "Count"])
+    for name, count in sorted(data["by_status"].items()):
+        sheet.append([name, count])
+
+    for title, label, rows, key in (
+        ("Departments", "Department", data["departments"], "department"),
+        ("Employees", "Employee", data["employees"], "employee"),
+    ):
+        sheet = workbook.create_sheet(title)
+        sheet.append([label] + STAT_HEADERS)
+        for row in rows:
+            sheet.append([row[key]] + [row[k] for k in STAT_KEYS])
+    progress(60)
+
+    sheet = workbook.create_sheet("Grievances")
+    sheet.append(DETAIL_HEADERS)
+    for row in _detail_rows(db, params):
+        sheet.append(row)
+    progress(90)
+    workbook.save(path)
+
+
+def write_pdf(path: Path, db: Session, params: dict, data: dict, progress: Callable[[int], None]):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ])
+
+    def table(header: List[str], rows: List[list]) -> Table:
+        t = Table([header] + [["" if v is None else v for v in row] for row in rows], repeatRows=1)
+        t.setStyle(table_style)
+        return t
+
+    story = [
+        Paragraph("Grievance report", styles["Title"]),
+        Paragraph(f"Period: {params['start']} to {params['end']}", styles["Normal"]),
+        Spacer(1, 12),
+        table(["Metric", "Value"], [[h, data["summary"][k]] for h, k in zip(STAT_HEADERS, STAT_KEYS)]),
+        Spacer(1, 12),
+        table(["Status", "Count"], sorted(data["by_status"].items())),
+    ]
+    for title, label, rows, key in (
+        ("Departments", "Department", data["departments"], "department"),
+        ("Employees", "Employee", data["employees"], "employee"),
+    ):
+        if rows:
+            story += [
+                Spacer(1, 12),
+                Paragraph(title, styles["Heading2"]),
+                table([label] + STAT_HEADERS, [[row[key]] + [row[k] for k in STAT_KEYS] for row in rows]),
+            ]
+    progress(80)
+    SimpleDocTemplate(str(path), pagesize=landscape(A4)).build(story)
+
+
+WRITERS = {"xlsx": write_xlsx, "pdf": write_pdf}
+
+
+def run_report(job_id: int) -> Optional[str]:
+    """Generate one report job. Entry point of the worker process."""
+    with SessionLocal() as db:
+        job = db.get(models.ReportJob, job_id)
+        if job is None or job.status == "done":
+            return None
+        params = json.loads(job.params)
+
+        def progress(percent: int):
+            job.progress = percent
+            db.commit()
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        job.error = None
+        progress(5)
+        try:
+            data = gather(db, params)
+            progress(40)
+            REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+            path = REPORTS_DIR / f"report-{job.id}.{job.format}"
+            tmp = path.with_name(path.name + ".tmp")
+            WRITERS[job.format](tmp, db, params, data, progress)
+            os.replace(tmp, path)
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"[:500]
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return None
+
+        job.status = "done"
+        job.progress = 100
+        job.file_path = str(path)
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return job.file_path
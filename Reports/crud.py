@@ -0,0 +1,77 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from Grievances.models import Grievance, GrievanceStatusHistory
+from Workload.models import WorkloadCounter
+from . import models, schemas
+
+
+def canonical_params(request: schemas.ReportRequest, department_id: Optional[int]) -> Tuple[str, str]:
+    """The request as canonical JSON, and its hash for cache lookups."""
+    params = json.dumps({
+        "start": request.start.isoformat(),
+        "end": request.end.isoformat(),
+        "department_id": department_id,
+        "format": request.format.value,
+    }, sort_keys=True)
+    return params, hashlib.sha256(params.encode()).hexdigest()
+
+
+def data_version(db: Session) -> str:
+    """
+    Changes whenever grievance data a report reads may have changed: new
+    grievances, new history entries, or any move in the live workload counters.
+    """
+    max_grievance = db.execute(select(func.max(Grievance.id))).scalar() or 0
+    max_history = db.execute(select(func.max(GrievanceStatusHistory.id))).scalar() or 0
+    digest = hashlib.sha256()
+    for row in db.execute(
+        select(WorkloadCounter.scope, WorkloadCounter.scope_id, WorkloadCounter.open_count,
+               WorkloadCounter.in_progress_count, WorkloadCounter.solved_count)
+        .order_by(WorkloadCounter.scope, WorkloadCounter.scope_id)
+    ):
+        digest.update(repr(tuple(row)).encode())
+    return f"{max_grievance}.{max_history}.{digest.hexdigest()[:16]}"
+
+
+def find_reusable(db: Session, params_digest: str, version: str) -> Optional[models.ReportJob]:
+    """A finished or in-flight job for the same parameters over the same data."""
+    return (
+        db.query(models.ReportJob)
+        .filter(
+            models.ReportJob.params_hash == params_digest,
+            models.ReportJob.data_version == version,
+            models.ReportJob.status.in_(["queued", "running", "done"]),
+        )
+        .order_by(models.ReportJob.id.desc())
+        .first()
+    )
+
+
+def create_job(db: Session, user_id: int, department_id: Optional[int], params: str,
+               params_digest: str, version: str, fmt: str) -> models.ReportJob:
+    job = models.ReportJob(
+        requested_by=user_id,
+        department_id=department_id,
+        params=params,
+        params_hash=params_digest,
+        data_version=version,
+        format=fmt,
+        status="queued",
+        progress=0,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def mark_failed(db: Session, job_id: int, error: str):
+    job = db.get(models.ReportJob, job_id)
+    if job and job.status not in ("done", "failed"):
+        job.status = "failed"
+        job.error = error[:500]
+        job.finished_at = datetime.utcnow()
+        db.commit()
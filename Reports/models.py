@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.sql import func
+from database import Base
+
+
+class ReportJob(Base):
+    """
+    A requested department report and its generation progress.
+
+    Finished jobs double as the report cache: a request with the same
+    params_hash and data_version is answered with the existing file.
+    """
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    params = Column(Text, nullable=False)        # canonical JSON of the request
+    params_hash = Column(String, nullable=False)
+    data_version = Column(String, nullable=False)
+    format = Column(String, nullable=False)      # xlsx | pdf
+    status = Column(String, nullable=False, default="queued")  # queued | running | done | failed
+    progress = Column(Integer, nullable=False, default=0)      # percent
+    file_path = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_report_jobs_cache", "params_hash", "data_version", "status"),
+    )
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ConfigDict, ValidationInfo, field_validator
+from datetime import date, datetime
+from enum import Enum
+from typing import Optional
+
+
+class ReportFormat(str, Enum):
+    xlsx = "xlsx"
+    pdf = "pdf"
+
+
+class ReportRequest(BaseModel):
+    start: date
+    end: date
+    department_id: Optional[int] = None
+    format: ReportFormat = ReportFormat.xlsx
+
+    @field_validator("end")
+    @classmethod
+    def end_after_start(cls, v, info: ValidationInfo):
+        if "start" in info.data and v < info.data["start"]:
+            raise ValueError("end must not be before start")
+        return v
+
+
+class ReportJobOut(BaseModel):
+    id: int
+    department_id: Optional[int] = None
+    format: ReportFormat
+    status: str
+    progress: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    cached: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,51 @@
+"""
+Process pool that builds reports off the request path. Report jobs reach it
+through the "reports.generate" task of the job queue.
+
+Workers are spawned (not forked) so they start with their own database
+engine rather than inheriting the server's connections and threads.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from database import SessionLocal
+from . import builder, crud
+
+REPORT_WORKERS = 2
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=REPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _on_done(job_id: int, future: Future):
+    # run_report records its own failures; this catches a crashed worker process
+    if future.cancelled() or future.exception() is not None:
+        reason = "cancelled" if future.cancelled() else f"Worker failed: {future.exception()!r}"
+        with SessionLocal() as db:
+            crud.mark_failed(db, job_id, reason)
+
+
+def submit(job_id: int) -> Future:
+    future = _get_executor().submit(builder.run_report, job_id)
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return future
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
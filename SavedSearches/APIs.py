@@ -0,0 +1,83 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from database import get_db
+from dependencies import get_current_active_user
+from rate_limit import RateLimit
+import serialization
+from Comments import crud as comment_crud
+from Grievances import crud as grievance_crud, list_view
+from User.models import User
+from . import crud, schemas
+
+router = APIRouter(prefix="/saved-searches", tags=["Saved Searches"])
+
+
+def _get_owned(db: Session, search_id: int, current_user: User):
+    search = crud.get_saved_search(db, search_id, current_user.id)
+    if not search:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved search not found")
+    return search
+
+
+@router.post("", response_model=schemas.SavedSearchOut, status_code=status.HTTP_201_CREATED)
+def create_saved_search(
+    search: schemas.SavedSearchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Save a search. Every word of `q` must appear in the grievance content or
+    ticket id; the other fields filter like GET /grievances/search/. Only
+    grievances the owner can see are counted. match_count is computed now and
+    then kept current as grievances are created or change.
+    """
+    if crud.count_for_owner(db, current_user.id) >= crud.MAX_SAVED_SEARCHES_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"At most {crud.MAX_SAVED_SEARCHES_PER_USER} saved searches per user",
+        )
+    return crud.create_saved_search(db, current_user, search)
+
+
+@router.get("", response_model=List[schemas.SavedSearchOut])
+def list_saved_searches(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    return crud.list_saved_searches(db, current_user.id)
+
+
+@router.delete("/{search_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_saved_search(
+    search_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    crud.delete_saved_search(db, _get_owned(db, search_id, current_user))
+
+
+@router.get("/{search_id}/results", response_model=schemas.SavedSearchResults,
+            dependencies=[Depends(RateLimit("search"))])
+def saved_search_results(
+    search_id: int,
+    skip: int = 0,
+    limit: int = Query(100, le=200),
+    include_comment_stats: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Run a saved search, newest first. The page and total_count come from the
+    list view; match_count is left to the percolator and the recount job.
+    """
+    search = _get_owned(db, search_id, current_user)
+    ids, total = list_view.page_ids(db, crud.match_conditions(search, current_user), skip=skip, limit=limit)
+    grievances = grievance_crud.load_page(db, ids)
+    if include_comment_stats:
+        comment_crud.attach_comment_stats(db, grievances)
+    return serialization.respond(schemas.SavedSearchResults, {
+        "saved_search": search,
+        "total_count": total,
+        "data": grievances,
+    })
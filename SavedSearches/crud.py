@@ -0,0 +1,98 @@
+from typing import List, Optional
+from sqlalchemy import and_, func, literal, or_, select
+from sqlalchemy.orm import Session
+from Grievances import crud as grievance_crud, list_view
+from Grievances.models import Grievance
+from User.models import User
+from . import models, schemas
+from .percolator import WORD_CHARS, percolator, tokenize
+
+MAX_SAVED_SEARCHES_PER_USER = 50
+
+
+def _has_word(column, term: str):
+    """`term` (one tokenize() word) is a whole word of `column`, as tokenize() splits it."""
+    return (literal(" ") + func.lower(column) + literal(" ")).op("GLOB")(f"*[^{WORD_CHARS}]{term}[^{WORD_CHARS}]*")
+
+
+def match_conditions(search: models.SavedSearch, owner: User) -> List:
+    """
+    A saved search over the list view, with the same semantics as the
+    percolator: the owner's visibility, the filters, and every term as a
+    whole word of the content or ticket id.
+    """
+    V, G = list_view.V, Grievance
+    conditions = [
+        grievance_crud.visibility_condition(owner, V),
+        *list_view.filter_conditions(search.status, search.department_id, search.assigned_to,
+                                     search.created_after, search.created_before),
+    ]
+    if search.user_id is not None:
+        conditions.append(V.user_id == search.user_id)
+    terms = tokenize(search.q)
+    if terms:
+        conditions.append(V.grievance_id.in_(select(G.id).where(and_(*(
+            or_(_has_word(G.grievance_content, term), _has_word(G.ticket_id, term)) for term in sorted(terms)
+        )))))
+    return conditions
+
+
+def recount(db: Session, search: models.SavedSearch, owner: User) -> int:
+    """Recompute match_count from scratch."""
+    search.match_count = db.execute(
+        select(func.count()).select_from(list_view.V).where(and_(*match_conditions(search, owner)))
+    ).scalar()
+    return search.match_count
+
+
+def recount_all(db: Session):
+    """Correct drift, e.g. after an owner's role or department changed."""
+    for search, owner in db.execute(
+        select(models.SavedSearch, User).join(User, User.id == models.SavedSearch.owner_id)
+    ):
+        recount(db, search, owner)
+    db.commit()
+    percolator.invalidate()
+
+
+def count_for_owner(db: Session, owner_id: int) -> int:
+    return db.query(models.SavedSearch).filter(models.SavedSearch.owner_id == owner_id).count()
+
+
+def create_saved_search(db: Session, owner: User, search: schemas.SavedSearchCreate) -> models.SavedSearch:
+    db_search = models.SavedSearch(
+        owner_id=owner.id,
+        name=search.name,
+        q=search.q,
+        status=search.status.value if search.status else None,
+        department_id=search.department_id,
+        user_id=search.user_id,
+        assigned_to=search.assigned_to,
+        created_after=search.created_after,
+        created_before=search.created_before,
+    )
+    recount(db, db_search, owner)
+    db.add(db_search)
+    db.commit()
+    db.refresh(db_search)
+    percolator.invalidate()
+    return db_search
+
+
+def get_saved_search(db: Session, search_id: int, owner_id: int) -> Optional[models.SavedSearch]:
+    return db.query(models.SavedSearch).filter(
+        models.SavedSearch.id == search_id,
+        models.SavedSearch.owner_id == owner_id,
+    ).first()
+
+
+def list_saved_searches(db: Session, owner_id: int) -> List[models.SavedSearch]:
+    return db.query(models.SavedSearch).filter(
+        models.SavedSearch.owner_id == owner_id
+    ).order_by(models.SavedSearch.id).all()
+
+
+def delete_saved_search(db: Session, search: models.SavedSearch):
+    db.delete(search)
+    db.commit()
+    percolator.invalidate()
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+
+class SavedSearch(Base):
+    """
+    A stored grievance search. match_count is kept current as grievances are
+    created and change status, department or assignee (see percolator.py).
+    """
+    __tablename__ = "saved_searches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    q = Column(String, nullable=True)  # whitespace-separated terms, all required
+    status = Column(String, nullable=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_after = Column(DateTime, nullable=True)
+    created_before = Column(DateTime, nullable=True)
+    match_count = Column(Integer, nullable=False, default=0)
+    last_matched_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
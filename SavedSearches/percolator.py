@@ -0,0 +1,211 @@
+"""
+Incremental matching of saved searches against grievance changes.
+
+Saved searches are compiled into an in-process inverted index keyed on
+(department, status, term), with None standing for "any" when a search does
+not filter on that field. For a changed grievance only the buckets for its
+department, its status and the tokens of its content are visited, so the cost
+grows with the number of candidate searches rather than with the total number
+of saved searches.
+
+percolate() is called from Grievances.lifecycle.record_changes before the
+change commits: each search's match_count moves by +1/-1 as grievances enter
+or leave it, and its owner gets a "saved_search_match" event on the SSE
+stream. The index is rebuilt when this process creates or deletes a saved
+search, and at least every INDEX_TTL_SECONDS to pick up other processes'.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from Grievances.models import Grievance
+from User.models import User
+from roles import RoleEnum
+import events
+from . import models
+
+INDEX_TTL_SECONDS = 30
+CONTENT_CHUNK_SIZE = 500
+
+# ASCII word characters: SQLite's lower() and GLOB (SavedSearches/crud.py) see the same words
+WORD_CHARS = "a-z0-9_"
+_TOKEN_RE = re.compile(f"[{WORD_CHARS}]+")
+
+
+def tokenize(*texts: Optional[str]) -> FrozenSet[str]:
+    """Lower-cased words; a saved search matches when all of its terms are among them."""
+    return frozenset(token for text in texts if text for token in _TOKEN_RE.findall(text.lower()))
+
+
+class CompiledSearch(NamedTuple):
+    id: int
+    owner_id: int
+    owner_role: str
+    owner_department_id: Optional[int]
+    terms: FrozenSet[str]
+    status: Optional[str]
+    department_id: Optional[int]
+    user_id: Optional[int]
+    assigned_to: Optional[int]
+    created_after: Optional[datetime]
+    created_before: Optional[datetime]
+
+    def visible(self, state) -> bool:
+        """The owner's GET /grievances/ visibility (Grievances.crud.visibility_condition)."""
+        if self.owner_role == RoleEnum.super_admin.value:
+            return True
+        if self.owner_role == RoleEnum.admin.value:
+            return state.department_id == self.owner_department_id
+        if self.owner_role == RoleEnum.employee.value:
+            return (state.assigned_to == self.owner_id or state.user_id == self.owner_id
+                    or state.department_id == self.owner_department_id)
+        return state.user_id == self.owner_id
+
+    def matches(self, state, tokens: FrozenSet[str]) -> bool:
+        """Remaining filters; department and status were checked by the index lookup."""
+        if self.user_id is not None and state.user_id != self.user_id:
+            return False
+        if self.assigned_to is not None and state.assigned_to != self.assigned_to:
+            return False
+        if self.created_after and (state.created_at is None or state.created_at < self.created_after):
+            return False
+        if self.created_before and (state.created_at is None or state.created_at > self.created_before):
+            return False
+        return self.terms <= tokens and self.visible(state)
+
+
+def compile_search(search: models.SavedSearch, owner_role: str,
+                   owner_department_id: Optional[int]) -> CompiledSearch:
+    return CompiledSearch(
+        id=search.id,
+        owner_id=search.owner_id,
+        owner_role=owner_role.value if hasattr(owner_role, "value") else owner_role,
+        owner_department_id=owner_department_id,
+        terms=tokenize(search.q),
+        status=search.status,
+        department_id=search.department_id,
+        user_id=search.user_id,
+        assigned_to=search.assigned_to,
+        created_after=search.created_after,
+        created_before=search.created_before,
+    )
+
+
+class SearchIndex:
+    def __init__(self, searches: Iterable[CompiledSearch]):
+        self._buckets: Dict[Tuple[Optional[int], Optional[str], Optional[str]], List[CompiledSearch]] = {}
+        terms = set()
+        self.size = 0
+        for search in searches:
+            # Any one term works as the key; the longest tends to be the most selective
+            anchor = max(search.terms, key=len) if search.terms else None
+            if anchor:
+                terms.add(anchor)
+            self._buckets.setdefault((search.department_id, search.status, anchor), []).append(search)
+            self.size += 1
+        self._terms = frozenset(terms)
+
+    @property
+    def uses_terms(self) -> bool:
+        return bool(self._terms)
+
+    def match(self, state, tokens: FrozenSet[str]) -> List[CompiledSearch]:
+        """Saved searches that a grievance in `state` with content `tokens` belongs to."""
+        if state is None:
+            return []
+        keys = [None, *(tokens & self._terms)]
+        matched = []
+        for department_id in {state.department_id, None}:
+            for status in {state.status, None}:
+                for term in keys:
+                    for search in self._buckets.get((department_id, status, term), ()):
+                        if search.matches(state, tokens):
+                            matched.append(search)
+        return matched
+
+
+class Percolator:
+    def __init__(self):
+        self._index: Optional[SearchIndex] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def index(self, db: Session) -> SearchIndex:
+        with self._lock:
+            if self._index is not None and time.monotonic() - self._loaded_at < INDEX_TTL_SECONDS:
+                return self._index
+        rows = db.execute(
+            select(models.SavedSearch, User.role, User.department_id)
+            .join(User, User.id == models.SavedSearch.owner_id)
+        ).all()
+        index = SearchIndex(compile_search(search, role, department_id) for search, role, department_id in rows)
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+        return index
+
+
+percolator = Percolator()
+
+
+def _content_tokens(db: Session, grievance_ids: List[int]) -> Dict[int, FrozenSet[str]]:
+    tokens = {}
+    for i in range(0, len(grievance_ids), CONTENT_CHUNK_SIZE):
+        chunk = grievance_ids[i:i + CONTENT_CHUNK_SIZE]
+        for grievance_id, content, ticket_id in db.execute(
+            select(Grievance.id, Grievance.grievance_content, Grievance.ticket_id).where(Grievance.id.in_(chunk))
+        ):
+            tokens[grievance_id] = tokenize(content, ticket_id)
+    return tokens
+
+
+def percolate(db: Session, changes: Iterable):
+    """Move saved-search match counts for lifecycle changes; runs in the caller's transaction."""
+    index = percolator.index(db)
+    if not index.size:
+        return
+    changes = list(changes)
+    # Content does not change after creation, so before and after share the same tokens
+    tokens = _content_tokens(db, [c.grievance_id for c in changes]) if index.uses_terms else {}
+
+    deltas: Counter = Counter()
+    matched_searches = set()
+    for change in changes:
+        content = tokens.get(change.grievance_id, frozenset())
+        before = {s.id: s for s in index.match(change.before, content)}
+        after = {s.id: s for s in index.match(change.after, content)}
+        for search_id in after.keys() - before.keys():
+            deltas[search_id] += 1
+            matched_searches.add(search_id)
+            events.queue_user_event(db, "saved_search_match", [after[search_id].owner_id],
+                                    saved_search_id=search_id, grievance_id=change.grievance_id, matched=True)
+        for search_id in before.keys() - after.keys():
+            deltas[search_id] -= 1
+            events.queue_user_event(db, "saved_search_match", [before[search_id].owner_id],
+                                    saved_search_id=search_id, grievance_id=change.grievance_id, matched=False)
+
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    table = models.SavedSearch.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("search_id"))
+        .values(
+            match_count=table.c.match_count + bindparam("delta"),
+            last_matched_at=func.coalesce(bindparam("matched_at"), table.c.last_matched_at),
+        ),
+        [
+            {"search_id": search_id, "delta": delta,
+             "matched_at": now if search_id in matched_searches else None}
+            for search_id, delta in deltas.items()
+        ],
+    )
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Optional
+from datetime import datetime
+from Grievances.models import GrievanceStatus
+from Grievances.schemas import GrievanceOut
+
+
+class SavedSearchCreate(BaseModel):
+    name: str
+    q: Optional[str] = None
+    status: Optional[GrievanceStatus] = None
+    department_id: Optional[int] = None
+    user_id: Optional[int] = None
+    assigned_to: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @field_validator("name")
+    @classmethod
+    def name_not_blank(cls, v):
+        if not v.strip():
+            raise ValueError("name must not be blank")
+        return v.strip()
+
+    @field_validator("q")
+    @classmethod
+    def normalize_terms(cls, v):
+        terms = " ".join((v or "").split())
+        return terms or None
+
+
+class SavedSearchOut(SavedSearchCreate):
+    id: int
+    owner_id: int
+    status: Optional[str] = None
+    match_count: int
+    last_matched_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SavedSearchResults(BaseModel):
+    saved_search: SavedSearchOut
+    total_count: int
+    data: List[GrievanceOut]
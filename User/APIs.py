@@ -6,6 +6,8 @@ import traceback
 from datetime  import datetime
 from database import get_db
 from dependencies import get_current_active_user, RoleChecker
+from rate_limit import RateLimit
+import serialization
 from roles import RoleEnum as Role
 from Grievances import models as grievance_models
 from Grievances import schemas as grievance_schemas
@@ -183,12 +185,12 @@ def list_users(
     total = query.count()
     users = query.offset(skip).limit(limit).all()
 
-    return {
-        "items": [schemas.UserFull.from_orm(u) for u in users],
+    return serialization.respond(PaginatedResponse[UserFull], {
+        "items": users,
         "total": total,
         "limit": limit,
         "offset": skip
-    }
+    })
 
 @router.get("/{user_id}", response_model=Union[schemas.UserLimited, schemas.UserFull],
            operation_id="get_user")
@@ -202,14 +204,15 @@ def get_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     if current_user.id == user_id or current_user.role in [Role.admin, Role.employee, Role.super_admin]:
-        return schemas.UserFull.from_orm(user)
+        return schemas.UserFull.model_validate(user)
 
     if current_user.role == Role.user:
-        return schemas.UserLimited.from_orm(user)
+        return schemas.UserLimited.model_validate(user)
 
     raise HTTPException(status_code=403, detail="Not authorized")
 
-@router.get("/grievances/", response_model=List[grievance_schemas.GrievanceOut])
+@router.get("/grievances/", response_model=List[grievance_schemas.GrievanceOut],
+            dependencies=[Depends(RateLimit("search"))])
 def list_user_grievances(
         db: Session = Depends(get_db),
         current_user: models.User = Depends(get_current_active_user),
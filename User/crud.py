@@ -2,7 +2,11 @@ from sqlalchemy.orm import Session
 from . import models, schemas
 from Department.models import Department
 from passlib.context import CryptContext
-from typing import List , Optional
+from typing import List , Optional , Tuple
+from datetime import datetime, timedelta
+import hashlib
+import secrets
+import uuid
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(password: str) -> str:
@@ -59,4 +63,91 @@ def get_users(db: Session, role_filter: List[str] = None):
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
-   
\ No newline at end of file
+
+class RefreshTokenReuseError(Exception):
+    """Raised when an already rotated refresh token is presented again."""
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are long random strings, so a fast hash is enough here;
+    # bcrypt would reintroduce the cost the refresh flow exists to avoid.
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def create_refresh_token(db: Session, user_id: int, expires_delta: timedelta,
+                         family_id: Optional[str] = None) -> Tuple[str, models.RefreshToken]:
+    """
+    Issue a new refresh token for a user.
+
+    Returns the raw token (shown to the client once) and the stored record.
+    The caller is responsible for committing.
+    """
+    raw_token = secrets.token_urlsafe(48)
+    db_token = models.RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(raw_token),
+        family_id=family_id or str(uuid.uuid4()),
+        expires_at=datetime.utcnow() + expires_delta,
+    )
+    db.add(db_token)
+    db.flush()
+    return raw_token, db_token
+
+
+def revoke_refresh_token_family(db: Session, family_id: str) -> int:
+    return db.query(models.RefreshToken) \
+        .filter(models.RefreshToken.family_id == family_id) \
+        .filter(models.RefreshToken.revoked_at.is_(None)) \
+        .update({models.RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def rotate_refresh_token(db: Session, raw_token: str,
+                         expires_delta: timedelta) -> Optional[Tuple[int, str]]:
+    """
+    Exchange a refresh token for a new one.
+
+    Returns (user_id, new_raw_token), or None if the token is unknown or expired.
+    Raises RefreshTokenReuseError (after revoking the whole family) when a token
+    that was already rotated or revoked is presented again.
+    """
+    record = db.query(models.RefreshToken) \
+        .filter(models.RefreshToken.token_hash == hash_refresh_token(raw_token)) \
+        .first()
+    if not record:
+        return None
+
+    now = datetime.utcnow()
+    if record.revoked_at is None and record.expires_at <= now:
+        return None
+
+    # Conditional update so two concurrent refreshes cannot both succeed
+    claimed = 0
+    if record.revoked_at is None:
+        claimed = db.query(models.RefreshToken) \
+            .filter(models.RefreshToken.id == record.id) \
+            .filter(models.RefreshToken.revoked_at.is_(None)) \
+            .update({models.RefreshToken.revoked_at: now}, synchronize_session=False)
+
+    if not claimed:
+        revoke_refresh_token_family(db, record.family_id)
+        db.commit()
+        raise RefreshTokenReuseError()
+
+    new_raw, new_record = create_refresh_token(db, record.user_id, expires_delta, record.family_id)
+    db.query(models.RefreshToken) \
+        .filter(models.RefreshToken.id == record.id) \
+        .update({models.RefreshToken.replaced_by_id: new_record.id}, synchronize_session=False)
+    db.commit()
+    return record.user_id, new_raw
+
+
+def revoke_refresh_token(db: Session, raw_token: str) -> bool:
+    """Revoke the family of the given refresh token (logout)."""
+    record = db.query(models.RefreshToken) \
+        .filter(models.RefreshToken.token_hash == hash_refresh_token(raw_token)) \
+        .first()
+    if not record:
+        return False
+    revoke_refresh_token_family(db, record.family_id)
+    db.commit()
+    return True
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime
+from sqlalchemy.sql import func
 from database import Base
 from roles import RoleEnum
 
@@ -12,3 +13,23 @@ class User(Base):
     password = Column(String)
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
     role = Column(Enum(RoleEnum), default=RoleEnum.user)
+
+
+class RefreshToken(Base):
+    """
+    A single refresh token issued to a user.
+
+    Only the SHA-256 hash of the token is stored. Tokens issued from the same
+    login share a family_id, so when a rotated (revoked) token is presented
+    again the whole family can be revoked at once.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    family_id = Column(String(36), index=True, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by_id = Column(Integer, ForeignKey("refresh_tokens.id"), nullable=True)
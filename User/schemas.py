@@ -1,4 +1,4 @@
-from pydantic import BaseModel , Field
+from pydantic import BaseModel, Field, ConfigDict
 from pydantic.networks import EmailStr
 from typing import Optional, List, ForwardRef , Dict , Any , Literal
 from roles import RoleEnum
@@ -29,12 +29,7 @@ class UserLimited(UserBase):
     department_id: Optional[int] = None
     is_active: bool = True
 
-    class Config:
-        from_attributes = True  # This was called orm_mode in Pydantic v1
-        # For Pydantic v2 compatibility, also add:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserFull(BaseModel):
@@ -43,11 +38,7 @@ class UserFull(BaseModel):
     department_id: int
     role: RoleEnum
 
-    class Config:
-        orm_mode = True
-        allow_population_by_field_name = True
-        use_enum_values = True
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True, use_enum_values=True)
 
 
 class UserCreate(BaseModel):
@@ -63,12 +54,21 @@ class UserRoleUpdate(BaseModel):
     role: RoleEnum
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
 class DepartmentOut(BaseModel):
     id: int
     name: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserOut(BaseModel):
@@ -78,8 +78,7 @@ class UserOut(BaseModel):
     department_id: Optional[int] = None
     department: Optional[DepartmentOut] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserSortBy(str, Enum):
     name = "name"
@@ -111,8 +110,7 @@ class GrievanceOut(BaseModel):
     attachments: List[Dict[str, Any]] = []
     grievance_content: str  # Added this field
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 if __name__ != "__main__":
 
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db
+from dependencies import get_current_active_user, RoleChecker
+from roles import RoleEnum as Role
+from User.models import User
+from . import crud, schemas
+
+router = APIRouter(prefix="/workload", tags=["Workload"])
+
+role_admin = RoleChecker([Role.admin, Role.super_admin])
+
+
+def _counts(row) -> dict:
+    if row is None:
+        return {"open": 0, "in_progress": 0, "solved": 0}
+    return {"open": row.open_count, "in_progress": row.in_progress_count, "solved": row.solved_count}
+
+
+@router.get("", response_model=List[schemas.DepartmentWorkload])
+def get_workload(
+    department_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Current open / in-progress / solved counts per department and per employee,
+    read from the live counters table.
+
+    - Super admins see every department (or the one requested)
+    - Admins see their department
+    - Employees see their department total and their own counts
+    """
+    if current_user.role == Role.user:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+
+    if current_user.role != Role.super_admin:
+        department_id = current_user.department_id
+
+    departments = crud.get_counters(db, "department", [department_id] if department_id else None)
+    department_ids = [d.scope_id for d in departments]
+    if department_id and department_id not in department_ids:
+        department_ids.append(department_id)
+
+    employees_query = db.query(User.id, User.email, User.department_id) \
+        .filter(User.role == Role.employee) \
+        .filter(User.department_id.in_(department_ids))
+    if current_user.role == Role.employee:
+        employees_query = employees_query.filter(User.id == current_user.id)
+    employees = employees_query.all()
+    employee_rows = {row.scope_id: row for row in crud.get_counters(db, "employee", [e.id for e in employees])}
+    department_rows = {row.scope_id: row for row in departments}
+
+    return [
+        {
+            "department_id": dept_id,
+            **_counts(department_rows.get(dept_id)),
+            "employees": [
+                {"user_id": e.id, "email": e.email, **_counts(employee_rows.get(e.id))}
+                for e in employees if e.department_id == dept_id
+            ],
+        }
+        for dept_id in department_ids
+    ]
+
+
+@router.post("/reconcile", response_model=schemas.ReconcileResult)
+def reconcile_workload(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(role_admin),
+):
+    """Rebuild the counters from the grievances table and report how many had drifted."""
+    rows, corrected = crud.reconcile(db)
+    return {"rows": rows, "corrected": corrected}
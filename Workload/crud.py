@@ -0,0 +1,122 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from . import models
+
+# Grievance status -> counter column; statuses not listed (closed) are not counted
+STATUS_BUCKETS = {
+    "pending": "open_count",
+    "in_progress": "in_progress_count",
+    "solved": "solved_count",
+    "not_solved": "solved_count",
+}
+BUCKET_COLUMNS = ("open_count", "in_progress_count", "solved_count")
+
+
+def _keys(state) -> List[Tuple[str, int, str]]:
+    if state is None:
+        return []
+    bucket = STATUS_BUCKETS.get(state.status)
+    if bucket is None:
+        return []
+    keys = []
+    if state.department_id is not None:
+        keys.append(("department", state.department_id, bucket))
+    if state.assigned_to is not None:
+        keys.append(("employee", state.assigned_to, bucket))
+    return keys
+
+
+def apply_changes(db: Session, changes: Iterable) -> None:
+    """Apply the counter deltas of lifecycle changes in one upsert."""
+    deltas: Counter = Counter()
+    for change in changes:
+        for key in _keys(change.before):
+            deltas[key] -= 1
+        for key in _keys(change.after):
+            deltas[key] += 1
+
+    rows: Dict[Tuple[str, int], Dict[str, int]] = {}
+    for (scope, scope_id, bucket), delta in deltas.items():
+        if delta:
+            row = rows.setdefault((scope, scope_id), {
+                "scope": scope, "scope_id": scope_id,
+                "open_count": 0, "in_progress_count": 0, "solved_count": 0,
+            })
+            row[bucket] += delta
+    if not rows:
+        return
+
+    stmt = sqlite_insert(models.WorkloadCounter).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope", "scope_id"],
+        set_={
+            column: getattr(models.WorkloadCounter, column) + getattr(stmt.excluded, column)
+            for column in BUCKET_COLUMNS
+        } | {"updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def _expected_counts(db: Session) -> Dict[Tuple[str, int], Dict[str, int]]:
+    # Imported here to avoid a circular import with the Grievances package
+    from Grievances.models import Grievance
+
+    expected: Dict[Tuple[str, int], Dict[str, int]] = {}
+    for scope, column in (("department", Grievance.department_id), ("employee", Grievance.assigned_to)):
+        rows = db.execute(
+            select(column, Grievance.status, func.count())
+            .where(column.is_not(None))
+            .group_by(column, Grievance.status)
+        ).all()
+        for scope_id, status, count in rows:
+            bucket = STATUS_BUCKETS.get(status.value if hasattr(status, "value") else status)
+            if bucket is None:
+                continue
+            row = expected.setdefault((scope, scope_id), {c: 0 for c in BUCKET_COLUMNS})
+            row[bucket] += count
+    return expected
+
+
+def reconcile(db: Session) -> Tuple[int, int]:
+    """
+    Rebuild the counters from the grievances table.
+
+    Returns (number of counter rows, number of rows that had drifted).
+    """
+    expected = _expected_counts(db)
+    current = {
+        (row.scope, row.scope_id): {c: getattr(row, c) for c in BUCKET_COLUMNS}
+        for row in db.query(models.WorkloadCounter).all()
+    }
+    zero = {c: 0 for c in BUCKET_COLUMNS}
+    corrected = sum(
+        1 for key in expected.keys() | current.keys()
+        if expected.get(key, zero) != current.get(key, zero)
+    )
+
+    db.execute(delete(models.WorkloadCounter))
+    if expected:
+        db.execute(insert(models.WorkloadCounter), [
+            {"scope": scope, "scope_id": scope_id, **counts}
+            for (scope, scope_id), counts in expected.items()
+        ])
+    db.commit()
+    return len(expected), corrected
+
+
+def get_counters(db: Session, scope: str, scope_ids: Optional[List[int]] = None) -> List[models.WorkloadCounter]:
+    query = db.query(models.WorkloadCounter).filter(models.WorkloadCounter.scope == scope)
+    if scope_ids is not None:
+        query = query.filter(models.WorkloadCounter.scope_id.in_(scope_ids))
+    return query.all()
+
+
+def employee_loads(db: Session, employee_ids: List[int]) -> Dict[int, int]:
+    """Open plus in-progress grievances per employee."""
+    return {
+        row.scope_id: row.open_count + row.in_progress_count
+        for row in get_counters(db, "employee", employee_ids)
+    }
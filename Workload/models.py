@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+
+class WorkloadCounter(Base):
+    """
+    Live grievance counts for one employee or one department.
+
+    Kept up to date in the same transaction as every grievance create, assign,
+    transfer and resolve; `reconcile` rebuilds it from the grievances table.
+    """
+    __tablename__ = "workload_counters"
+
+    scope = Column(String, primary_key=True)  # "employee" or "department"
+    scope_id = Column(Integer, primary_key=True)
+    open_count = Column(Integer, nullable=False, default=0)
+    in_progress_count = Column(Integer, nullable=False, default=0)
+    solved_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class WorkloadCounts(BaseModel):
+    open: int = 0
+    in_progress: int = 0
+    solved: int = 0
+
+
+class EmployeeWorkload(WorkloadCounts):
+    user_id: int
+    email: Optional[str] = None
+
+
+class DepartmentWorkload(WorkloadCounts):
+    department_id: int
+    employees: List[EmployeeWorkload] = []
+
+
+class ReconcileResult(BaseModel):
+    rows: int
+    corrected: int
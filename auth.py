@@ -4,7 +4,8 @@ from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from database import get_db
 from User import crud, schemas
-from dependencies import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from dependencies import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from rate_limit import RateLimit
 
 
 router = APIRouter(tags=["Authentication"])
@@ -16,7 +17,13 @@ def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     return crud.create_user(db, user_in)
 
-@router.post("/login", summary="Login and get JWT")
+def _token_claims(user) -> dict:
+    # The role claim lets admission control classify callers without a DB lookup
+    role = user.role.value if hasattr(user.role, "value") else user.role
+    return {"sub": str(user.id), "role": role}
+
+@router.post("/login", summary="Login and get JWT", response_model=schemas.TokenPair,
+             dependencies=[Depends(RateLimit("login"))])
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = crud.authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -27,7 +34,52 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=_token_claims(user),
         expires_delta=access_token_expires,
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token, _ = crud.create_refresh_token(
+        db, user.id, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    db.commit()
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/refresh", summary="Exchange a refresh token for a new token pair",
+             response_model=schemas.TokenPair, dependencies=[Depends(RateLimit("login"))])
+def refresh(body: schemas.RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Rotate a refresh token. The presented token is revoked and a new access and
+    refresh token are returned. Presenting an already rotated token revokes
+    every token issued from the same login.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        rotated = crud.rotate_refresh_token(
+            db, body.refresh_token, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+    except crud.RefreshTokenReuseError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token reuse detected; all sessions for this login were revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not rotated:
+        raise invalid
+
+    user_id, refresh_token = rotated
+    user = crud.get_user(db, user_id)
+    if not user:
+        raise invalid
+    access_token = create_access_token(
+        data=_token_claims(user),
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: schemas.RefreshTokenRequest, db: Session = Depends(get_db)):
+    crud.revoke_refresh_token(db, body.refresh_token)
+    return
@@ -0,0 +1,149 @@
+"""
+Compare the two ways of loading a page of grievances for GrievanceOut:
+
+  orm   Query(Grievance) with selectinload(attachments); the response model
+        reads every attribute through from_attributes
+  core  Grievances.crud.load_page: two Core selects returning row mappings
+
+Both build the same GrievanceOut list from the same ids. The benchmark runs on
+a throwaway SQLite database, never on grievance.db.
+
+    python -m benchmarks.list_read_path --rows 20000 --page-size 200 --repeat 50
+"""
+import argparse
+import gc
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, noload, selectinload, sessionmaker
+from database import Base
+from Comments import models as comment_models  # noqa: F401  (creates the comments table)
+from Department.models import Department
+from Grievances import crud, models, schemas
+from User.models import User
+
+
+def seed(db: Session, rows: int, seed_value: int = 7):
+    rng = random.Random(seed_value)
+    db.execute(insert(Department), [{"id": i, "name": f"Department {i}"} for i in range(1, 11)])
+    db.execute(insert(User), [
+        {"id": i, "email": f"user{i}@example.com", "name": f"User {i}", "password": "x",
+         "role": "user", "department_id": 1 + i % 10}
+        for i in range(1, 201)
+    ])
+    start = datetime(2024, 1, 1)
+    db.execute(insert(models.Grievance), [
+        {
+            "id": i, "ticket_id": f"TKT-{i:08d}", "user_id": rng.randint(1, 200),
+            "department_id": rng.randint(1, 10), "grievance_content": " ".join(
+                rng.choice(("wifi", "water", "fees", "hostel", "exam", "library", "delay", "broken"))
+                for _ in range(40)),
+            "assigned_to": rng.choice((None, rng.randint(1, 200))),
+            "status": rng.choice(list(models.GrievanceStatus)).name,
+            "priority": rng.randint(0, 3),
+            "created_at": start + timedelta(minutes=i), "updated_at": start + timedelta(minutes=i + 5),
+        }
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(models.GrievanceAttachment), [
+        {"grievance_id": g, "file_path": f"uploads/{g}-{n}.pdf", "file_name": f"{g}-{n}.pdf",
+         "file_type": "application/pdf", "file_size": 1000 + n, "uploaded_at": start + timedelta(minutes=g)}
+        for g in range(1, rows + 1) for n in range(rng.randint(0, 3))
+    ])
+    db.commit()
+
+
+def orm_page(db: Session, ids: List[int]) -> List[schemas.GrievanceOut]:
+    G = models.Grievance
+    found = {
+        g.id: g for g in db.query(G)
+        .options(selectinload(G.attachments), noload(G.status_history))
+        .filter(G.id.in_(ids))
+    }
+    return [schemas.GrievanceOut.model_validate(found[i]) for i in ids if i in found]
+
+
+def core_page(db: Session, ids: List[int]) -> List[schemas.GrievanceOut]:
+    return [schemas.GrievanceOut.model_validate(row) for row in crud.load_page(db, ids)]
+
+
+def measure(factory: Callable[[], Session], loader: Callable, pages: List[List[int]]) -> dict:
+    latencies = []
+    for ids in pages:
+        with factory() as db:
+            started = time.perf_counter()
+            loader(db, ids)
+            latencies.append(time.perf_counter() - started)
+
+    # Memory on a separate pass: tracemalloc distorts timings
+    peaks, blocks = [], []
+    for ids in pages[:10]:
+        with factory() as db:
+            gc.collect()
+            tracemalloc.start()
+            result = loader(db, ids)
+            snapshot = tracemalloc.take_snapshot()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            blocks.append(sum(stat.count for stat in snapshot.statistics("filename")))
+            del result
+    latencies.sort()
+    return {
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "peak_kib": statistics.median(peaks) / 1024,
+        "live_blocks": int(statistics.median(blocks)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ORM vs Core read path for grievance list pages")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine)
+        with factory() as db:
+            seed(db, args.rows)
+
+        rng = random.Random(11)
+        pages = []
+        for _ in range(args.repeat):
+            first = rng.randint(1, max(1, args.rows - args.page_size))
+            pages.append(list(range(first, first + args.page_size)))
+
+        with factory() as db:
+            orm_out = [g.model_dump() for g in orm_page(db, pages[0])]
+        with factory() as db:
+            core_out = [g.model_dump() for g in core_page(db, pages[0])]
+        assert orm_out == core_out, "ORM and Core paths disagree"
+
+        # Warm-up, then measure
+        for loader in (orm_page, core_page):
+            with factory() as db:
+                loader(db, pages[0])
+        results = {name: measure(factory, loader, pages)
+                   for name, loader in (("orm", orm_page), ("core", core_page))}
+        engine.dispose()
+
+    print(f"{args.rows} grievances, pages of {args.page_size}, {args.repeat} pages per path")
+    print(f"{'path':<6}{'median ms':>12}{'p95 ms':>10}{'peak KiB':>12}{'live blocks':>14}")
+    for name, r in results.items():
+        print(f"{name:<6}{r['median_ms']:>12.2f}{r['p95_ms']:>10.2f}{r['peak_kib']:>12.0f}{r['live_blocks']:>14}")
+    orm, core = results["orm"], results["core"]
+    print(f"core/orm: latency {core['median_ms'] / orm['median_ms']:.2f}x, "
+          f"peak memory {core['peak_kib'] / orm['peak_kib']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
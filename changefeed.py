@@ -0,0 +1,245 @@
+"""
+Change feed for client-side sync of grievances, attachments and comments.
+
+Every insert, update and delete of those rows takes the next value of a single
+database-wide sequence (change_sequence) and stores it in the row's change_seq
+column; deletes leave a row in change_tombstones instead. A grievance that is
+transferred or reassigned away from someone (a visibility column loses its
+value) also leaves a tombstone with the old values, numbered just before the
+row, so callers who can no longer see it are told to drop it; callers who
+still can get the tombstone and then the row. ORM writes are stamped by a
+before_flush listener. Code that writes with Core UPDATE statements calls
+stamp() for the rows it touched.
+
+The sequence is advanced with an UPDATE inside the writing transaction, which
+holds SQLite's write lock until commit, so sequence order is commit order and
+a reader that has seen seq N will never later find a committed row below N.
+"""
+import heapq
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Mapping, Optional
+from sqlalchemy import Column, DateTime, Integer, String, bindparam, event, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from database import Base, SessionLocal
+from Comments.models import Comment
+from Grievances.models import Grievance, GrievanceAttachment
+
+FEED_MAX_LIMIT = 1000
+
+
+class ChangeSequence(Base):
+    __tablename__ = "change_sequence"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class ChangeTombstone(Base):
+    """
+    A deleted row, or a grievance moved out of someone's visibility, with the
+    owning grievance's visibility columns before the change.
+    """
+    __tablename__ = "change_tombstones"
+
+    change_seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    grievance_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    department_id = Column(Integer, nullable=True)
+    assigned_to = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, nullable=False)
+
+
+ENTITIES = {
+    Grievance: "grievance",
+    GrievanceAttachment: "attachment",
+    Comment: "comment",
+}
+
+
+def allocate(db: Session, count: int = 1) -> int:
+    """Reserve `count` consecutive sequence values; returns the first."""
+    S = ChangeSequence
+    bump = update(S).where(S.name == "global").values(value=S.value + count).returning(S.value)
+    last = db.execute(bump).scalar()
+    if last is None:
+        db.execute(sqlite_insert(S).values(name="global", value=0).on_conflict_do_nothing())
+        last = db.execute(bump).scalar()
+    return last - count + 1
+
+
+# Grievance columns that decide who sees it (Grievances.crud.visibility_condition)
+VISIBILITY_COLUMNS = ("user_id", "department_id", "assigned_to")
+
+
+def loses_visibility(before: Mapping, after: Mapping) -> bool:
+    """Whether a change from `before` to `after` takes a grievance away from anyone who saw it."""
+    return any(
+        before[column] is not None and column in after and after[column] != before[column]
+        for column in VISIBILITY_COLUMNS
+    )
+
+
+def _tombstone(seq: int, entity: str, entity_id: int, grievance_id: Optional[int],
+               visibility: Optional[Mapping], now: datetime) -> ChangeTombstone:
+    visibility = visibility or {}
+    return ChangeTombstone(
+        change_seq=seq,
+        entity=entity,
+        entity_id=entity_id,
+        grievance_id=grievance_id,
+        user_id=visibility.get("user_id"),
+        department_id=visibility.get("department_id"),
+        assigned_to=visibility.get("assigned_to"),
+        deleted_at=now,
+    )
+
+
+def stamp(db: Session, model, ids: Iterable[int], now: Optional[datetime] = None, moved: Iterable = ()):
+    """
+    Give rows changed by a Core UPDATE new sequence values (one per row, in id
+    order). `moved` are the grievances among them that lost visibility (see
+    loses_visibility), as rows with their columns before the update.
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    now = now or datetime.utcnow()
+    moved = list(moved)
+    seq = allocate(db, len(moved) + len(ids))
+    for row in moved:
+        db.add(_tombstone(seq, "grievance", row.id, row.id,
+                          {column: getattr(row, column) for column in VISIBILITY_COLUMNS}, now))
+        seq += 1
+    values = {"change_seq": bindparam("seq")}
+    if model is Grievance:
+        values["updated_at"] = now
+    db.execute(
+        update(model.__table__).where(model.__table__.c.id == bindparam("row_id")).values(**values),
+        [{"row_id": row_id, "seq": seq + i} for i, row_id in enumerate(ids)],
+    )
+
+
+def _owning_grievance(obj) -> Optional[Grievance]:
+    return obj if isinstance(obj, Grievance) else getattr(obj, "grievance", None)
+
+
+def _visibility_before(obj: Grievance) -> Optional[Dict[str, Optional[int]]]:
+    """Visibility columns of a changed grievance before this flush, if it lost visibility."""
+    attrs = inspect(obj).attrs
+    before, after = {}, {}
+    for column in VISIBILITY_COLUMNS:
+        history = attrs[column].history
+        after[column] = getattr(obj, column)
+        before[column] = history.deleted[0] if history.deleted else after[column]
+    return before if loses_visibility(before, after) else None
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _stamp_before_flush(session: Session, flush_context, instances):
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if type(obj) in ENTITIES and (obj in session.new or session.is_modified(obj, include_collections=False))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in ENTITIES]
+    if not changed and not deleted:
+        return
+    moved = []
+    for obj in changed:
+        if isinstance(obj, Grievance) and obj not in session.new:
+            before = _visibility_before(obj)
+            if before is not None:
+                moved.append((obj, before))
+
+    now = datetime.utcnow()
+    seq = allocate(session, len(moved) + len(changed) + len(deleted))
+    # Numbered before the rows, so callers who still see a grievance get it back
+    for obj, before in moved:
+        session.add(_tombstone(seq, "grievance", obj.id, obj.id, before, now))
+        seq += 1
+    for obj in changed:
+        obj.change_seq = seq
+        if isinstance(obj, Grievance):
+            obj.updated_at = now
+        seq += 1
+    for obj in deleted:
+        grievance = _owning_grievance(obj)
+        visibility = None
+        if grievance is not None:
+            visibility = {column: getattr(grievance, column) for column in VISIBILITY_COLUMNS}
+        grievance_id = grievance.id if grievance is not None else getattr(obj, "grievance_id", None)
+        session.add(_tombstone(seq, ENTITIES[type(obj)], obj.id, grievance_id, visibility, now))
+        seq += 1
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+GRIEVANCE_FIELDS = ("id", "ticket_id", "user_id", "department_id", "assigned_to", "status", "priority",
+                    "duplicate_of_id", "created_at", "updated_at", "resolved_at", "resolved_by")
+ATTACHMENT_FIELDS = ("id", "grievance_id", "file_name", "file_type", "file_size", "uploaded_at")
+COMMENT_FIELDS = ("id", "grievance_id", "user_id", "content", "timestamp")
+
+
+def read_changes(db: Session, visibility: Callable, since: int, limit: int) -> Dict[str, object]:
+    """
+    Changes after `since`, oldest first. visibility(target) must return the
+    caller's visibility condition over a table with user_id, department_id and
+    assigned_to columns (see Grievances.crud.visibility_condition).
+
+    Each table is read by its change_seq index, at most limit + 1 rows each,
+    and the streams are merged, so the cost does not depend on history size.
+    """
+    G = Grievance
+    sources = []
+
+    grievance_rows = db.execute(
+        select(*(getattr(G, f) for f in GRIEVANCE_FIELDS), G.change_seq)
+        .where(G.change_seq > since, visibility(G))
+        .order_by(G.change_seq)
+        .limit(limit + 1)
+    ).all()
+    sources.append([
+        (row.change_seq, "grievance", row.id, {f: _value(getattr(row, f)) for f in GRIEVANCE_FIELDS})
+        for row in grievance_rows
+    ])
+
+    for model, entity, fields in ((GrievanceAttachment, "attachment", ATTACHMENT_FIELDS),
+                                  (Comment, "comment", COMMENT_FIELDS)):
+        rows = db.execute(
+            select(*(getattr(model, f) for f in fields), model.change_seq)
+            .join(G, model.grievance_id == G.id)
+            .where(model.change_seq > since, visibility(G))
+            .order_by(model.change_seq)
+            .limit(limit + 1)
+        ).all()
+        sources.append([
+            (row.change_seq, entity, row.id, {f: _value(getattr(row, f)) for f in fields})
+            for row in rows
+        ])
+
+    # Tombstones carry the grievance's visibility columns from before the deletion or move
+    T = ChangeTombstone
+    tombstones = db.execute(
+        select(T.change_seq, T.entity, T.entity_id)
+        .where(T.change_seq > since, visibility(T))
+        .order_by(T.change_seq)
+        .limit(limit + 1)
+    ).all()
+    sources.append([(t.change_seq, t.entity, t.entity_id, None) for t in tombstones])
+
+    merged = list(heapq.merge(*sources, key=lambda entry: entry[0]))
+    page = merged[:limit]
+    return {
+        "changes": [
+            {"seq": seq, "entity": entity, "id": entity_id, "deleted": data is None, "data": data}
+            for seq, entity, entity_id, data in page
+        ],
+        "next_cursor": page[-1][0] if page else since,
+        "has_more": len(merged) > limit,
+    }
@@ -0,0 +1,266 @@
+"""
+Response content negotiation: MessagePack bodies and gzip/brotli compression.
+
+- Accept: a client that ranks application/msgpack at least as high as
+  application/json gets complete JSON responses re-encoded as MessagePack.
+  Streamed JSON is left as JSON.
+- Accept-Encoding: responses of a compressible type are compressed with br
+  (when the optional brotli package is installed) or gzip, whichever the
+  client ranks higher. Complete bodies are compressed only from
+  MIN_COMPRESS_SIZE bytes; streamed bodies are always compressed, one chunk
+  at a time with a flush after each, so clients still receive every chunk
+  as soon as it is produced.
+
+Responses that already carry a Content-Encoding are never touched. The
+Server-Sent Events stream is exempt: each of its long-lived connections
+would keep a compressor's window in memory, and its small events barely
+compress.
+
+Bytes saved and CPU seconds spent encoding are counted per route and
+encoding at GET /metrics.
+"""
+import time
+import zlib
+from typing import List, Optional, Tuple
+import msgpack
+import orjson
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+# Complete bodies at least this large are encoded in a worker thread so the
+# event loop keeps serving other requests meanwhile
+THREADPOOL_MIN_SIZE = 256 * 1024
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/msgpack", "application/javascript",
+    "application/xml", "image/svg+xml",
+)
+EXEMPT_PATHS = {"/events/stream"}
+
+encoding_bytes_saved = Counter(
+    "response_encoding_bytes_saved_total",
+    "Response bytes saved by compression or MessagePack, by route",
+    ("route", "encoding"),
+)
+encoding_cpu_seconds = Counter(
+    "response_encoding_cpu_seconds_total",
+    "CPU time spent compressing or re-encoding responses, by route",
+    ("route", "encoding"),
+)
+encoded_responses = Counter(
+    "response_encoding_total",
+    "Responses compressed or re-encoded, by route",
+    ("route", "encoding"),
+)
+
+
+def _qualities(header: str) -> List[Tuple[str, float]]:
+    """[(token, q)] of an Accept or Accept-Encoding header, in header order."""
+    result = []
+    for part in header.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result.append((token.lower(), q))
+    return result
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The best supported content coding the client accepts, or None for identity."""
+    qualities = _qualities(accept_encoding)
+    explicit = dict(qualities)
+    wildcard = explicit.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available_encodings():  # preference order on ties
+        q = explicit.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def wants_msgpack(accept: str) -> bool:
+    qualities = dict(_qualities(accept))
+    msgpack_q = max(qualities.get(alias, 0.0) for alias in MSGPACK_ALIASES)
+    json_q = qualities.get("application/json", qualities.get("application/*", qualities.get("*/*", 0.0)))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def _media_type(content_type: str) -> str:
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = _media_type(content_type)
+    return media_type != "text/event-stream" and media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.finish() if last else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return _StreamCompressor(encoding).chunk(body, last=True)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _record(scope, encoding: str, saved: int, cpu_seconds: float):
+    route = _route_label(scope)
+    encoded_responses.inc(route=route, encoding=encoding)
+    encoding_bytes_saved.inc(saved, route=route, encoding=encoding)
+    encoding_cpu_seconds.inc(cpu_seconds, route=route, encoding=encoding)
+
+
+def _encode_body(scope, body: bytes, to_msgpack: bool, encoding: Optional[str]) -> bytes:
+    """Re-encode and/or compress a complete body, recording the metrics of each step."""
+    if to_msgpack:
+        started = time.thread_time()
+        packed = msgpack.packb(orjson.loads(body))
+        _record(scope, "msgpack", len(body) - len(packed), time.thread_time() - started)
+        body = packed
+    if encoding is not None:
+        started = time.thread_time()
+        compressed = compress(body, encoding)
+        _record(scope, encoding, len(body) - len(compressed), time.thread_time() - started)
+        body = compressed
+    return body
+
+
+class _NegotiatedSend:
+    """Wraps `send` for one request; holds back the response start until the first body chunk."""
+
+    def __init__(self, scope, send, encoding: Optional[str], to_msgpack: bool, minimum_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.to_msgpack = to_msgpack
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor: Optional[_StreamCompressor] = None
+        self.passthrough = False
+        self.bytes_in = self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, message):
+        if self.passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+            await self._send(message)
+        elif message["type"] == "http.response.start":
+            self.start = message
+        elif self.compressor is not None:
+            await self._send_chunk(message)
+        else:
+            await self._first_body(message)
+
+    async def _first_body(self, message):
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        streaming = message.get("more_body", False)
+        content_type = headers.get("content-type", "")
+        untouchable = "content-encoding" in headers or start["status"] in (204, 304)
+
+        to_msgpack = (self.to_msgpack and not streaming and not untouchable
+                      and _media_type(content_type) == "application/json")
+        if to_msgpack:
+            content_type = MSGPACK_MEDIA_TYPE
+        encoding = self.encoding
+        if untouchable or not _compressible(content_type) or (not streaming and len(body) < self.minimum_size):
+            encoding = None
+
+        if _media_type(content_type) == "application/json" or to_msgpack:
+            headers.add_vary_header("Accept")
+        if _compressible(content_type):
+            headers.add_vary_header("Accept-Encoding")
+
+        if streaming and encoding is not None:
+            del headers["content-length"]
+            headers["content-encoding"] = encoding
+            self.compressor = _StreamCompressor(encoding)
+            await self._send({**start, "headers": headers.raw})
+            await self._send_chunk(message)
+            return
+
+        if to_msgpack or encoding is not None:
+            if len(body) >= THREADPOOL_MIN_SIZE:
+                body = await run_in_threadpool(_encode_body, self.scope, body, to_msgpack, encoding)
+            else:
+                body = _encode_body(self.scope, body, to_msgpack, encoding)
+            headers["content-type"] = content_type
+            headers["content-length"] = str(len(body))
+            if encoding is not None:
+                headers["content-encoding"] = encoding
+            message = {**message, "body": body}
+        else:
+            self.passthrough = True
+        await self._send({**start, "headers": headers.raw})
+        await self._send(message)
+
+    async def _send_chunk(self, message):
+        data = message.get("body", b"")
+        last = not message.get("more_body", False)
+        started = time.thread_time()
+        compressed = self.compressor.chunk(data, last)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        if last:
+            _record(self.scope, self.encoding, self.bytes_in - self.bytes_out, self.cpu_seconds)
+        await self._send({**message, "body": compressed})
+
+
+class ContentNegotiationMiddleware:
+    def __init__(self, app, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        to_msgpack = wants_msgpack(headers.get("accept", ""))
+        if encoding is None and not to_msgpack:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _NegotiatedSend(scope, send, encoding, to_msgpack, self.minimum_size))
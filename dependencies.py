@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+REFRESH_TOKEN_EXPIRE_DAYS = 14
 
 oauth2_scheme = HTTPBearer()
 
@@ -20,6 +21,10 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def decode_access_token(token: str) -> dict:
+    """Verify and decode an access token. Raises JWTError if it is invalid."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 # Secret key and algorithm for JWT decoding (replace with your own secure key)
 
 
@@ -35,7 +40,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(oauth2_
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id_raw = payload.get("sub")
         if user_id_raw is None or not str(user_id_raw).isdigit():
             raise credentials_exception
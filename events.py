@@ -0,0 +1,290 @@
+"""
+In-process pub/sub for grievance events, streamed to clients over Server-Sent Events.
+
+Code that changes grievances queues events on its SQLAlchemy session
+(queue_event); they are published only after that session commits, so
+subscribers never see changes that were rolled back. Each subscriber only
+receives events for grievances it could list via GET /grievances/.
+
+The broker keeps the last RING_SIZE events so a reconnecting client can resume
+from its Last-Event-ID. Event ids carry a per-process boot id; a client whose
+id is from another process, or too old for the ring, gets a "reset" event
+and should refetch its list.
+
+Idle connections hold no database session or worker thread: a subscriber is
+an asyncio queue plus the streaming task.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import FrozenSet, List, Optional, Set
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from jose import JWTError
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from dependencies import decode_access_token
+from metrics import Counter, Gauge
+from roles import RoleEnum
+
+RING_SIZE = 10_000
+SUBSCRIBER_QUEUE_SIZE = 1_000
+HEARTBEAT_SECONDS = 15.0
+RETRY_MILLISECONDS = 3_000
+STREAM_PATH = "/events/stream"
+
+sse_subscribers = Gauge("sse_subscribers", "Open Server-Sent Events streams")
+sse_dropped = Counter("sse_dropped_subscribers_total", "Streams closed because the client fell behind")
+
+_PENDING_KEY = "pending_events"
+
+
+@dataclass(frozen=True)
+class GrievanceEvent:
+    type: str
+    data: dict
+    # Visibility: who may see this event (any before/after value matches)
+    user_ids: FrozenSet[int] = frozenset()
+    department_ids: FrozenSet[int] = frozenset()
+    assignee_ids: FrozenSet[int] = frozenset()
+    # When set, only these users receive the event, whatever their role
+    recipient_ids: FrozenSet[int] = frozenset()
+    id: str = ""
+
+
+@dataclass(eq=False)
+class Subscriber:
+    user_id: int
+    role: str
+    department_id: Optional[int]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+    overflowed: bool = False
+
+    def can_see(self, event: GrievanceEvent) -> bool:
+        if event.recipient_ids:
+            return self.user_id in event.recipient_ids
+        if self.role == RoleEnum.super_admin.value:
+            return True
+        if self.role == RoleEnum.admin.value:
+            return self.department_id in event.department_ids
+        if self.role == RoleEnum.employee.value:
+            return (self.user_id in event.assignee_ids or self.user_id in event.user_ids
+                    or self.department_id in event.department_ids)
+        return self.user_id in event.user_ids
+
+
+class EventBroker:
+    def __init__(self, ring_size: int = RING_SIZE):
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._sequence = itertools.count(1)
+        self._ring: deque = deque(maxlen=ring_size)
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, events: List[GrievanceEvent]):
+        """Thread-safe; called from request threads and job workers."""
+        with self._lock:
+            stamped = []
+            for event in events:
+                event = replace(event, id=f"{self.boot_id}-{next(self._sequence)}")
+                self._ring.append(event)
+                stamped.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            visible = [e for e in stamped if subscriber.can_see(e)]
+            if visible:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, visible)
+
+    @staticmethod
+    def _deliver(subscriber: Subscriber, events: List[GrievanceEvent]):
+        for event in events:
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind: end the stream; the client resumes from its Last-Event-ID
+                subscriber.overflowed = True
+                sse_dropped.inc()
+                return
+
+    def subscribe(self, subscriber: Subscriber, last_event_id: Optional[str]) -> Optional[List[GrievanceEvent]]:
+        """
+        Register a subscriber and return the events it missed since last_event_id,
+        or None if they cannot be replayed (unknown process or outside the ring).
+        """
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if not last_event_id:
+                return []
+            boot_id, _, sequence = last_event_id.partition("-")
+            if boot_id != self.boot_id or not sequence.isdigit():
+                return None
+            sequence = int(sequence)
+            if self._ring and int(self._ring[0].id.split("-")[1]) > sequence + 1:
+                return None
+            return [e for e in self._ring if int(e.id.split("-")[1]) > sequence and subscriber.can_see(e)]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = EventBroker()
+
+
+def _ids(*values) -> FrozenSet[int]:
+    return frozenset(v for v in values if v is not None)
+
+
+def queue_event(db: Session, type: str, grievance_id: int, before=None, after=None, **extra):
+    """
+    Queue an event on the session; it is published when the session commits.
+    before/after are Grievances.lifecycle.GrievanceState snapshots.
+    """
+    current = after or before
+    data = {
+        "grievance_id": grievance_id,
+        "status": current.status if current else None,
+        "department_id": current.department_id if current else None,
+        "assigned_to": current.assigned_to if current else None,
+        **extra,
+    }
+    if before is not None and after is not None:
+        data["previous"] = {
+            "status": before.status,
+            "department_id": before.department_id,
+            "assigned_to": before.assigned_to,
+        }
+    states = [s for s in (before, after) if s is not None]
+    db.info.setdefault(_PENDING_KEY, []).append(GrievanceEvent(
+        type=type,
+        data=data,
+        user_ids=_ids(*(s.user_id for s in states)),
+        department_ids=_ids(*(s.department_id for s in states)),
+        assignee_ids=_ids(*(s.assigned_to for s in states)),
+    ))
+
+
+def queue_user_event(db: Session, type: str, recipient_ids, **data):
+    """Queue an event for specific users only, published when the session commits."""
+    db.info.setdefault(_PENDING_KEY, []).append(
+        GrievanceEvent(type=type, data=data, recipient_ids=frozenset(recipient_ids))
+    )
+
+
+def queue_changes(db: Session, changes):
+    """Queue one event per lifecycle change."""
+    for change in changes:
+        before, after = change.before, change.after
+        if before is None:
+            kind = "created"
+        elif after is None:
+            kind = "deleted"
+        elif after.status != before.status and after.status in ("solved", "not_solved", "closed"):
+            kind = "resolved" if after.status != "closed" else "closed"
+        elif after.department_id != before.department_id:
+            kind = "transferred"
+        elif after.assigned_to != before.assigned_to:
+            kind = "assigned"
+        else:
+            kind = "status_changed"
+        queue_event(db, kind, change.grievance_id, before, after)
+
+
+@sa_event.listens_for(SessionLocal, "after_commit")
+def _publish_after_commit(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        broker.publish(pending)
+
+
+@sa_event.listens_for(SessionLocal, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _format(event: GrievanceEvent) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data, default=str)}\n\n"
+
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _authenticate(request: Request, access_token: Optional[str]):
+    token = access_token
+    header = request.headers.get("authorization", "")
+    if not token and header.lower().startswith("bearer "):
+        token = header[7:]
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not token:
+        raise credentials_exception
+    try:
+        sub = decode_access_token(token).get("sub")
+        user_id = int(sub)
+    except (JWTError, ValueError, TypeError):
+        raise credentials_exception
+    from User.models import User
+    # Short-lived session: nothing is held open for the life of the stream
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        role = user.role.value if hasattr(user.role, "value") else user.role
+        return user.id, role, user.department_id
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_events(request: Request, access_token: Optional[str] = None):
+    """
+    Server-Sent Events stream of grievance events visible to the caller:
+    created, assigned, status_changed, transferred, resolved, closed and comment.
+
+    Authenticate with the usual Bearer header, or with ?access_token= since
+    browsers' EventSource cannot set headers. Reconnecting clients send
+    Last-Event-ID to receive what they missed; a "reset" event means they
+    must refetch instead.
+    """
+    # The user lookup is blocking database I/O: keep it off the event loop
+    user_id, role, department_id = await run_in_threadpool(_authenticate, request, access_token)
+    subscriber = Subscriber(user_id, role, department_id, asyncio.get_running_loop())
+    missed = broker.subscribe(subscriber, request.headers.get("last-event-id"))
+
+    async def stream():
+        sse_subscribers.inc()
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if missed is None:
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for event in missed:
+                    yield _format(event)
+            while not subscriber.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format(event)
+        finally:
+            broker.unsubscribe(subscriber)
+            sse_subscribers.dec()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,282 @@
+"""
+Idempotency-Key support for grievance creation and mutations.
+
+The first response for a (principal, Idempotency-Key) pair is stored and
+replayed to retries for IDEMPOTENCY_TTL_SECONDS. A retry arriving while the
+original is still running waits for it (up to IDEMPOTENCY_WAIT_SECONDS) and
+then receives the same response. Reusing a key with a different request body
+is rejected with 422. Server errors (5xx) are not stored, so they can be retried.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from jose import JWTError
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Text, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database import Base, SessionLocal
+from dependencies import decode_access_token
+
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+IDEMPOTENCY_WAIT_SECONDS = 10.0
+# An in-progress record older than this is assumed abandoned (e.g. worker crash)
+IN_PROGRESS_TIMEOUT_SECONDS = 60
+POLL_INTERVAL_SECONDS = 0.2
+
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/grievances/?$"),
+    re.compile(r"^/grievances/[^/]+/(resolve|transfer)$"),
+    re.compile(r"^/comments/?$"),
+]
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("principal", "key", name="uq_idempotency_principal_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    principal = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String, nullable=False, default="in_progress")  # in_progress | completed
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(Text, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+def purge_expired(db: Session) -> int:
+    deleted = db.query(IdempotencyRecord) \
+        .filter(IdempotencyRecord.expires_at < datetime.utcnow()) \
+        .delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _fingerprint(scope, body: bytes) -> str:
+    headers = dict(scope["headers"])
+    content_type = headers.get(b"content-type", b"").decode("latin-1")
+    match = re.search(r"boundary=\"?([^\";]+)", content_type)
+    if match:
+        # Multipart boundaries are random per attempt; ignore them
+        body = body.replace(match.group(1).encode("latin-1"), b"")
+    digest = hashlib.sha256()
+    digest.update(scope["method"].encode())
+    digest.update(scope["path"].encode())
+    digest.update(scope.get("query_string", b""))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _principal(scope) -> str:
+    headers = dict(scope["headers"])
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            sub = decode_access_token(token).get("sub")
+            if sub:
+                return f"user:{sub}"
+        except JWTError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _begin(principal: str, key: str, fingerprint: str) -> Tuple[str, Optional[object]]:
+    """
+    Claim the key or report its state.
+
+    Returns one of ("proceed", record_id), ("replay", (status, headers, body)),
+    ("in_flight", None) or ("mismatch", None).
+    """
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        record = db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.principal == principal,
+            IdempotencyRecord.key == key,
+        ).first()
+
+        if record and record.expires_at <= now:
+            db.delete(record)
+            db.commit()
+            record = None
+
+        if record is None:
+            record = IdempotencyRecord(
+                principal=principal,
+                key=key,
+                request_hash=fingerprint,
+                status="in_progress",
+                created_at=now,
+                expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+            )
+            db.add(record)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker claimed the key between our read and insert
+                db.rollback()
+                return "in_flight", None
+            return "proceed", record.id
+
+        if record.request_hash != fingerprint:
+            return "mismatch", None
+
+        if record.status == "completed":
+            headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(record.response_headers)]
+            return "replay", (record.response_status, headers, record.response_body)
+
+        if record.created_at < now - timedelta(seconds=IN_PROGRESS_TIMEOUT_SECONDS):
+            taken = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.id == record.id,
+                IdempotencyRecord.created_at == record.created_at,
+            ).update({IdempotencyRecord.created_at: now}, synchronize_session=False)
+            db.commit()
+            if taken:
+                return "proceed", record.id
+
+        return "in_flight", None
+
+
+def _finish(record_id: int, status_code: int, headers, body: bytes):
+    with SessionLocal() as db:
+        query = db.query(IdempotencyRecord).filter(IdempotencyRecord.id == record_id)
+        if status_code >= 500:
+            query.delete(synchronize_session=False)
+        else:
+            stored_headers = [
+                (k.decode("latin-1"), v.decode("latin-1"))
+                for k, v in headers
+                if k.lower() not in (b"content-length", b"set-cookie")
+            ]
+            query.update({
+                IdempotencyRecord.status: "completed",
+                IdempotencyRecord.response_status: status_code,
+                IdempotencyRecord.response_headers: json.dumps(stored_headers),
+                IdempotencyRecord.response_body: body,
+            }, synchronize_session=False)
+        db.commit()
+
+
+def _abandon(record_id: int):
+    with SessionLocal() as db:
+        db.query(IdempotencyRecord).filter(IdempotencyRecord.id == record_id) \
+            .delete(synchronize_session=False)
+        db.commit()
+
+
+async def _send_json(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Requests currently running in this worker, so local duplicates can
+        # wait on an event instead of polling the database
+        self._inflight: Dict[Tuple[str, str], asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" \
+                or not any(p.match(scope["path"]) for p in IDEMPOTENT_ROUTES):
+            await self.app(scope, receive, send)
+            return
+
+        key = dict(scope["headers"]).get(b"idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        key = key.decode("latin-1")[:255]
+
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        principal = _principal(scope)
+        fingerprint = _fingerprint(scope, body)
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            outcome, value = await run_in_threadpool(_begin, principal, key, fingerprint)
+            if outcome == "proceed":
+                await self._run(scope, body, receive, send, principal, key, value)
+                return
+            if outcome == "replay":
+                status_code, headers, stored_body = value
+                await send({
+                    "type": "http.response.start",
+                    "status": status_code,
+                    "headers": headers + [
+                        (b"content-length", str(len(stored_body)).encode()),
+                        (b"idempotent-replayed", b"true"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": stored_body})
+                return
+            if outcome == "mismatch":
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request")
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed")
+                return
+            event = self._inflight.get((principal, key))
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), remaining)
+                else:
+                    await asyncio.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, scope, body: bytes, receive, send, principal: str, key: str, record_id: int):
+        event = asyncio.Event()
+        self._inflight[(principal, key)] = event
+        delivered = False
+        captured = {"status": 500, "headers": [], "body": b""}
+
+        async def replay_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                captured["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await run_in_threadpool(_abandon, record_id)
+            raise
+        else:
+            await run_in_threadpool(
+                _finish, record_id, captured["status"], captured["headers"], captured["body"]
+            )
+        finally:
+            self._inflight.pop((principal, key), None)
+            event.set()
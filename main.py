@@ -1,22 +1,52 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from database import engine, Base, SessionLocal
 from Department.APIs import router as dept_router
 from User.APIs import router as user_router
 from Grievances.APIs import router as grv_router
+from Grievances import list_view, similarity
 from Comments.APIs import router as com_router
+from Workload.APIs import router as workload_router
+from Analytics.APIs import router as analytics_router
+from Reports.APIs import router as reports_router
+from Reports import worker as report_worker
 import auth
+import metrics
+import events
+import migrations
+import serialization
+from overload import OverloadProtectionMiddleware
+from idempotency import IdempotencyMiddleware
+from compression import ContentNegotiationMiddleware
 import User.APIs as user_apis
 from Department import models as dept_models
 from User import models as user_models
+from Jobs.worker import JobWorkerPool
+from Jobs.APIs import router as jobs_router
+from Notifications.APIs import router as notifications_router
+from SavedSearches.APIs import router as saved_searches_router
+import Jobs.tasks  # registers background tasks
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-dept_models.Base.metadata.create_all(bind=engine)
-user_models.Base.metadata.create_all(bind=engine)
+# Create missing tables, then bring existing ones up to the models
+migrations.upgrade(engine)
 
-app = FastAPI(debug=True)
+job_workers = JobWorkerPool()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with SessionLocal() as db:
+        list_view.ensure_populated(db)
+        similarity.index.sync(db)
+    job_workers.start()
+    yield
+    job_workers.stop()
+    report_worker.shutdown()
+
+
+app = FastAPI(debug=True, lifespan=lifespan, default_response_class=serialization.FastJSONResponse)
 
 # Register routers
 app.include_router(dept_router)
@@ -25,7 +55,22 @@ app.include_router(user_apis.router)
 app.include_router(auth.router)
 app.include_router(grv_router)
 app.include_router(com_router)
+app.include_router(workload_router)
+app.include_router(analytics_router)
+app.include_router(reports_router)
+app.include_router(jobs_router)
+app.include_router(notifications_router)
+app.include_router(saved_searches_router)
+app.include_router(events.router)
+app.include_router(metrics.router)
 
+# Added before CORS so that shed (503) responses still carry CORS headers
+app.add_middleware(OverloadProtectionMiddleware)
+# Outside overload protection so replays and waiting duplicates do not hold a slot
+app.add_middleware(IdempotencyMiddleware)
+# Outside idempotency so stored responses stay unencoded and each replay is
+# negotiated against the retrying client's own Accept headers
+app.add_middleware(ContentNegotiationMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +78,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 @app.get("/test")
 async def test_route():
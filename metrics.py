@@ -0,0 +1,82 @@
+"""
+Small in-process metrics registry.
+
+Counters and gauges live in memory for the lifetime of the worker and are
+exposed in the Prometheus text format at GET /metrics.
+"""
+import threading
+from typing import Dict, List, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+REGISTRY: List["_Metric"] = []
+
+router = APIRouter(tags=["Metrics"])
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            if self.labelnames:
+                label_str = ",".join(f'{n}="{v}"' for n, v in zip(self.labelnames, key))
+                lines.append(f"{self.name}{{{label_str}}} {value}")
+            else:
+                lines.append(f"{self.name} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+def render_all() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return render_all()
@@ -0,0 +1,95 @@
+"""
+Schema upgrade for existing databases.
+
+Base.metadata.create_all only creates missing tables; it never changes a table
+that already exists. upgrade() runs at startup after it and brings older
+databases (such as the grievance.db shipped in the repo) up to the models:
+  - adds every column the models declare that the table lacks, with
+    ALTER TABLE ... ADD COLUMN;
+  - creates every index the models declare that does not exist yet;
+  - backfills columns that new code relies on being set for existing rows.
+
+Every step checks the live schema first, so upgrade() is idempotent and a
+no-op on an up-to-date database.
+"""
+import logging
+from typing import List
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+import changefeed
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _add_column_ddl(engine: Engine, table, column) -> str:
+    if column.primary_key or column.unique:
+        raise RuntimeError(f"Cannot add {table.name}.{column.name}: SQLite can not ADD a primary key or unique column")
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(f"Cannot add {table.name}.{column.name}: a NOT NULL column needs a server_default")
+    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+    return f"ALTER TABLE {engine.dialect.identifier_preparer.format_table(table)} ADD COLUMN {ddl}"
+
+
+def _missing_columns(engine: Engine) -> List[str]:
+    inspector = inspect(engine)
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        statements.extend(
+            _add_column_ddl(engine, table, column) for column in table.columns if column.name not in existing
+        )
+    return statements
+
+
+def _create_missing_indexes(engine: Engine):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def _backfill_change_seq(db: Session):
+    """Rows written before the change feed existed get sequence values so a full sync returns them."""
+    for model in changefeed.ENTITIES:
+        table = model.__table__
+        ids = list(db.execute(select(table.c.id).where(table.c.change_seq.is_(None)).order_by(table.c.id)).scalars())
+        if not ids:
+            continue
+        first = changefeed.allocate(db, len(ids))
+        db.execute(
+            update(table).where(table.c.id == bindparam("row_id")).values(change_seq=bindparam("seq")),
+            [{"row_id": row_id, "seq": first + i} for i, row_id in enumerate(ids)],
+        )
+        logger.info("Backfilled change_seq for %d %s rows", len(ids), table.name)
+
+
+def _backfill_updated_at(db: Session):
+    db.execute(text("UPDATE grievances SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def _backfill_sla_started_at(db: Session):
+    # The SLA clock of an existing grievance starts at its last status change
+    db.execute(text(
+        "UPDATE grievances SET sla_started_at = COALESCE("
+        "(SELECT MAX(h.changed_at) FROM grievance_status_history h WHERE h.grievance_id = grievances.id), "
+        "created_at) WHERE sla_started_at IS NULL"
+    ))
+
+
+def upgrade(engine: Engine):
+    Base.metadata.create_all(bind=engine)
+    statements = _missing_columns(engine)
+    with engine.begin() as connection:
+        for statement in statements:
+            logger.info("Schema upgrade: %s", statement)
+            connection.execute(text(statement))
+    _create_missing_indexes(engine)
+    with Session(bind=engine) as db:
+        _backfill_updated_at(db)
+        _backfill_sla_started_at(db)
+        _backfill_change_seq(db)
+        db.commit()
@@ -0,0 +1,166 @@
+"""
+Concurrency limiting and priority-aware load shedding.
+
+At most MAX_CONCURRENCY requests run at once. Further requests wait in a
+bounded queue, ordered by priority class, and are rejected with 503 if they
+wait longer than QUEUE_TIMEOUT_SECONDS. When the queue is full, a new request
+displaces the lowest-priority waiter below its own class, or is rejected itself.
+
+Priority classes:
+- high: employee/admin work endpoints (resolve, transfer, assign, claim-next)
+- normal: everything else
+- low: bulk listing and search
+"""
+import asyncio
+import json
+import re
+from collections import deque
+from typing import Deque, Dict, Optional
+from metrics import Counter, Gauge
+
+MAX_CONCURRENCY = 32
+MAX_QUEUE = 128
+QUEUE_TIMEOUT_SECONDS = 5.0
+RETRY_AFTER_SECONDS = 2
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+HIGH_PRIORITY_ROUTES = [
+    ("POST", re.compile(r"^/grievances/[^/]+/(resolve|transfer)$")),
+    ("POST", re.compile(r"^/grievances/(assign|claim-next)$")),
+]
+LOW_PRIORITY_ROUTES = [
+    ("GET", re.compile(r"^/grievances/?$")),
+    ("GET", re.compile(r"^/grievances/(search/?|by-department|export)$")),
+    ("GET", re.compile(r"^/users/?$")),
+    ("GET", re.compile(r"^/users/grievances/?$")),
+]
+# Never queued or shed: monitoring keeps working under load, and long-lived
+# event streams would otherwise hold a concurrency slot for their whole life
+EXEMPT_PATHS = {"/metrics", "/events/stream"}
+
+overload_inflight = Gauge("overload_inflight_requests", "Requests currently being served")
+overload_queue_depth = Gauge("overload_queue_depth", "Requests waiting for a slot", ("priority",))
+overload_shed = Counter("overload_shed_total", "Requests rejected by load shedding", ("priority", "reason"))
+
+
+def classify(method: str, path: str) -> int:
+    for route_method, pattern in HIGH_PRIORITY_ROUTES:
+        if method == route_method and pattern.match(path):
+            return PRIORITY_HIGH
+    for route_method, pattern in LOW_PRIORITY_ROUTES:
+        if method == route_method and pattern.match(path):
+            return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+
+class OverloadProtectionMiddleware:
+    def __init__(self, app, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT_SECONDS):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._inflight = 0
+        self._waiters: Dict[int, Deque[asyncio.Future]] = {p: deque() for p in PRIORITY_NAMES}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope["method"], scope["path"])
+        reason = await self._acquire(priority)
+        if reason is not None:
+            overload_shed.inc(priority=PRIORITY_NAMES[priority], reason=reason)
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    def _queued(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def _update_gauges(self):
+        overload_inflight.set(self._inflight)
+        for p, name in PRIORITY_NAMES.items():
+            overload_queue_depth.set(len(self._waiters[p]), priority=name)
+
+    def _displace_lower_than(self, priority: int) -> bool:
+        for p in sorted(self._waiters, reverse=True):
+            if p <= priority:
+                break
+            queue = self._waiters[p]
+            if queue:
+                # Newest waiter of the lowest class has invested the least time
+                queue.pop().set_result(False)
+                return True
+        return False
+
+    async def _acquire(self, priority: int) -> Optional[str]:
+        """Wait for a slot. Returns None when admitted, otherwise the shed reason."""
+        if self._inflight < self.max_concurrency and self._queued() == 0:
+            self._inflight += 1
+            self._update_gauges()
+            return None
+
+        if self._queued() >= self.max_queue and not self._displace_lower_than(priority):
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        self._update_gauges()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                admitted = future.result()
+            else:
+                self._waiters[priority].remove(future)
+                future.cancel()
+                self._update_gauges()
+                return "timeout"
+        except asyncio.CancelledError:
+            # Client went away; hand a slot we may already own to the next waiter
+            if future.done() and future.result():
+                self._release()
+            elif not future.done():
+                self._waiters[priority].remove(future)
+                future.cancel()
+            self._update_gauges()
+            raise
+        self._update_gauges()
+        return None if admitted else "displaced"
+
+    def _release(self):
+        # Hand the slot straight to the highest-priority waiter, if any
+        for p in sorted(self._waiters):
+            queue = self._waiters[p]
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    future.set_result(True)
+                    self._update_gauges()
+                    return
+        self._inflight -= 1
+        self._update_gauges()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Server is overloaded, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,138 @@
+"""
+In-process token-bucket rate limiting.
+
+Each route group (create, search, login, download, export) has its own limits per
+principal dimension: the calling user and the client IP. A request must have a
+token available in every applicable bucket; otherwise it is rejected with 429
+and a Retry-After header.
+
+There is deliberately no bucket shared by a whole role: a few heavy accounts
+would drain it and throttle every other caller with that role.
+
+Limits are per worker process.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from jose import JWTError
+from dependencies import decode_access_token
+from metrics import Counter
+
+
+class Limit(NamedTuple):
+    capacity: float     # burst size
+    refill_rate: float  # tokens per second
+
+
+ROUTE_GROUP_LIMITS: Dict[str, Dict[str, Limit]] = {
+    "create": {
+        "user": Limit(10, 10 / 60),
+        "ip": Limit(30, 30 / 60),
+    },
+    "search": {
+        "user": Limit(60, 1.0),
+        "ip": Limit(120, 2.0),
+    },
+    "login": {
+        "ip": Limit(10, 10 / 60),
+    },
+    "download": {
+        "user": Limit(30, 0.5),
+        "ip": Limit(60, 1.0),
+    },
+    "export": {
+        "user": Limit(5, 5 / 600),
+        "ip": Limit(10, 10 / 600),
+    },
+}
+
+# Oldest buckets are dropped beyond this many keys so the table stays bounded
+MAX_BUCKETS = 100_000
+
+rate_limit_rejections = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ("group", "dimension"),
+)
+
+
+class TokenBucketStore:
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[Tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key: Tuple, limit: Limit, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [limit.capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_rate)
+            bucket[1] = now
+        return bucket
+
+    def acquire(self, checks: Dict[str, Tuple[Tuple, Limit]]) -> Tuple[Optional[str], float]:
+        """
+        Take one token from every bucket in `checks` ({dimension: (key, limit)}).
+
+        Nothing is consumed unless all buckets have a token. Returns
+        (None, 0) on success, or (rejecting dimension, seconds to wait).
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = {dim: (self._refill(key, limit, now), limit) for dim, (key, limit) in checks.items()}
+            for dim, (bucket, limit) in buckets.items():
+                if bucket[0] < 1:
+                    return dim, (1 - bucket[0]) / limit.refill_rate
+            for bucket, _ in buckets.values():
+                bucket[0] -= 1
+        return None, 0.0
+
+
+_store = TokenBucketStore()
+
+
+def _principal(request: Request) -> Optional[str]:
+    """Read the user id from the bearer token without touching the database."""
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+class RateLimit:
+    """Dependency enforcing the limits of one route group."""
+
+    def __init__(self, group: str):
+        self.group = group
+        self.limits = ROUTE_GROUP_LIMITS[group]
+
+    def __call__(self, request: Request):
+        ip = request.client.host if request.client else "unknown"
+        keys = {"user": _principal(request), "ip": ip}
+
+        checks = {
+            dim: ((self.group, dim, keys[dim]), limit)
+            for dim, limit in self.limits.items()
+            if keys.get(dim) is not None
+        }
+        dimension, retry_after = _store.acquire(checks)
+        if dimension is not None:
+            rate_limit_rejections.inc(group=self.group, dimension=dimension)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
@@ -0,0 +1,46 @@
+"""
+JSON rendering for API responses.
+
+FastJSONResponse renders with orjson and is the app's default response class,
+so every endpoint that returns plain data is encoded by orjson instead of
+json.dumps.
+
+The large list payloads (grievance pages, search results, user pages) skip
+FastAPI's generic path, which validates the return value against the response
+model, converts it to JSON-compatible Python objects and only then encodes
+it. respond() does the same work through a TypeAdapter compiled once per
+response type: pydantic-core validates the rows and writes the JSON bytes
+directly, and the bytes are passed through unchanged. Endpoints keep their
+response_model so the OpenAPI schema is unchanged.
+"""
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson rendering; content that is already encoded (bytes) is sent as is."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@lru_cache(maxsize=None)
+def adapter(tp) -> TypeAdapter:
+    """The TypeAdapter of a response type, built on first use and then reused."""
+    return TypeAdapter(tp)
+
+
+def dump_json(tp, content: Any) -> bytes:
+    """Validate `content` (models, ORM objects or row dicts) as `tp` and encode it."""
+    type_adapter = adapter(tp)
+    return type_adapter.dump_json(type_adapter.validate_python(content, from_attributes=True))
+
+
+def respond(tp, content: Any, status_code: int = 200,
+            headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    return FastJSONResponse(dump_json(tp, content), status_code=status_code, headers=headers)
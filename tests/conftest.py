@@ -0,0 +1,95 @@
+"""
+Shared fixtures.
+
+The app runs against a throwaway SQLite database that is recreated for every
+test; the committed grievance.db is never opened. The engine is swapped before
+main is imported, so every module that does `from database import engine`
+gets the test one.
+"""
+import itertools
+import os
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+import database
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="grievance-tests-"), "test.db")
+database.engine = create_engine(f"sqlite:///{_DB_PATH}", connect_args={"check_same_thread": False})
+database.SessionLocal.configure(bind=database.engine)
+
+import main  # noqa: E402
+import migrations  # noqa: E402
+import rate_limit  # noqa: E402
+from Department.models import Department  # noqa: E402
+from Grievances import similarity  # noqa: E402
+from SavedSearches.percolator import percolator  # noqa: E402
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    database.Base.metadata.drop_all(bind=database.engine)
+    migrations.upgrade(database.engine)
+    similarity.index = similarity.MinHashLSHIndex()
+    percolator.invalidate()
+    rate_limit._store = rate_limit.TokenBucketStore()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def unlimited(monkeypatch):
+    """Rate limits out of the way; tests of the limiter set their own."""
+    for group, limits in rate_limit.ROUTE_GROUP_LIMITS.items():
+        for dimension in list(limits):
+            monkeypatch.setitem(limits, dimension, rate_limit.Limit(10 ** 9, 10 ** 9))
+
+
+@pytest.fixture
+def client():
+    # Without `with`: the lifespan (job workers) does not start
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db():
+    with database.SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def department(db):
+    """Create a department by name and return its id."""
+    def create(name: str) -> int:
+        dept = Department(name=name)
+        db.add(dept)
+        db.commit()
+        return dept.id
+    return create
+
+
+@pytest.fixture
+def login(client):
+    """Sign up a user and return (user id, auth headers, token pair)."""
+    def create(role: str = "user", department_id: int = None, email: str = None):
+        email = email or f"user{next(_emails)}@example.com"
+        body = {"email": email, "password": "pw", "role": role}
+        if department_id is not None:
+            body["department_id"] = department_id
+        response = client.post("/signup", json=body)
+        assert response.status_code == 201, response.text
+        tokens = client.post("/login", data={"username": email, "password": "pw"}).json()
+        return response.json()["id"], {"Authorization": f"Bearer {tokens['access_token']}"}, tokens
+    return create
+
+
+@pytest.fixture
+def create_grievance(client):
+    def create(headers, text: str = "The wifi in hostel block C is down", department_id: int = 1, **extra):
+        response = client.post("/grievances/", data={"grievance": text, "department_id": department_id, **extra},
+                               headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
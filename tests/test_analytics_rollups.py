@@ -0,0 +1,65 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from Analytics import crud as analytics_crud
+from Analytics.models import GrievanceFlowDaily
+
+
+def _flow(client, headers):
+    rows = client.get("/analytics/flow", headers=headers).json()
+    return [(r["resolved"], r["closed"], r["resolution_p50_hours"], r["resolution_mean_hours"]) for r in rows]
+
+
+def test_resolved_then_closed_stays_resolved_after_rebuild(client, login, create_grievance, db):
+    user_id, user, _ = login()
+    admin_id, admin, _ = login(role="admin", department_id=1)
+    _, super_admin, _ = login(role="super_admin", department_id=1)
+    resolved = create_grievance(user, "Fan in room 4 is noisy")
+    closed = create_grievance(user, "Door lock of lab 2 is jammed")
+    client.post(f"/grievances/{resolved['id']}/resolve", params={"resolver_id": admin_id}, headers=admin)
+    client.post("/grievances/bulk", json={"action": "close", "ticket_ids": [resolved["ticket_id"], closed["ticket_id"]]},
+                headers=admin)
+    recorded = _flow(client, admin)
+
+    since = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+    assert client.post("/analytics/rebuild", params={"since": since}, headers=super_admin).status_code == 200
+
+    assert recorded == [(1, 1, 0.0, 0.0)]
+    assert _flow(client, admin) == recorded
+
+
+def test_percentiles_stay_within_the_observed_resolution_times():
+    assert analytics_crud._percentile_hours(Counter({0: 4}), 0.5) == 0.5
+    assert analytics_crud._percentile_hours(Counter({0: 4}), 0.5, {0: [0.0, 0.0]}) == 0.0
+    # 30h and 31h in the 24-36h bucket: p99 may not exceed the slowest one
+    assert analytics_crud._percentile_hours(Counter({6: 2}), 0.99, {6: [30 * 3600, 31 * 3600]}) == 31.0
+
+
+def test_backlog_at_each_period_end_subtracts_the_later_net_inflow(db):
+    first = date(2024, 1, 1)  # a Monday
+    for i in range(21):
+        for dept in (1, 2):
+            db.add(GrievanceFlowDaily(day=first + timedelta(days=i), department_id=dept,
+                                      created_count=i + dept, resolved_count=i % 3))
+    db.commit()
+    backlog = {1: 1000, 2: 2000}
+
+    def expected(dept, period_end):
+        return backlog[dept] - sum(i + dept - i % 3 for i in range(21) if first + timedelta(days=i) >= period_end)
+
+    for granularity, end, periods in (("day", date(2024, 1, 10), 10), ("week", date(2024, 1, 10), 2)):
+        rows = analytics_crud.flow_report(db, first, end, granularity, None, backlog)
+        assert len(rows) == 2 * periods
+        for row in rows:
+            period_end = analytics_crud._next_period(row["period_start"], granularity)
+            assert row["backlog_end"] == expected(row["department_id"], period_end)
+
+
+def test_flow_span_is_bounded(client, login):
+    login()
+    _, super_admin, _ = login(role="super_admin", department_id=1)
+    end = date(2024, 12, 31)
+    too_long = {"start": (end - timedelta(days=analytics_crud.FLOW_MAX_DAYS)).isoformat(), "end": end.isoformat()}
+    longest = {"start": (end - timedelta(days=analytics_crud.FLOW_MAX_DAYS - 1)).isoformat(), "end": end.isoformat()}
+
+    assert client.get("/analytics/flow", params=too_long, headers=super_admin).status_code == 400
+    assert client.get("/analytics/flow", params=longest, headers=super_admin).status_code == 200
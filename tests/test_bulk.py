@@ -0,0 +1,38 @@
+from Grievances import crud
+
+
+def test_filter_status_must_be_a_known_status(client, login):
+    _, admin, _ = login(role="admin", department_id=1)
+    response = client.post("/grievances/bulk", json={"action": "close", "filter": {"status": "pendng"}},
+                           headers=admin)
+    assert response.status_code == 422
+
+
+def test_filter_by_status_only_touches_matching_grievances(client, login, create_grievance):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    _, employee, _ = login(role="employee", department_id=1)
+    claimed = create_grievance(user, "Broken chair in lab 3")
+    client.post("/grievances/claim-next", headers=employee)
+    pending = create_grievance(user, "Leaking tap in the mess")
+
+    response = client.post("/grievances/bulk", json={"action": "close", "filter": {"status": "pending"}},
+                           headers=admin)
+
+    assert response.status_code == 200
+    assert [r["ticket_id"] for r in response.json()["results"]] == [pending["ticket_id"]]
+    assert client.get(f"/grievances/{claimed['ticket_id']}", headers=admin).json()["status"] == "in_progress"
+
+
+def test_oversize_ticket_list_is_rejected(client, login, create_grievance, monkeypatch):
+    monkeypatch.setattr(crud, "BULK_MAX_ITEMS", 2)
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    tickets = [create_grievance(user, f"Issue number {i}")["ticket_id"] for i in range(3)]
+
+    response = client.post("/grievances/bulk", json={"action": "close", "ticket_ids": tickets}, headers=admin)
+    assert response.status_code == 422
+
+    response = client.post("/grievances/bulk", json={"action": "close", "ticket_ids": tickets[:2] * 2},
+                           headers=admin)
+    assert response.status_code == 200 and response.json()["succeeded"] == 2
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from Comments.models import Comment
+from Grievances import sla
+from Grievances.models import Grievance, GrievanceStatus
+
+
+def _drain(client, headers, since=0, limit=2):
+    entries = []
+    while True:
+        page = client.get("/grievances/changes", params={"since": since, "limit": limit}, headers=headers).json()
+        entries += page["changes"]
+        assert page["next_cursor"] >= since
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return entries, since
+
+
+def test_cursor_pages_cover_every_change_once_in_order(client, login, create_grievance):
+    user_id, user, _ = login()
+    grievances = [create_grievance(user, f"Issue {i}") for i in range(3)]
+    client.post("/comments/", json={"grievance_id": grievances[0]["id"], "user_id": user_id, "content": "any news?"},
+                headers=user)
+
+    entries, cursor = _drain(client, user)
+
+    assert [e["seq"] for e in entries] == sorted({e["seq"] for e in entries})
+    assert [(e["entity"], e["id"]) for e in entries] == [("grievance", g["id"]) for g in grievances] + [
+        ("comment", 1)]
+    assert entries[-1]["data"]["content"] == "any news?"
+    assert _drain(client, user, cursor) == ([], cursor)
+
+
+def test_updates_move_rows_past_the_cursor_and_respect_visibility(client, login, create_grievance):
+    _, user, _ = login()
+    _, other, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    first, second = create_grievance(user, "Issue A"), create_grievance(user, "Issue B")
+    create_grievance(other, "Someone else's issue")
+    _, cursor = _drain(client, user)
+
+    client.post("/grievances/bulk", json={"action": "close", "ticket_ids": [first["ticket_id"]]}, headers=admin)
+
+    entries, _ = _drain(client, user, cursor)
+    assert [(e["id"], e["data"]["status"]) for e in entries] == [(first["id"], "closed")]
+    assert second["id"] not in {e["id"] for e in _drain(client, other)[0]}
+
+
+def test_deletes_appear_as_tombstones(client, login, create_grievance, db):
+    user_id, user, _ = login()
+    grievance = create_grievance(user)
+    client.post("/comments/", json={"grievance_id": grievance["id"], "user_id": user_id, "content": "typo"},
+                headers=user)
+    _, cursor = _drain(client, user)
+
+    db.delete(db.get(Comment, 1))
+    db.commit()
+
+    entries, _ = _drain(client, user, cursor)
+    assert [(e["entity"], e["id"], e["deleted"], e["data"]) for e in entries] == [("comment", 1, True, None)]
+
+
+def test_transfers_tell_callers_who_lost_access_to_drop_the_grievance(client, login, department, create_grievance):
+    _, user, _ = login()
+    it = department("IT")
+    _, admin, _ = login(role="admin", department_id=1)
+    _, it_admin, _ = login(role="admin", department_id=it)
+    single, bulk = create_grievance(user, "Issue A"), create_grievance(user, "Issue B")
+    _, admin_cursor = _drain(client, admin)
+    _, user_cursor = _drain(client, user)
+
+    client.post(f"/grievances/{single['ticket_id']}/transfer", json={"new_department_id": it}, headers=admin)
+    client.post("/grievances/bulk", json={"action": "transfer", "ticket_ids": [bulk["ticket_id"]],
+                                          "new_department_id": it}, headers=admin)
+
+    lost, _ = _drain(client, admin, admin_cursor)
+    assert [(e["id"], e["deleted"]) for e in lost] == [(single["id"], True), (bulk["id"], True)]
+    kept, _ = _drain(client, user, user_cursor)
+    assert [(e["id"], e["deleted"]) for e in kept] == [
+        (single["id"], True), (single["id"], False), (bulk["id"], True), (bulk["id"], False)]
+    assert {e["id"] for e in _drain(client, it_admin)[0]} == {single["id"], bulk["id"]}
+
+
+def test_claiming_from_the_queue_leaves_no_tombstone(client, login, create_grievance):
+    _, user, _ = login()
+    _, employee, _ = login(role="employee", department_id=1)
+    grievance = create_grievance(user)
+    _, cursor = _drain(client, user)
+
+    client.post("/grievances/claim-next", headers=employee)
+
+    entries, _ = _drain(client, user, cursor)
+    assert [(e["id"], e["deleted"]) for e in entries] == [(grievance["id"], False)]
+
+
+def test_sla_reassignment_drops_the_grievance_from_the_old_assignee(client, login, department, create_grievance, db):
+    _, user, _ = login()
+    it = department("IT")
+    employee_id, employee, _ = login(role="employee", department_id=it)
+    grievance = create_grievance(user)
+    stalled = datetime.utcnow() - timedelta(hours=73)
+    db.execute(update(Grievance).where(Grievance.id == grievance["id"]).values(
+        status=GrievanceStatus.in_progress, assigned_to=employee_id, sla_started_at=stalled))
+    db.commit()
+    _, cursor = _drain(client, employee)
+
+    assert sla.run_sla_sweep(db)["in_progress"] == 1
+
+    entries, _ = _drain(client, employee, cursor)
+    assert [(e["id"], e["deleted"]) for e in entries] == [(grievance["id"], True)]
@@ -0,0 +1,68 @@
+import threading
+import database
+from Grievances import crud
+from Grievances.models import Grievance, GrievanceStatus
+
+
+def _queue(db, department_id, user_id, priorities):
+    ids = []
+    for i, priority in enumerate(priorities):
+        grievance = Grievance(ticket_id=f"Q-{department_id}-{i}", user_id=user_id, department_id=department_id,
+                              grievance_content=f"item {i}", status=GrievanceStatus.pending, priority=priority)
+        db.add(grievance)
+        db.commit()
+        ids.append(grievance.id)
+    return ids
+
+
+def test_claim_next_takes_highest_priority_then_oldest(client, login, db):
+    user_id, _, _ = login()
+    _, employee, _ = login(role="employee", department_id=1)
+    low, high_old, high_new = _queue(db, 1, user_id, [0, 2, 2])
+
+    claimed = [client.post("/grievances/claim-next", headers=employee).json()["id"] for _ in range(3)]
+
+    assert claimed == [high_old, high_new, low]
+    assert client.post("/grievances/claim-next", headers=employee).status_code == 204
+
+
+def test_concurrent_claims_never_hand_out_the_same_grievance(login, db):
+    user_id, _, _ = login()
+    employee_ids = [login(role="employee", department_id=1)[0] for _ in range(6)]
+    ids = _queue(db, 1, user_id, [0] * 4)
+    claims, barrier = [], threading.Barrier(len(employee_ids))
+
+    def claim(employee_id):
+        with database.SessionLocal() as session:
+            barrier.wait()
+            grievance = crud.claim_next_grievance(session, employee_id, 1)
+            claims.append(grievance.id if grievance else None)
+
+    threads = [threading.Thread(target=claim, args=(e,)) for e in employee_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    won = [c for c in claims if c is not None]
+    assert sorted(won) == sorted(ids)
+    db.expire_all()
+    assignees = {g.id: g.assigned_to for g in db.query(Grievance)}
+    assert len(set(assignees.values())) == len(ids)
+
+
+def test_transfer_returns_a_claimed_grievance_to_the_new_queue(client, login, department, db):
+    user_id, _, _ = login()
+    it = department("IT")
+    _, employee, _ = login(role="employee", department_id=1)
+    _, it_employee, _ = login(role="employee", department_id=it)
+    _queue(db, 1, user_id, [0])
+    claimed = client.post("/grievances/claim-next", headers=employee).json()
+
+    response = client.post(f"/grievances/{claimed['ticket_id']}/transfer",
+                           json={"new_department_id": it}, headers=employee)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+    reclaimed = client.post("/grievances/claim-next", headers=it_employee)
+    assert reclaimed.status_code == 200 and reclaimed.json()["id"] == claimed["id"]
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+from Comments.models import Comment
+
+T0 = datetime(2024, 5, 1, 12, 0)
+
+
+def _comment(db, grievance_id, user_id, content, minutes):
+    db.add(Comment(grievance_id=grievance_id, user_id=user_id, content=content,
+                   timestamp=T0 + timedelta(minutes=minutes)))
+
+
+def test_list_carries_comment_count_and_latest_comment(client, login, create_grievance, db):
+    user_id, user, _ = login(email="ann@example.com")
+    busy, quiet = create_grievance(user, "Busy"), create_grievance(user, "Quiet")
+    for i, minutes in enumerate([5, 1, 9, 9]):
+        _comment(db, busy["id"], user_id, f"comment {i} " + "x" * 200, minutes)
+    db.commit()
+
+    items = client.get("/grievances/", params={"include_comment_stats": True}, headers=user).json()["items"]
+    stats = {item["id"]: item["comment_stats"] for item in items}
+
+    assert stats[quiet["id"]]["count"] == 0 and stats[quiet["id"]]["last_comment_at"] is None
+    assert stats[busy["id"]]["count"] == 4
+    assert stats[busy["id"]]["last_comment_preview"].startswith("comment 3 ")  # newest, highest id on a tie
+    assert len(stats[busy["id"]]["last_comment_preview"]) == 140
+    assert stats[busy["id"]]["last_comment_by"] == "ann@example.com"
+    plain = client.get("/grievances/", headers=user).json()["items"]
+    assert all(item.get("comment_stats") is None for item in plain)
+
+
+def test_comment_cursor_pages_walk_ties_without_gaps(client, login, create_grievance, db):
+    user_id, user, _ = login()
+    grievance = create_grievance(user)
+    for i in range(7):
+        _comment(db, grievance["id"], user_id, f"c{i}", i // 3)
+    db.commit()
+    url = f"/comments/grievance/{grievance['id']}"
+
+    for order in ("asc", "desc"):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, "sort_order": order, **({"cursor": cursor} if cursor else {})}
+            response = client.get(url, params=params, headers=user)
+            seen += [c["content"] for c in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        expected = [f"c{i}" for i in range(7)]
+        assert seen == (expected if order == "asc" else expected[::-1])
+    assert client.get(url, params={"cursor": "bogus"}, headers=user).status_code == 400
@@ -0,0 +1,80 @@
+import msgpack
+import compression
+
+
+def _many(headers, create_grievance, count=8):
+    for i in range(count):
+        create_grievance(headers, f"The water cooler on floor {i} has been leaking for a week")
+
+
+def test_large_bodies_are_compressed_with_the_preferred_encoding(client, login, create_grievance):
+    _, headers, _ = login()
+    _many(headers, create_grievance)
+    plain = client.get("/grievances/", headers=headers)
+
+    for accept_encoding, expected in [("gzip", "gzip"), ("gzip;q=0.5, br", "br"), ("br;q=0, gzip", "gzip")]:
+        response = client.get("/grievances/", headers={**headers, "Accept-Encoding": accept_encoding})
+        assert response.headers["content-encoding"] == expected
+        assert int(response.headers["content-length"]) < len(plain.content)
+        assert response.json() == plain.json()
+        assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_small_bodies_and_identity_requests_are_left_alone(client, login):
+    _, headers, _ = login()
+    small = client.get("/grievances/", headers={**headers, "Accept-Encoding": "gzip"})
+    identity = client.get("/grievances/", headers={**headers, "Accept-Encoding": "identity"})
+
+    assert len(small.content) < compression.MIN_COMPRESS_SIZE
+    assert "content-encoding" not in small.headers
+    assert "Accept-Encoding" in small.headers["vary"]
+    assert "content-encoding" not in identity.headers
+
+
+def test_msgpack_is_served_when_ranked_at_least_as_high_as_json(client, login, create_grievance):
+    _, headers, _ = login()
+    _many(headers, create_grievance, 2)
+    plain = client.get("/grievances/", headers=headers)
+
+    packed = client.get("/grievances/", headers={**headers, "Accept": "application/msgpack"})
+    preferred_json = client.get("/grievances/", headers={
+        **headers, "Accept": "application/json, application/msgpack;q=0.5"})
+
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content) == plain.json()
+    assert "Accept" in packed.headers["vary"]
+    assert preferred_json.headers["content-type"] == "application/json"
+
+
+def test_streamed_export_is_compressed_chunk_by_chunk(client, login, create_grievance):
+    _, headers, _ = login()
+    _many(headers, create_grievance, 3)
+
+    response = client.get("/grievances/export?format=csv",
+                          headers={**headers, "Accept-Encoding": "gzip", "Accept": "application/msgpack"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 1 + 3
+
+
+def test_idempotent_replays_are_negotiated_per_request(client, login):
+    _, headers, _ = login()
+    headers = {**headers, "Idempotency-Key": "negotiated"}
+    form = {"grievance": "Broken window in the reading room", "department_id": 1}
+
+    first = client.post("/grievances/", data=form, headers={**headers, "Accept": "application/msgpack"})
+    retry = client.post("/grievances/", data=form, headers=headers)
+
+    assert first.headers["content-type"] == "application/msgpack"
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["content-type"] == "application/json"
+    assert retry.json() == msgpack.unpackb(first.content)
+
+
+def test_negotiation_helpers():
+    assert compression.negotiate_encoding("") is None
+    assert compression.negotiate_encoding("*") in compression.available_encodings()
+    assert compression.negotiate_encoding("gzip;q=0, deflate") is None
+    assert compression.wants_msgpack("application/x-msgpack")
+    assert not compression.wants_msgpack("*/*")
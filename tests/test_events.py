@@ -0,0 +1,85 @@
+import asyncio
+import events
+from Grievances import lifecycle
+from Grievances.models import Grievance
+
+
+def _subscriber(user_id, role="user", department_id=None, loop=None):
+    return events.Subscriber(user_id, role, department_id, loop or asyncio.new_event_loop())
+
+
+def _last_id():
+    ring = events.broker._ring
+    return ring[-1].id if ring else f"{events.broker.boot_id}-0"
+
+
+def _replay(subscriber, since):
+    try:
+        return events.broker.subscribe(subscriber, since)
+    finally:
+        events.broker.unsubscribe(subscriber)
+
+
+def test_changes_are_replayed_to_the_users_who_may_see_them(client, login, department, create_grievance):
+    user_id, user, _ = login()
+    other_id, _, _ = login()
+    it = department("IT")
+    since = _last_id()
+    grievance = create_grievance(user)
+
+    mine = _replay(_subscriber(user_id), since)
+    assert [(e.type, e.data["grievance_id"]) for e in mine] == [("created", grievance["id"])]
+    assert _replay(_subscriber(other_id), since) == []
+    assert len(_replay(_subscriber(0, "admin", 1), since)) == 1
+    assert _replay(_subscriber(0, "admin", it), since) == []
+
+
+def test_rolled_back_changes_are_never_published(login, db):
+    user_id, _, _ = login()
+    since = _last_id()
+    grievance = Grievance(ticket_id="rolled-back", user_id=user_id, department_id=1, grievance_content="x")
+    db.add(grievance)
+    db.flush()
+    lifecycle.record_change(db, grievance.id, None, lifecycle.state_of(grievance))
+    db.rollback()
+    assert _replay(_subscriber(0, "super_admin"), since) == []
+
+
+def test_live_subscriber_receives_events_on_its_loop():
+    loop = asyncio.new_event_loop()
+    subscriber = _subscriber(7, "employee", 3, loop=loop)
+    broker = events.EventBroker()
+    broker.subscribe(subscriber, None)
+    broker.publish([events.GrievanceEvent("assigned", {"grievance_id": 1}, assignee_ids=frozenset({7})),
+                    events.GrievanceEvent("created", {"grievance_id": 2}, user_ids=frozenset({8}))])
+    loop.run_until_complete(asyncio.sleep(0))
+    assert [subscriber.queue.get_nowait().type] == ["assigned"] and subscriber.queue.empty()
+    loop.close()
+
+
+def test_resume_outside_the_ring_or_from_another_process_resets():
+    broker = events.EventBroker(ring_size=2)
+    broker.publish([events.GrievanceEvent("created", {"grievance_id": i}, recipient_ids=frozenset({1}))
+                    for i in range(4)])
+    subscriber = _subscriber(1)
+    assert [e.data["grievance_id"] for e in broker.subscribe(subscriber, f"{broker.boot_id}-2")] == [2, 3]
+    assert broker.subscribe(subscriber, f"{broker.boot_id}-1") is None
+    assert broker.subscribe(subscriber, "otherboot-3") is None
+
+
+def test_stream_authenticates_off_the_event_loop(client, monkeypatch):
+    threads = []
+
+    def authenticate(request, access_token):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("worker")
+        return original(request, access_token)
+
+    original = events._authenticate
+    monkeypatch.setattr(events, "_authenticate", authenticate)
+
+    assert client.get("/events/stream", params={"access_token": "garbage"}).status_code == 401
+    assert threads == ["worker"]
@@ -0,0 +1,43 @@
+import csv
+import gzip
+import io
+import json
+from Grievances import export
+
+
+def test_csv_export_streams_every_visible_row_in_id_order(client, login, create_grievance, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    _, alice, _ = login()
+    _, bob, _ = login()
+    mine = [create_grievance(alice, f"Alice issue {i}, with a comma")["ticket_id"] for i in range(5)]
+    create_grievance(bob, "Bob issue")
+
+    response = client.get("/grievances/export", headers=alice)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["ticket_id"] for r in rows] == mine
+    assert rows[0]["grievance_content"] == "Alice issue 0, with a comma"
+    assert rows[0]["status"] == "pending" and rows[0]["department"] == "OTR"
+
+
+def test_ndjson_and_gzip_exports_carry_the_same_rows(client, login, create_grievance):
+    _, user, _ = login()
+    for i in range(3):
+        create_grievance(user, f"Issue {i}")
+
+    ndjson = client.get("/grievances/export", params={"format": "ndjson"}, headers=user)
+    compressed = client.get("/grievances/export", params={"format": "ndjson", "gzip": True}, headers=user)
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["grievance_content"] for line in lines] == ["Issue 0", "Issue 1", "Issue 2"]
+    assert set(lines[0]) == set(export.COLUMNS)
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(compressed.content) == ndjson.content
+
+
+def test_empty_csv_export_still_has_a_header(client, login):
+    _, user, _ = login()
+    response = client.get("/grievances/export", params={"status": "solved"}, headers=user)
+    assert response.text.strip() == ",".join(export.COLUMNS)
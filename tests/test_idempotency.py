@@ -0,0 +1,40 @@
+from Grievances.models import Grievance
+
+
+def test_retry_replays_the_stored_response(client, login, db):
+    _, headers, _ = login()
+    headers = {**headers, "Idempotency-Key": "create-1"}
+    form = {"grievance": "Projector in room 12 is broken", "department_id": 1}
+
+    first = client.post("/grievances/", data=form, headers=headers)
+    retry = client.post("/grievances/", data=form, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.query(Grievance).count() == 1
+
+
+def test_reusing_a_key_with_a_different_body_is_rejected(client, login):
+    _, headers, _ = login()
+    headers = {**headers, "Idempotency-Key": "create-2"}
+    client.post("/grievances/", data={"grievance": "first text", "department_id": 1}, headers=headers)
+    response = client.post("/grievances/", data={"grievance": "second text", "department_id": 1}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_keys_are_scoped_to_the_caller(client, login, db):
+    _, alice, _ = login()
+    _, bob, _ = login()
+    form = {"grievance": "Library closes too early", "department_id": 1}
+    client.post("/grievances/", data=form, headers={**alice, "Idempotency-Key": "same"})
+    response = client.post("/grievances/", data=form, headers={**bob, "Idempotency-Key": "same"})
+    assert "Idempotent-Replayed" not in response.headers
+    assert db.query(Grievance).count() == 2
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, login, db, create_grievance):
+    _, headers, _ = login()
+    create_grievance(headers)
+    create_grievance(headers)
+    assert db.query(Grievance).count() == 2
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+import database
+from Jobs import queue
+from Jobs.models import Job
+from Jobs.worker import JobWorkerPool
+
+calls = []
+
+
+@pytest.fixture(autouse=True)
+def test_tasks(monkeypatch):
+    calls.clear()
+
+    def record(db, value):
+        calls.append(value)
+
+    def fail(db):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(queue.TASKS, "test.record", queue.Task(record, "test", 3))
+    monkeypatch.setitem(queue.TASKS, "test.fail", queue.Task(fail, "test", 2))
+
+
+def test_job_runs_once_and_is_done(db):
+    job = queue.enqueue(db, "test.record", {"value": 1})
+    db.commit()
+
+    assert queue.run_pending("test") == {"done": 1}
+    assert queue.run_pending("test") == {}
+    db.refresh(job)
+    assert (job.status, job.attempts, calls) == ("done", 1, [1])
+
+
+def test_failing_job_retries_with_backoff_then_dies(db):
+    job = queue.enqueue(db, "test.fail")
+    db.commit()
+    now = datetime.utcnow()
+
+    assert queue.run_pending("test", now) == {"retry": 1}
+    assert queue.run_pending("test", now) == {}  # backing off
+    assert queue.run_pending("test", now + timedelta(hours=2)) == {"dead": 1}
+    db.refresh(job)
+    assert job.status == "dead" and "boom" in job.last_error
+
+
+def test_lease_is_renewed_while_a_long_job_runs(db, monkeypatch):
+    monkeypatch.setattr(queue, "LEASE_RENEW_SECONDS", 0.05)
+    job = queue.enqueue(db, "test.record", {"value": 3})
+    db.commit()
+
+    def slow(session, value):
+        time.sleep(0.3)
+        # Another worker looking 2s later, when the original 1s lease would have run out
+        with database.SessionLocal() as other:
+            calls.append(queue.claim(other, "test", "other-worker", datetime.utcnow() + timedelta(seconds=2)))
+
+    monkeypatch.setitem(queue.TASKS, "test.record", queue.Task(slow, "test", 3))
+    with database.SessionLocal() as session:
+        row = queue.claim(session, "test", "me", lease_seconds=1)
+
+    assert queue.execute(row, "me") == "done"
+    assert calls == [None]
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("done", 1)
+
+
+def test_purge_keeps_recent_and_unfinished_jobs(db):
+    now = datetime.utcnow()
+    rows = {
+        "old_done": ("done", now - queue.DONE_RETENTION - timedelta(minutes=1)),
+        "recent_done": ("done", now - timedelta(minutes=1)),
+        "old_dead": ("dead", now - queue.DEAD_RETENTION - timedelta(minutes=1)),
+        "recent_dead": ("dead", now - queue.DONE_RETENTION - timedelta(minutes=1)),
+        "queued": ("queued", None),
+    }
+    for name, (status, finished_at) in rows.items():
+        db.add(Job(queue="test", name=name, payload="{}", status=status, run_at=now, finished_at=finished_at))
+    db.commit()
+
+    assert queue.purge_finished(db, now) == 2
+    assert sorted(name for (name,) in db.query(Job.name)) == ["queued", "recent_dead", "recent_done"]
+
+
+def test_worker_pool_runs_queued_jobs(db):
+    queue.enqueue(db, "test.record", {"value": 2})
+    db.commit()
+    pool = JobWorkerPool({"test": 1})
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+    assert calls == [2]
+    assert db.query(Job.status).filter(Job.name == "test.record").scalar() == "done"
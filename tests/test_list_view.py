@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from Department.models import Department
+from Grievances import list_view, sla
+from Grievances.models import Grievance, GrievanceListView
+
+
+def _view(db):
+    db.expire_all()
+    return {row.grievance_id: {c.name: getattr(row, c.name) for c in GrievanceListView.__table__.columns}
+            for row in db.query(GrievanceListView)}
+
+
+def test_view_rows_match_a_full_rebuild_after_orm_and_core_writes(client, login, department, create_grievance, db):
+    user_id, user, _ = login()
+    it = department("IT")
+    employee_id, employee, _ = login(role="employee", department_id=1)
+    _, admin, _ = login(role="admin", department_id=1)
+    tickets = [create_grievance(user, f"Issue {i}") for i in range(4)]
+    claimed = client.post("/grievances/claim-next", headers=employee).json()
+    client.post("/comments/", json={"grievance_id": claimed["id"], "user_id": employee_id, "content": "on it"},
+                headers=employee)
+    client.post("/grievances/bulk", json={"action": "transfer", "new_department_id": it,
+                                          "ticket_ids": [tickets[1]["ticket_id"]]}, headers=admin)
+    db.execute(update(Grievance).where(Grievance.id == tickets[2]["id"])
+               .values(sla_started_at=datetime.utcnow() - timedelta(days=3)))
+    db.commit()
+    sla.run_sla_sweep(db)
+
+    live = _view(db)
+    assert live[claimed["id"]]["comment_count"] == 1
+    assert live[tickets[1]["id"]]["department_name"] == "IT"
+    assert live[tickets[2]["id"]]["priority"] == 1 and live[tickets[2]["id"]]["last_status"] == "escalated"
+
+    list_view.rebuild(db)
+    assert _view(db) == live
+
+
+def test_renaming_a_department_reorders_lists_sorted_by_it(client, login, department, create_grievance, db):
+    _, user, _ = login()
+    it = department("IT")
+    in_otr = create_grievance(user, "Issue in OTR")
+    in_it = create_grievance(user, "Issue in IT", department_id=it)
+
+    def order():
+        items = client.get("/grievances/", params={"sort_by": "department", "sort_order": "asc"},
+                           headers=user).json()["items"]
+        return [item["id"] for item in items]
+
+    assert order() == [in_it["id"], in_otr["id"]]
+    db.get(Department, it).name = "ZZ Infrastructure"
+    db.commit()
+    assert order() == [in_otr["id"], in_it["id"]]
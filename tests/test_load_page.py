@@ -0,0 +1,34 @@
+from Grievances import crud, schemas
+from Grievances.models import Grievance, GrievanceAttachment
+
+
+def _attach(db, grievance_id, name):
+    db.add(GrievanceAttachment(grievance_id=grievance_id, file_path=f"uploads/{name}", file_name=name,
+                               file_type="image/png", file_size=123))
+    db.commit()
+
+
+def test_rows_match_the_orm_response_in_the_requested_order(login, db, create_grievance):
+    _, headers, _ = login()
+    ids = [create_grievance(headers, f"grievance {i}")["id"] for i in range(3)]
+    _attach(db, ids[0], "a.png")
+    _attach(db, ids[0], "b.png")
+    _attach(db, ids[2], "c.png")
+    order = [ids[2], ids[0], ids[1]]
+
+    rows = crud.load_page(db, order)
+
+    assert [row["id"] for row in rows] == order
+    assert [a["file_name"] for a in rows[1]["attachments"]] == ["a.png", "b.png"]
+    for row in rows:
+        expected = schemas.GrievanceOut.model_validate(db.get(Grievance, row["id"]))
+        expected.status_history, expected.timeline = [], []  # list responses leave the history out
+        assert schemas.GrievanceOut.model_validate(row) == expected
+
+
+def test_missing_ids_are_skipped(login, create_grievance, db):
+    _, headers, _ = login()
+    grievance = create_grievance(headers)
+
+    assert crud.load_page(db, []) == []
+    assert [row["id"] for row in crud.load_page(db, [grievance["id"] + 100, grievance["id"]])] == [grievance["id"]]
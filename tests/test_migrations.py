@@ -0,0 +1,56 @@
+import sqlite3
+from sqlalchemy import create_engine, inspect
+import migrations
+
+# grievances, comments and history as they were before priority, duplicates,
+# routing suggestions and the change feed (the schema of the shipped grievance.db)
+OLD_SCHEMA = """
+CREATE TABLE departments (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL);
+CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR, email VARCHAR, password VARCHAR,
+                    department_id INTEGER, role VARCHAR(11));
+CREATE TABLE grievances (id INTEGER NOT NULL PRIMARY KEY, ticket_id VARCHAR, user_id INTEGER,
+                         department_id INTEGER, grievance_content VARCHAR, assigned_to INTEGER,
+                         status VARCHAR(10), created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                         resolved_by INTEGER, resolved_at DATETIME);
+CREATE TABLE comments (id INTEGER NOT NULL PRIMARY KEY, grievance_id INTEGER, user_id INTEGER,
+                       content VARCHAR, timestamp DATETIME);
+CREATE TABLE grievance_status_history (id INTEGER NOT NULL PRIMARY KEY, grievance_id INTEGER, status VARCHAR,
+                                       changed_at DATETIME DEFAULT CURRENT_TIMESTAMP, changed_by_id INTEGER);
+INSERT INTO departments VALUES (1, 'IT');
+INSERT INTO users VALUES (1, 'A', 'a@example.com', 'x', 1, 'user');
+INSERT INTO grievances (id, ticket_id, user_id, department_id, grievance_content, status, created_at)
+VALUES (1, 't1', 1, 1, 'wifi down', 'pending', '2024-01-01 10:00:00'),
+       (2, 't2', 1, 1, 'water leak', 'solved', '2024-01-02 10:00:00');
+INSERT INTO comments VALUES (1, 1, 1, 'hello', '2024-01-01 11:00:00');
+INSERT INTO grievance_status_history (grievance_id, status, changed_at) VALUES (2, 'solved', '2024-01-03 09:00:00');
+"""
+
+
+def test_upgrade_adds_columns_indexes_and_backfills(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(OLD_SCHEMA)
+    engine = create_engine(f"sqlite:///{path}")
+
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)  # idempotent
+
+    inspector = inspect(engine)
+    grievance_columns = {c["name"] for c in inspector.get_columns("grievances")}
+    assert {"priority", "duplicate_of_id", "suggested_department_id", "updated_at", "change_seq"} <= grievance_columns
+    assert "notes" in {c["name"] for c in inspector.get_columns("grievance_status_history")}
+    assert "ix_comments_grievance_timestamp" in {i["name"] for i in inspector.get_indexes("comments")}
+    assert "ix_grievance_status_history_timeline" in {
+        i["name"] for i in inspector.get_indexes("grievance_status_history")}
+    assert "ix_grievances_claim_queue" in {i["name"] for i in inspector.get_indexes("grievances")}
+
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT priority, updated_at, change_seq, sla_started_at FROM grievances ORDER BY id").all()
+        comment_seq = connection.exec_driver_sql("SELECT change_seq FROM comments").scalar()
+    assert [r.priority for r in rows] == [0, 0]
+    assert all(r.updated_at for r in rows)
+    assert [r.sla_started_at for r in rows] == ["2024-01-01 10:00:00", "2024-01-03 09:00:00"]
+    seqs = [r.change_seq for r in rows] + [comment_seq]
+    assert None not in seqs and len(set(seqs)) == 3
+    engine.dispose()
@@ -0,0 +1,65 @@
+import socket
+from datetime import datetime, timedelta
+from Notifications import dispatcher
+from Notifications.models import NotificationOutbox
+from Notifications.sink import LocalSink
+
+
+def _statuses(db, recipient_id):
+    db.expire_all()
+    return [row.status for row in db.query(NotificationOutbox).filter_by(recipient_id=recipient_id)]
+
+
+def test_changes_are_sent_as_one_digest_per_recipient(client, login, create_grievance, db, monkeypatch):
+    user_id, user, _ = login(email="raiser@example.com")
+    employee_id, employee, _ = login(role="employee", department_id=1)
+    grievance = create_grievance(user)
+    client.post("/grievances/claim-next", headers=employee)
+    client.post(f"/grievances/{grievance['id']}/resolve", params={"resolver_id": employee_id}, headers=employee)
+
+    with LocalSink() as sink:
+        monkeypatch.setattr(dispatcher, "SMTP_PORT", sink.smtp_port)
+        assert dispatcher.dispatch(db) == {"sent": 2, "retry": 0, "dead": 0}
+        assert dispatcher.dispatch(db) == {"sent": 0, "retry": 0, "dead": 0}
+
+    digest = next(e for e in sink.emails if e["to"] == ["<raiser@example.com>"])
+    assert digest["subject"] == "2 updates on your grievances"
+    assert "pending to in progress" in digest["body"] and "in progress to solved" in digest["body"]
+    assert _statuses(db, user_id) == ["sent", "sent"]
+
+
+def test_failed_delivery_backs_off_then_dies(client, login, create_grievance, db, monkeypatch):
+    user_id, user, _ = login()
+    _, employee, _ = login(role="employee", department_id=1)
+    create_grievance(user)
+    client.post("/grievances/claim-next", headers=employee)
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        closed_port = unused.getsockname()[1]
+    monkeypatch.setattr(dispatcher, "SMTP_PORT", closed_port)
+    monkeypatch.setattr(dispatcher, "MAX_ATTEMPTS", 2)
+
+    now = datetime.utcnow()
+    assert dispatcher.dispatch(db, now)["retry"] == 2
+    assert dispatcher.dispatch(db, now)["retry"] == 0  # backing off
+    assert dispatcher.dispatch(db, now + timedelta(days=1))["dead"] == 2
+    assert _statuses(db, user_id) == ["dead"]
+
+
+def test_purge_keeps_pending_and_recent_notifications(login, db):
+    user_id, _, _ = login()
+    now = datetime.utcnow()
+    rows = {
+        "old_sent": ("sent", now - timedelta(days=40), now - dispatcher.SENT_RETENTION - timedelta(minutes=1)),
+        "recent_sent": ("sent", now - timedelta(days=40), now - timedelta(minutes=1)),
+        "old_dead": ("dead", now - dispatcher.DEAD_RETENTION - timedelta(minutes=1), None),
+        "recent_dead": ("dead", now - timedelta(days=1), None),
+        "old_pending": ("pending", now - timedelta(days=40), None),
+    }
+    for message, (status, created_at, sent_at) in rows.items():
+        db.add(NotificationOutbox(recipient_id=user_id, channel="email", kind="comment", message=message,
+                                  status=status, next_attempt_at=created_at, created_at=created_at, sent_at=sent_at))
+    db.commit()
+
+    assert dispatcher.purge_outbox(db, now) == 2
+    assert sorted(m for (m,) in db.query(NotificationOutbox.message)) == ["old_pending", "recent_dead", "recent_sent"]
@@ -0,0 +1,82 @@
+import asyncio
+from overload import OverloadProtectionMiddleware, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, classify
+
+
+def _scope(method, path):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+class _App:
+    """ASGI app whose requests finish only when released."""
+
+    def __init__(self):
+        self.started = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.started.append(scope["path"])
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _request(middleware, method, path):
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await middleware(_scope(method, path), None, send)
+    return statuses[0]
+
+
+def test_classify():
+    assert classify("POST", "/grievances/T-1/resolve") == PRIORITY_HIGH
+    assert classify("GET", "/grievances/search/") == PRIORITY_LOW
+    assert classify("GET", "/grievances/T-1") == PRIORITY_NORMAL
+
+
+def test_waiter_is_admitted_when_a_slot_frees():
+    async def scenario():
+        app = _App()
+        middleware = OverloadProtectionMiddleware(app, max_concurrency=1, max_queue=1, queue_timeout=5)
+        first = asyncio.create_task(_request(middleware, "GET", "/a"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_request(middleware, "GET", "/b"))
+        await asyncio.sleep(0.01)
+        assert app.started == ["/a"]
+        app.release.set()
+        return await first, await second, app.started
+
+    assert asyncio.run(scenario()) == (200, 200, ["/a", "/b"])
+
+
+def test_full_queue_sheds_equal_priority_and_high_priority_displaces_low():
+    async def scenario():
+        app = _App()
+        middleware = OverloadProtectionMiddleware(app, max_concurrency=1, max_queue=1, queue_timeout=5)
+        running = asyncio.create_task(_request(middleware, "GET", "/a"))
+        await asyncio.sleep(0)
+        low = asyncio.create_task(_request(middleware, "GET", "/grievances/search/"))
+        await asyncio.sleep(0)
+        shed = await _request(middleware, "GET", "/grievances/search/")
+        high = asyncio.create_task(_request(middleware, "POST", "/grievances/T-1/resolve"))
+        displaced = await low
+        app.release.set()
+        return shed, displaced, await running, await high
+
+    assert asyncio.run(scenario()) == (503, 503, 200, 200)
+
+
+def test_waiter_times_out():
+    async def scenario():
+        app = _App()
+        middleware = OverloadProtectionMiddleware(app, max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        running = asyncio.create_task(_request(middleware, "GET", "/a"))
+        await asyncio.sleep(0)
+        timed_out = await _request(middleware, "GET", "/b")
+        app.release.set()
+        return timed_out, await running
+
+    assert asyncio.run(scenario()) == (503, 200)
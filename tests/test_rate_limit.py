@@ -0,0 +1,25 @@
+import rate_limit
+
+
+def test_heavy_user_does_not_throttle_others_with_the_same_role(client, login, monkeypatch):
+    monkeypatch.setitem(rate_limit.ROUTE_GROUP_LIMITS["search"], "user", rate_limit.Limit(2, 0.001))
+    _, heavy, _ = login()
+    _, light, _ = login()
+
+    assert [client.get("/grievances/", headers=heavy).status_code for _ in range(2)] == [200, 200]
+    throttled = client.get("/grievances/", headers=heavy)
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) >= 1
+
+    assert client.get("/grievances/", headers=light).status_code == 200
+
+
+def test_no_limits_are_shared_by_a_whole_role():
+    assert all("role" not in limits for limits in rate_limit.ROUTE_GROUP_LIMITS.values())
+
+
+def test_ip_limit_applies_to_anonymous_callers(client, monkeypatch):
+    monkeypatch.setitem(rate_limit.ROUTE_GROUP_LIMITS["login"], "ip", rate_limit.Limit(1, 0.001))
+    form = {"username": "nobody@example.com", "password": "x"}
+    assert client.post("/login", data=form).status_code == 401
+    assert client.post("/login", data=form).status_code == 429
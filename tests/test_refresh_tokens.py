@@ -0,0 +1,42 @@
+def _refresh(client, token):
+    return client.post("/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_the_token(client, login):
+    _, _, tokens = login()
+    response = _refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert _refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_token_revokes_the_whole_family(client, login):
+    _, _, tokens = login()
+    first = tokens["refresh_token"]
+    second = _refresh(client, first).json()["refresh_token"]
+
+    reused = _refresh(client, first)
+    assert reused.status_code == 401
+    assert "reuse" in reused.json()["detail"]
+    # The legitimate successor is revoked too
+    assert _refresh(client, second).status_code == 401
+
+
+def test_reuse_does_not_affect_other_logins(client, login):
+    _, _, tokens = login(email="twice@example.com")
+    other = client.post("/login", data={"username": "twice@example.com", "password": "pw"}).json()
+    first = tokens["refresh_token"]
+    _refresh(client, first)
+    assert _refresh(client, first).status_code == 401
+    assert _refresh(client, other["refresh_token"]).status_code == 200
+
+
+def test_logout_revokes_the_token(client, login):
+    _, _, tokens = login()
+    assert client.post("/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_unknown_token_is_rejected(client):
+    assert _refresh(client, "not-a-token").status_code == 401
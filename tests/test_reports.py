@@ -0,0 +1,54 @@
+import io
+from datetime import date
+import openpyxl
+import pytest
+from Reports import builder
+
+
+@pytest.fixture(autouse=True)
+def reports_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "REPORTS_DIR", tmp_path / "reports")
+
+
+def _request(client, headers, fmt="xlsx"):
+    today = date.today().isoformat()
+    return client.post("/reports", json={"start": today, "end": today, "format": fmt}, headers=headers)
+
+
+def test_report_is_queued_built_and_downloadable(client, login, create_grievance):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    for i in range(3):
+        create_grievance(user, f"Issue {i}")
+
+    queued = _request(client, admin)
+    assert queued.status_code == 202 and queued.json()["status"] == "queued"
+    job_id = queued.json()["id"]
+    assert client.get(f"/reports/{job_id}/download", headers=admin).status_code == 409
+
+    # What the reports.generate job runs in a worker process
+    builder.run_report(job_id)
+
+    status = client.get(f"/reports/{job_id}", headers=admin).json()
+    assert (status["status"], status["progress"]) == ("done", 100)
+    download = client.get(f"/reports/{job_id}/download", headers=admin)
+    assert download.status_code == 200
+    workbook = openpyxl.load_workbook(io.BytesIO(download.content))
+    assert workbook.worksheets
+
+
+def test_repeated_request_reuses_the_report_until_data_changes(client, login, create_grievance):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    create_grievance(user)
+    first = _request(client, admin, "pdf").json()
+    builder.run_report(first["id"])
+
+    again = _request(client, admin, "pdf").json()
+    assert again["id"] == first["id"] and again["cached"] is True
+
+    create_grievance(user, "Something new happened")
+    fresh = _request(client, admin, "pdf").json()
+    assert fresh["id"] != first["id"] and fresh["cached"] is False
+    builder.run_report(fresh["id"])
+    assert client.get(f"/reports/{fresh['id']}/download", headers=admin).content.startswith(b"%PDF")
@@ -0,0 +1,57 @@
+import pytest
+from Grievances import routing
+from Grievances.models import Grievance
+
+TRAINING = {
+    "IT": ["wifi is down in the hostel", "the wifi router keeps disconnecting", "lab computers cannot reach the wifi",
+           "printer driver fails on lab computers"],
+    "Mess": ["food in the mess is cold", "mess served stale rice at dinner", "dinner food was undercooked",
+             "the mess canteen is dirty"],
+}
+
+
+@pytest.fixture
+def trained(db, department, login, tmp_path, monkeypatch):
+    user_id, _, _ = login()
+    ids = {name: department(name) for name in TRAINING}
+    for name, texts in TRAINING.items():
+        for i, text in enumerate(texts):
+            db.add(Grievance(ticket_id=f"{name}-{i}", user_id=user_id, department_id=ids[name],
+                             grievance_content=text))
+    db.commit()
+    monkeypatch.setattr(routing, "MODEL_PATH", tmp_path / "router.npz")
+    routing.train(db).save(routing.MODEL_PATH)
+    return ids
+
+
+def test_predicts_the_department_of_similar_texts(trained):
+    router = routing.get_router()
+    assert router.predict("wifi not working in my room")[0] == trained["IT"]
+    assert router.predict("the dinner food was cold again")[0] == trained["Mess"]
+    assert router.predict("!!!") is None
+
+
+def test_batch_prediction_matches_single_predictions(trained):
+    router = routing.get_router()
+    texts = ["wifi keeps dropping", "", "stale food at the mess", "printer broken"]
+    batch = router.predict_batch(texts)
+    assert [b and b[0] for b in batch] == [p and p[0] for p in map(router.predict, texts)]
+    for b, p in zip(batch, map(router.predict, texts)):
+        assert (b is None and p is None) or b[1] == pytest.approx(p[1], abs=1e-5)
+
+
+def test_create_stores_a_suggestion_or_reroutes_in_auto_mode(trained, client, login, create_grievance, monkeypatch):
+    _, user, _ = login()
+    suggested = create_grievance(user, "the hostel wifi router is down", department_id=trained["Mess"])
+    assert suggested["department_id"] == trained["Mess"]
+    assert suggested["suggested_department_id"] == trained["IT"]
+
+    monkeypatch.setattr(routing, "ROUTING_MODE", "auto")
+    monkeypatch.setattr(routing, "AUTO_ROUTE_MIN_CONFIDENCE", 0.0)
+    rerouted = create_grievance(user, "lab computers lost wifi", department_id=trained["Mess"])
+    assert rerouted["department_id"] == trained["IT"]
+
+
+def test_untrained_router_suggests_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(routing, "MODEL_PATH", tmp_path / "missing.npz")
+    assert routing.suggest_department("wifi is down") is None
@@ -0,0 +1,73 @@
+from sqlalchemy import update
+from SavedSearches.models import SavedSearch
+
+
+def _search(client, headers, **body):
+    response = client.post("/saved-searches", json={"name": "watch", **body}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _counts(client, headers):
+    return {s["id"]: s["match_count"] for s in client.get("/saved-searches", headers=headers).json()}
+
+
+def test_match_counts_follow_creates_and_status_changes(client, login, create_grievance):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    _, employee, _ = login(role="employee", department_id=1)
+    create_grievance(user, "WiFi down in block A")
+    pending_wifi = _search(client, admin, q="wifi", status="pending")
+    any_wifi = _search(client, admin, q="wifi down")
+    assert _counts(client, admin) == {pending_wifi: 1, any_wifi: 1}
+
+    create_grievance(user, "The wifi is down again")
+    create_grievance(user, "Water cooler is broken")
+    assert _counts(client, admin) == {pending_wifi: 2, any_wifi: 2}
+
+    client.post("/grievances/claim-next", headers=employee)
+    assert _counts(client, admin) == {pending_wifi: 1, any_wifi: 2}
+
+    results = client.get(f"/saved-searches/{pending_wifi}/results", headers=admin).json()
+    assert results["total_count"] == 1
+    assert [g["grievance_content"] for g in results["data"]] == ["The wifi is down again"]
+    assert _counts(client, admin) == {pending_wifi: 1, any_wifi: 2}
+
+
+def test_searches_only_count_what_the_owner_can_see(client, login, create_grievance):
+    _, alice, _ = login()
+    _, bob, _ = login()
+    search = _search(client, alice, q="projector")
+    create_grievance(bob, "Projector is broken")
+    create_grievance(alice, "Projector remote missing")
+    assert _counts(client, alice) == {search: 1}
+    assert client.get(f"/saved-searches/{search}/results", headers=bob).status_code == 404
+
+
+def test_results_are_paged_in_sql_with_whole_word_matches(client, login, create_grievance, db):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    texts = [f"Broken fan number {i} in hall" for i in range(5)] + ["Fans are broken", "broken-fan in lab"]
+    for text in texts:
+        create_grievance(user, text)
+    search = _search(client, admin, q="fan BROKEN")
+
+    first = client.get(f"/saved-searches/{search}/results", params={"limit": 4}, headers=admin).json()
+    second = client.get(f"/saved-searches/{search}/results", params={"skip": 4, "limit": 4}, headers=admin).json()
+
+    contents = [g["grievance_content"] for g in first["data"] + second["data"]]
+    assert first["total_count"] == second["total_count"] == 6 == _counts(client, admin)[search]
+    assert contents == list(reversed([t for t in texts if t != "Fans are broken"]))
+    assert client.get(f"/saved-searches/{search}/results", params={"limit": 201}, headers=admin).status_code == 422
+
+
+def test_reading_results_does_not_write(client, login, create_grievance, db):
+    _, user, _ = login()
+    _, admin, _ = login(role="admin", department_id=1)
+    create_grievance(user, "Projector is broken")
+    search = _search(client, admin, q="projector")
+    db.execute(update(SavedSearch).where(SavedSearch.id == search).values(match_count=42))
+    db.commit()
+
+    assert client.get(f"/saved-searches/{search}/results", headers=admin).json()["total_count"] == 1
+    assert _counts(client, admin) == {search: 42}
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from typing import List
+from fastapi.encoders import jsonable_encoder
+import serialization
+from Grievances import crud, schemas
+
+
+def test_respond_matches_the_generic_fastapi_encoding(login, db, create_grievance):
+    _, headers, _ = login()
+    ids = [create_grievance(headers, f"grievance {i}")["id"] for i in range(3)]
+    rows = crud.load_page(db, ids)
+
+    response = serialization.respond(List[schemas.GrievanceOut], rows)
+
+    models = [schemas.GrievanceOut.model_validate(row) for row in rows]
+    assert json.loads(response.body) == jsonable_encoder(models)
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_already_encoded_content_is_sent_unchanged():
+    assert serialization.FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+    assert serialization.FastJSONResponse({1: datetime(2024, 1, 2, 3, 4, 5)}).body == b'{"1":"2024-01-02T03:04:05"}'
+
+
+def test_list_endpoint_items_match_the_single_grievance_endpoint(client, login, create_grievance):
+    _, headers, _ = login()
+    created = create_grievance(headers)
+
+    page = client.get("/grievances/", headers=headers).json()
+    single = client.get(f"/grievances/{created['ticket_id']}", headers=headers).json()
+
+    assert page["total"] == 1
+    item = page["items"][0]
+    assert {k: v for k, v in item.items() if k not in ("status_history", "timeline")} == \
+           {k: v for k, v in single.items() if k not in ("status_history", "timeline")}
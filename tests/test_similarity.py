@@ -0,0 +1,50 @@
+from Grievances import similarity
+from Grievances.models import Grievance
+
+
+def test_near_duplicates_join_the_first_grievance_cluster(login, create_grievance):
+    _, user, _ = login()
+    first = create_grievance(user, "The wifi in hostel block C has been down since Monday")
+    second = create_grievance(user, "The wifi in hostel block C has been down since monday!")
+    unrelated = create_grievance(user, "Mess food was served cold at dinner")
+    assert first["duplicate_of_id"] is None
+    assert second["duplicate_of_id"] == first["id"]
+    assert unrelated["duplicate_of_id"] is None
+
+
+def test_texts_without_shingles_are_never_duplicates(login, create_grievance):
+    _, user, _ = login()
+    create_grievance(user, "?!")
+    assert similarity.signature("...") is None
+    assert create_grievance(user, "!!!")["duplicate_of_id"] is None
+
+
+def test_sync_picks_up_grievances_committed_after_a_higher_id(login, db):
+    user_id, _, _ = login()
+    text = "Street light outside gate 2 is broken"
+    db.add(Grievance(id=50, ticket_id="early", user_id=user_id, department_id=1, grievance_content="something else"))
+    db.commit()
+    similarity.index.sync(db)
+    db.add(Grievance(id=7, ticket_id="late", user_id=user_id, department_id=1, grievance_content=text))
+    db.commit()
+
+    similarity.index.sync(db)
+
+    assert [i for i, _ in similarity.index.query(similarity.signature(text))] == [7]
+
+
+def test_sync_drops_deleted_grievances_from_the_change_feed(login, db):
+    user_id, _, _ = login()
+    text = "Street light outside gate 2 is broken"
+    grievance = Grievance(ticket_id="gone", user_id=user_id, department_id=1, grievance_content=text)
+    db.add(grievance)
+    db.commit()
+    similarity.index.sync(db)
+    assert similarity.index.get(grievance.id) is not None
+
+    db.delete(grievance)
+    db.commit()
+    similarity.index.sync(db)
+
+    assert similarity.index.get(grievance.id) is None
+    assert similarity.index.query(similarity.signature(text)) == []
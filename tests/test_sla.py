@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, update
+from Grievances import sla
+from Grievances.models import Grievance, GrievanceStatus, GrievanceStatusHistory
+
+
+def _grievance(db, user_id, status=GrievanceStatus.pending, age=timedelta(days=10), assigned_to=None):
+    created = datetime.utcnow() - age
+    grievance = Grievance(ticket_id=f"S-{datetime.utcnow().timestamp()}", user_id=user_id, department_id=1,
+                          grievance_content="lights out", status=status, assigned_to=assigned_to,
+                          created_at=created, sla_started_at=created)
+    db.add(grievance)
+    db.commit()
+    return grievance
+
+
+def _history(db, grievance_id):
+    return [h.status for h in db.query(GrievanceStatusHistory).filter_by(grievance_id=grievance_id)]
+
+
+def test_old_grievance_claimed_recently_keeps_its_assignee(client, login, db):
+    user_id, _, _ = login()
+    employee_id, employee, _ = login(role="employee", department_id=1)
+    grievance = _grievance(db, user_id)
+
+    assert client.post("/grievances/claim-next", headers=employee).json()["id"] == grievance.id
+    assert sla.run_sla_sweep(db) == {"pending": 0, "in_progress": 0}
+
+    db.refresh(grievance)
+    assert grievance.assigned_to == employee_id and grievance.status == GrievanceStatus.in_progress
+
+
+def test_stalled_grievance_is_reassigned_once(login, db):
+    user_id, _, _ = login()
+    employee_id, _, _ = login(role="employee", department_id=1)
+    grievance = _grievance(db, user_id, GrievanceStatus.in_progress, timedelta(hours=73), employee_id)
+
+    assert sla.run_sla_sweep(db)["in_progress"] == 1
+    assert sla.run_sla_sweep(db) == {"pending": 0, "in_progress": 0}
+
+    db.refresh(grievance)
+    assert (grievance.status, grievance.assigned_to, grievance.priority) == (GrievanceStatus.pending, None, 1)
+    assert _history(db, grievance.id) == ["reassigned"]
+
+
+def test_pending_grievance_escalates_once_per_sla_period(login, db):
+    user_id, _, _ = login()
+    grievance = _grievance(db, user_id, age=timedelta(hours=49))
+    now = datetime.utcnow()
+
+    assert sla.run_sla_sweep(db, now)["pending"] == 1
+    assert sla.run_sla_sweep(db, now + timedelta(hours=1))["pending"] == 0
+    assert sla.run_sla_sweep(db, now + timedelta(hours=49))["pending"] == 1
+
+    db.refresh(grievance)
+    assert grievance.priority == 2
+    assert _history(db, grievance.id) == ["escalated", "escalated"]
+
+
+def test_rows_changed_after_the_select_are_not_recorded(login, db):
+    user_id, _, _ = login()
+    raced = _grievance(db, user_id, age=timedelta(hours=49))
+    other = _grievance(db, user_id, age=timedelta(hours=49))
+
+    @event.listens_for(db, "do_orm_execute")
+    def resolve_before_update(state):
+        if state.is_update:
+            state.session.connection().execute(
+                update(Grievance.__table__).where(Grievance.id == raced.id).values(status="solved"))
+
+    assert sla.run_sla_sweep(db)["pending"] == 1
+    assert _history(db, raced.id) == []
+    assert _history(db, other.id) == ["escalated"]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from Analytics import snapshot
+from Grievances.models import Grievance, GrievanceStatus
+
+START = datetime(2024, 3, 4, 9, 0)
+HOURS = {1: [1, 2, 3, 10, 40], 2: [5, 7]}
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "snapshot")
+    monkeypatch.setattr(snapshot, "_snapshot", None)
+    return tmp_path / "snapshot"
+
+
+@pytest.fixture
+def grievances(db, login, department):
+    user_id, _, _ = login()
+    second = department("IT")
+    assert second == 2
+    for department_id, hours in HOURS.items():
+        for i, h in enumerate(hours):
+            db.add(Grievance(ticket_id=f"{department_id}-{i}", user_id=user_id, department_id=department_id,
+                             grievance_content="x", status=GrievanceStatus.solved, created_at=START,
+                             resolved_at=START + timedelta(hours=h)))
+    db.add(Grievance(ticket_id="open", user_id=user_id, department_id=1, grievance_content="x",
+                     status=GrievanceStatus.pending, created_at=START))
+    db.commit()
+
+
+def test_group_percentiles_match_numpy(db, snapshot_dir, grievances):
+    snapshot.build(db)
+    rows = snapshot.aggregate(snapshot.get_snapshot(), ["department_id"], percentiles=[50, 90])
+
+    by_department = {row["key"]["department_id"]: row for row in rows}
+    assert {d: (r["count"], r["resolved"]) for d, r in by_department.items()} == {1: (6, 5), 2: (2, 2)}
+    for department_id, hours in HOURS.items():
+        row = by_department[department_id]
+        assert row["resolution_mean_hours"] == round(float(np.mean(hours)), 2)
+        assert row["resolution_percentiles_hours"] == {
+            "50": round(float(np.percentile(hours, 50)), 2), "90": round(float(np.percentile(hours, 90)), 2)}
+
+
+def test_filters_and_calendar_groups(db, snapshot_dir, grievances):
+    snapshot.build(db)
+    rows = snapshot.aggregate(snapshot.get_snapshot(), ["status", "week"], status="pending")
+    assert [(r["key"], r["count"], r["resolved"]) for r in rows] == [
+        ({"status": "pending", "week": START.date()}, 1, 0)]
+
+
+def test_rebuild_publishes_a_new_version_and_prunes_old_ones(db, snapshot_dir, grievances, monkeypatch):
+    versions = iter([1000.0, 1000.0, 2000.0, 2000.0, 3000.0, 3000.0])  # version, then BUILT_AT
+    monkeypatch.setattr(snapshot.time, "time", lambda: next(versions))
+    for _ in range(3):
+        snapshot.build(db)
+    assert snapshot.get_snapshot().version == "3000000"
+    assert sorted(p.name for p in snapshot_dir.iterdir() if p.is_dir()) == ["2000000", "3000000"]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from Comments.models import Comment
+from Grievances.models import GrievanceStatusHistory
+
+T0 = datetime(2024, 5, 1, 12, 0)
+
+
+def _fill(db, grievance_id, user_id):
+    # Ties on purpose: several entries share a timestamp across and within sources
+    for i in range(7):
+        db.add(Comment(grievance_id=grievance_id, user_id=user_id, content=f"c{i}",
+                       timestamp=T0 + timedelta(minutes=i // 2)))
+    for i, status in enumerate(["in_progress", "escalated", "solved"]):
+        db.add(GrievanceStatusHistory(grievance_id=grievance_id, status=status, changed_at=T0 + timedelta(minutes=i)))
+    db.commit()
+
+
+def _pages(client, headers, ticket_id, order, limit):
+    entries, cursor = [], None
+    while True:
+        params = {"order": order, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/grievances/{ticket_id}/timeline", params=params, headers=headers).json()
+        assert len(page["entries"]) <= limit
+        entries += page["entries"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return [(e["type"], e["id"]) for e in entries], entries
+
+
+def test_pages_concatenate_to_the_full_ordered_timeline(client, login, create_grievance, db):
+    user_id, user, _ = login()
+    grievance = create_grievance(user)
+    _fill(db, grievance["id"], user_id)
+
+    everything, entries = _pages(client, user, grievance["ticket_id"], "asc", 200)
+    assert len(everything) == 11  # plus the "pending" entry written at creation
+    assert [e["timestamp"] for e in entries] == sorted(e["timestamp"] for e in entries)
+    for limit in (1, 3, 4):
+        assert _pages(client, user, grievance["ticket_id"], "asc", limit)[0] == everything
+        assert _pages(client, user, grievance["ticket_id"], "desc", limit)[0] == everything[::-1]
+
+
+def test_bad_cursor_and_foreign_grievance_are_rejected(client, login, create_grievance):
+    _, user, _ = login()
+    _, other, _ = login()
+    grievance = create_grievance(user)
+    url = f"/grievances/{grievance['ticket_id']}/timeline"
+    assert client.get(url, params={"cursor": "not-a-cursor"}, headers=user).status_code == 400
+    assert client.get(url, headers=other).status_code == 404
@@ -0,0 +1,38 @@
+import pytest
+from Notifications import dispatcher, webhooks
+from Notifications.sink import LocalSink
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8025/hook",
+    "http://localhost/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://10.1.2.3/hook",
+    "http://192.168.0.10/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "ftp://93.184.216.34/hook",
+])
+def test_registering_an_internal_or_non_http_webhook_is_rejected(client, login, url):
+    _, headers, _ = login()
+    response = client.put("/notifications/preferences", json={"webhook_url": url}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_public_webhook_is_accepted(client, login):
+    _, headers, _ = login()
+    response = client.put("/notifications/preferences", json={"webhook_url": "https://93.184.216.34/hook"},
+                          headers=headers)
+    assert response.status_code == 200
+    assert response.json()["webhook_url"] == "https://93.184.216.34/hook"
+
+
+def test_delivery_rechecks_the_address(monkeypatch):
+    with LocalSink() as sink:
+        with pytest.raises(dispatcher.DeliveryError):
+            dispatcher.send_webhook(sink.http_url + "/hook", {"items": []})
+        assert sink.webhooks == []
+
+        monkeypatch.setattr(webhooks, "ALLOW_PRIVATE_ADDRESSES", True)
+        dispatcher.send_webhook(sink.http_url + "/hook", {"items": []})
+        assert sink.webhooks == [{"path": "/hook", "payload": {"items": []}}]
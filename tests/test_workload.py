@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from Grievances import sla
+from Grievances.models import Grievance
+from Workload import crud as workload_crud
+from Workload.models import WorkloadCounter
+
+
+def _counts(db, scope):
+    db.expire_all()
+    return {row.scope_id: (row.open_count, row.in_progress_count, row.solved_count)
+            for row in workload_crud.get_counters(db, scope) if any((row.open_count, row.in_progress_count,
+                                                                      row.solved_count))}
+
+
+def test_live_counters_match_a_full_reconcile(client, login, department, create_grievance, db):
+    _, user, _ = login()
+    it = department("IT")
+    admin_id, admin, _ = login(role="admin", department_id=1)
+    employee_id, employee, _ = login(role="employee", department_id=1)
+    tickets = [create_grievance(user, f"Problem number {i} in block {i}") for i in range(5)]
+    claimed = [client.post("/grievances/claim-next", headers=employee).json() for _ in range(3)]
+    client.post(f"/grievances/{claimed[0]['id']}/resolve", params={"resolver_id": employee_id}, headers=employee)
+    client.post(f"/grievances/{claimed[1]['ticket_id']}/transfer", json={"new_department_id": it}, headers=admin)
+    client.post("/grievances/bulk", json={"action": "close", "ticket_ids": [tickets[4]["ticket_id"]]}, headers=admin)
+    db.execute(update(Grievance).where(Grievance.id == claimed[2]["id"])
+               .values(sla_started_at=datetime.utcnow() - timedelta(days=4)))
+    db.commit()
+    sla.run_sla_sweep(db)
+
+    live = (_counts(db, "department"), _counts(db, "employee"))
+    assert live[0] == {1: (2, 0, 1), it: (1, 0, 0)}
+    assert live[1] == {employee_id: (0, 0, 1)}
+
+    assert workload_crud.reconcile(db)[1] == 0
+    assert (_counts(db, "department"), _counts(db, "employee")) == live
+
+
+def test_reconcile_repairs_drift(login, create_grievance, db):
+    _, user, _ = login()
+    create_grievance(user)
+    db.execute(update(WorkloadCounter).where(WorkloadCounter.scope == "department").values(open_count=7))
+    db.commit()
+
+    assert workload_crud.reconcile(db) == (1, 1)
+    assert _counts(db, "department") == {1: (1, 0, 0)}